@@ -0,0 +1,33 @@
+"""Add catalog_version counter for in-memory model catalogs
+
+Revision ID: c4a9e2f7b1d3
+Revises: bf1e532df22f
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e2f7b1d3'
+down_revision = 'bf1e532df22f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    catalog_version = op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_version, [{'id': 1, 'version': 0, 'updated_at': datetime.utcnow()}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_version')
@@ -0,0 +1,45 @@
+"""Store amounts and prices with six decimals (micro-dollars)
+
+Revision ID: d7f3b8a1c2e5
+Revises: c4a9e2f7b1d3
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f3b8a1c2e5'
+down_revision = 'c4a9e2f7b1d3'
+branch_labels = None
+depends_on = None
+
+# table → columns with their (old, new) types
+COLUMNS = {
+    'accounts': {'balance': (sa.Numeric(10, 2), sa.Numeric(16, 6))},
+    'transactions': {'amount': (sa.Numeric(10, 2), sa.Numeric(16, 6))},
+    'usage_logs': {'total_cost': (sa.Numeric(10, 6), sa.Numeric(16, 6))},
+    'models': {
+        'base_input_price': (sa.Numeric(10, 4), sa.Numeric(16, 6)),
+        'base_output_price': (sa.Numeric(10, 4), sa.Numeric(16, 6)),
+        'beaver_ai_input_price': (sa.Numeric(10, 4), sa.Numeric(16, 6)),
+        'beaver_ai_output_price': (sa.Numeric(10, 4), sa.Numeric(16, 6)),
+    },
+}
+
+
+def upgrade() -> None:
+    # Batch mode so SQLite (no ALTER COLUMN) rebuilds the tables
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, (old_type, new_type) in columns.items():
+                batch_op.alter_column(column, existing_type=old_type, type_=new_type)
+
+
+def downgrade() -> None:
+    # Rounds amounts back to the old scales
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, (old_type, new_type) in columns.items():
+                batch_op.alter_column(column, existing_type=new_type, type_=old_type)
@@ -1,21 +1,64 @@
+from typing import Optional
+
 from fastapi import Header, HTTPException, status, Depends, Request
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from app.database.db import SessionLocal
+from app.database.db import AsyncSessionLocal
 from app.database.models import APIKey, Account
+from app.core.api_key_cache import api_key_cache, APIKeySnapshot
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
+
+
+async def get_api_key_snapshot(
+    api_key_value: str,
+    db: Optional[AsyncSession] = None
+) -> Optional[APIKeySnapshot]:
+    """
+    Resolve an API key string to an immutable key/account snapshot.
+    Served from the in-process cache when possible; on a miss the key is
+    loaded with its account in one query and cached.
+    Returns None for unknown or revoked keys.
+    """
+    snapshot = api_key_cache.get(api_key_value)
+    if snapshot is not None:
+        return snapshot
+
+    owns_session = db is None
+    if owns_session:
+        db = AsyncSessionLocal()
+
+    try:
+        result = await db.execute(
+            select(APIKey).options(
+                joinedload(APIKey.account)
+            ).where(
+                APIKey.key == api_key_value,
+                APIKey.is_active == True
+            )
+        )
+        api_key = result.scalars().first()
+
+        if not api_key:
+            return None
+
+        snapshot = APIKeySnapshot.from_model(api_key)
     finally:
-        db.close()
+        if owns_session:
+            await db.close()
+
+    api_key_cache.put(snapshot)
+    return snapshot
 
 
 async def verify_api_key(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Verify API key from request.
@@ -42,12 +85,7 @@ async def verify_api_key(
 
     api_key_value = authorization.replace("Bearer ", "").strip()
 
-    api_key = db.query(APIKey).options(
-        joinedload(APIKey.account)
-    ).filter(
-        APIKey.key == api_key_value,
-        APIKey.is_active == True
-    ).first()
+    api_key = await get_api_key_snapshot(api_key_value, db)
 
     if not api_key:
         raise HTTPException(
@@ -3,27 +3,25 @@ Authentication dependencies for FastAPI routes
 Supports both JWT and API key authentication
 """
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.database.db import SessionLocal
+from app.database.db import AsyncSessionLocal
 from app.database.models import Account
 from app.auth.jwt import verify_token
-from app.auth.api_key import verify_api_key
+from app.auth.api_key import verify_api_key, get_api_key_snapshot
 
 
-def get_db():
+async def get_db():
     """Database session dependency"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 async def get_current_user_jwt(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Account:
     """
     Get current user from JWT token.
@@ -63,7 +61,8 @@ async def get_current_user_jwt(
         )
     
     # Get account from database
-    account = db.query(Account).filter(Account.id == account_id).first()
+    result = await db.execute(select(Account).where(Account.id == account_id))
+    account = result.scalars().first()
     if not account:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -75,7 +74,7 @@ async def get_current_user_jwt(
 
 async def get_current_user_optional(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[Account]:
     """
     Get current user from JWT token (optional).
@@ -90,7 +89,7 @@ async def get_current_user_optional(
 
 async def get_current_user_flexible(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Account:
     """
     Get current user from either JWT or API key.
@@ -118,15 +117,7 @@ async def get_current_user_flexible(
     
     # Check if it's an API key (starts with "beaver_")
     if api_key_value.startswith("beaver_"):
-        from app.database.models import APIKey
-        from sqlalchemy.orm import joinedload
-        
-        api_key = db.query(APIKey).options(
-            joinedload(APIKey.account)
-        ).filter(
-            APIKey.key == api_key_value,
-            APIKey.is_active == True
-        ).first()
+        api_key = await get_api_key_snapshot(api_key_value, db)
         
         if not api_key:
             raise HTTPException(
@@ -141,7 +132,16 @@ async def get_current_user_flexible(
                 detail="Insufficient account balance. Please top up your account."
             )
         
-        return api_key.account
+        # Routes need a session-bound Account (some of them update it),
+        # so load it by primary key instead of re-running the key lookup
+        account = await db.get(Account, api_key.account_id)
+        if not account:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Authentication required (JWT token or API key)"
+            )
+        
+        return account
     
     # Not a JWT token and not an API key
     raise HTTPException(
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -20,6 +20,14 @@ class Settings(BaseSettings):
     PERPLEXITY_API_KEY: str = ""
     XAI_API_KEY: str = ""
 
+    # Provider base URLs (override to point at a proxy or the benchmark mock server)
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    ANTHROPIC_BASE_URL: str = "https://api.anthropic.com/v1"
+    GOOGLE_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com/v1"
+    PERPLEXITY_BASE_URL: str = "https://api.perplexity.ai"
+    XAI_BASE_URL: str = "https://api.x.ai/v1"
+
     # CORS Settings
     FRONTEND_URL: str = "https://beaver-ai-hub.lovable.app"
     CORS_ORIGINS: List[str] = [
@@ -35,6 +43,76 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
+    # API key cache (auth hot path)
+    API_KEY_CACHE_MAX_SIZE: int = 100_000
+    API_KEY_CACHE_TTL_SECONDS: float = 30.0
+
+    # Rate limiting
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (single process) or "redis" (shared across workers)
+    RATE_LIMIT_DENY_CACHE_SECONDS: float = 1.0  # Local deny-cache so limited keys skip Redis
+
+    # Monthly usage counters
+    USAGE_TRACKER_BACKEND: str = "memory"  # "memory" (single process) or "redis" (shared, survives restarts)
+    USAGE_RECONCILE_INTERVAL_SECONDS: float = 300.0  # Rebuild Redis counters from usage_logs
+
+    # Write-behind usage logging
+    USAGE_LOG_FLUSH_INTERVAL_MS: int = 200  # Flush queued rows at least this often
+    USAGE_LOG_BATCH_SIZE: int = 500  # ...or as soon as this many are queued
+    USAGE_LOG_QUEUE_MAX_SIZE: int = 10_000  # Producers wait when the queue is full
+
+    # Balance reservations (worst-case cost held before calling a provider)
+    BALANCE_RESERVATION_BACKEND: str = "memory"  # "memory" (single process) or "redis" (shared across workers)
+    BALANCE_RESERVATION_TTL_SECONDS: float = 600.0  # Holds left by crashed requests expire after this
+
+    # Response cache for temperature=0 requests (opt-in; clients skip it with "X-Beaver-Cache: bypass")
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" or "redis" (Redis tier behind the in-process LRU)
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10_000
+    RESPONSE_CACHE_BILLING_RATE: float = 0.1  # Fraction of the normal price billed for a cache hit
+
+    # Identical concurrent deterministic (temperature 0) chat requests share one upstream call
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Provider circuit breakers (fail fast with 503 while a provider is down)
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_PER_MODEL: bool = False  # One breaker per provider+model instead of per provider
+    CIRCUIT_BREAKER_WINDOW_SECONDS: int = 30  # Rolling window for error and slow-call rates
+    CIRCUIT_BREAKER_MIN_CALLS: int = 20  # Calls needed in the window before the breaker can open
+    CIRCUIT_BREAKER_FAILURE_RATE: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = 30.0
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = 0.8
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = 15.0  # Time before a probe call is let through
+
+    # Hedged requests: a second identical call when the first exceeds the model's p95
+    HEDGING_ENABLED: bool = False
+    HEDGE_BUDGET_PERCENT: float = 5.0  # Cap on extra upstream calls, as a share of requests
+    HEDGE_MIN_SAMPLES: int = 50  # Latency samples needed before a model is hedged
+
+    # Failover chains: fallback models tried in order on connection errors, 5xx or 429
+    # e.g. FAILOVER_CHAINS='{"gpt-4o-mini": ["gemini-1.5-flash", "deepseek-chat"]}'
+    FAILOVER_CHAINS: Dict[str, List[str]] = {}
+
+    # In-memory model catalog: reloaded when the catalog_version counter moves
+    CATALOG_VERSION_POLL_SECONDS: float = 5.0
+    CATALOG_MAX_AGE_SECONDS: float = 300.0  # Reloaded at least this often regardless
+    MODELS_CACHE_MAX_AGE_SECONDS: int = 60  # Cache-Control for GET /v1/models
+    MODELS_CACHE_STALE_SECONDS: int = 300  # ...and how long a stale copy may be served while revalidating
+
+    # Virtual models (auto:fastest, auto:cheapest) resolved from the model catalog
+    MODEL_ROUTER_EWMA_ALPHA: float = 0.2  # Weight of the newest latency/error sample
+    MODEL_ROUTER_DEFAULT_LATENCY_SECONDS: float = 2.0  # Assumed for models without samples
+    MODEL_ROUTER_MAX_ERROR_RATE: float = 0.5  # Models above this are only used as a last resort
+    MODEL_ROUTER_MAX_CANDIDATES: int = 3  # Resolved model plus fallbacks
+
+    # Request phase timing: Server-Timing header and sampled OpenTelemetry (OTLP/JSON) spans
+    SERVER_TIMING_ENABLED: bool = True
+    TRACE_SAMPLE_RATE: float = 0.0  # Share of requests exported
+    TRACE_HONOR_PARENT_SAMPLED: bool = False  # Also export requests whose traceparent is sampled (trusted callers only)
+    TRACE_EXPORT_PATH: Optional[str] = None  # e.g. traces.jsonl: one OTLP/JSON line per trace
+    TRACE_EXPORT_MAX_BYTES: int = 100 * 1024 * 1024  # Rotated to <path>.1 past this size
+    TRACE_EXPORT_URL: Optional[str] = None  # e.g. http://localhost:4318/v1/traces
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,164 @@
+"""
+In-process LRU + TTL cache for API key resolution.
+
+The auth middleware and the API key dependencies resolve the same
+Authorization header on every request. Resolved keys are stored here as
+immutable snapshots so repeated lookups skip the database entirely.
+Entries expire after API_KEY_CACHE_TTL_SECONDS, which also bounds how long
+other workers can serve a stale entry after a revocation or top-up.
+
+Charges write the new balance into the account's cached snapshots rather
+than evicting them, so a key stays cached while it is being used. Keys
+are also indexed by account, so account-wide updates and invalidation
+touch only that account's keys.
+"""
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from decimal import Decimal
+from typing import Dict, Optional, Set
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class AccountSnapshot:
+    id: str
+    email: str
+    balance: Decimal
+
+
+@dataclass(frozen=True)
+class APIKeySnapshot:
+    id: str
+    key: str
+    name: str
+    account_id: str
+    is_active: bool
+    account: AccountSnapshot
+
+    @classmethod
+    def from_model(cls, api_key) -> "APIKeySnapshot":
+        """Build a snapshot from an APIKey row with its account loaded"""
+        account = api_key.account
+        return cls(
+            id=api_key.id,
+            key=api_key.key,
+            name=api_key.name,
+            account_id=api_key.account_id,
+            is_active=api_key.is_active,
+            account=AccountSnapshot(
+                id=account.id,
+                email=account.email,
+                balance=Decimal(account.balance),
+            ),
+        )
+
+
+class APIKeyCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.store: "OrderedDict[str, tuple]" = OrderedDict()
+        # account id → its cached keys
+        self.accounts: Dict[str, Set[str]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[APIKeySnapshot]:
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.store.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            snapshot, expires_at = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self.store.move_to_end(key)
+            self.hits += 1
+            return snapshot
+
+    def put(self, snapshot: APIKeySnapshot) -> None:
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self.lock:
+            self._remove(snapshot.key)
+            self.store[snapshot.key] = (snapshot, expires_at)
+            self.accounts.setdefault(snapshot.account_id, set()).add(snapshot.key)
+
+            while len(self.store) > self.max_size:
+                self._remove(next(iter(self.store)))
+                self.evictions += 1
+
+    def update_balance(self, account_id: str, balance: Decimal) -> None:
+        """
+        Write a balance returned by a charge into the account's cached snapshots.
+        Charges only lower the balance, so a result arriving out of order
+        never raises it; top-ups invalidate the account instead.
+        """
+        with self.lock:
+            for key in self.accounts.get(account_id, ()):
+                snapshot, expires_at = self.store[key]
+                if balance < snapshot.account.balance:
+                    account = replace(snapshot.account, balance=balance)
+                    self.store[key] = (replace(snapshot, account=account), expires_at)
+
+    def invalidate_key(self, key: str) -> None:
+        """Drop a single key, e.g. after it has been revoked"""
+        with self.lock:
+            self._remove(key)
+
+    def invalidate_account(self, account_id: str) -> None:
+        """Drop every key of an account, e.g. after a top-up"""
+        with self.lock:
+            for key in list(self.accounts.get(account_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.store.clear()
+            self.accounts.clear()
+
+    def _remove(self, key: str) -> None:
+        """Drop key from the store and the account index; caller holds the lock"""
+        entry = self.store.pop(key, None)
+        if entry is None:
+            return
+        account_id = entry[0].account_id
+        keys = self.accounts.get(account_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.accounts[account_id]
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.store),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+api_key_cache = APIKeyCache(
+    max_size=settings.API_KEY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS,
+)
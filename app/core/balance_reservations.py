@@ -0,0 +1,101 @@
+"""
+Balance pre-authorization for in-flight requests.
+
+Before a provider is called, the worst-case cost of the request is held
+against the account. A request is admitted only if the account balance
+(from the cached API key snapshot) minus everything already held covers
+it, so a nearly empty account cannot fan out hundreds of paid provider
+calls, and the rejection costs neither a provider call nor a DB query.
+The hold is released once the actual cost has been charged.
+
+Amounts are integer micro-dollars. Holds expire after
+BALANCE_RESERVATION_TTL_SECONDS in case a worker dies mid-request.
+
+In one process the snapshot's balance is kept current by the API key
+cache (charges write theirs, top-ups invalidate), so charged() and
+topped_up() have nothing to do here; the Redis backend keeps a shared
+balance instead (see redis_balance_reservations).
+"""
+import math
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.pricing.engine import PICOS_PER_MICRO
+
+# Conservative prompt size estimate (real tokenizers average ~4 chars)
+CHARS_PER_TOKEN = 3
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Assumed completion length when the client leaves max_tokens unset
+DEFAULT_MAX_TOKENS = 4096
+
+
+def estimate_max_cost_micros(
+    messages: List,
+    max_tokens: Optional[int],
+    input_picos_per_token: int,
+    output_picos_per_token: int
+) -> int:
+    """
+    Upper estimate of a request's cost from its prompt size and max_tokens,
+    in micro-dollars (rounded up)
+    """
+    prompt_chars = sum(len(message.content) for message in messages)
+    prompt_tokens = math.ceil(prompt_chars / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS * len(messages)
+    completion_tokens = max_tokens or DEFAULT_MAX_TOKENS
+
+    picos = prompt_tokens * input_picos_per_token + completion_tokens * output_picos_per_token
+    return -(-picos // PICOS_PER_MICRO)
+
+
+class BalanceReservations:
+    def __init__(self, ttl_seconds: float = settings.BALANCE_RESERVATION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        # account id → reservation id → (amount, expires at)
+        self.holds: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        self.lock = threading.Lock()
+
+    async def reserve(self, account_id: str, balance: int, amount: int) -> Optional[str]:
+        """
+        Hold amount against the account.
+        Returns a reservation id, or None if balance minus holds is short.
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            holds = self.holds.setdefault(account_id, {})
+
+            for reservation_id in [rid for rid, (_, expires) in holds.items() if expires <= now]:
+                del holds[reservation_id]
+
+            held = sum(held_amount for held_amount, _ in holds.values())
+            if balance - held < amount:
+                if not holds:
+                    del self.holds[account_id]
+                return None
+
+            reservation_id = uuid.uuid4().hex
+            holds[reservation_id] = (amount, now + self.ttl_seconds)
+            return reservation_id
+
+    async def release(self, account_id: str, reservation_id: str):
+        with self.lock:
+            holds = self.holds.get(account_id)
+            if not holds:
+                return
+
+            holds.pop(reservation_id, None)
+            if not holds:
+                del self.holds[account_id]
+
+    async def charged(self, account_id: str, balance: int):
+        """Record the balance a charge left"""
+
+    async def topped_up(self, account_id: str, balance: int):
+        """Record the balance after a top-up"""
+
+
+balance_reservations = BalanceReservations()
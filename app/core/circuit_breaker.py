@@ -0,0 +1,170 @@
+"""
+Circuit breakers for upstream providers.
+
+Each breaker tracks calls over a rolling window of one-second buckets.
+It opens when, with at least CIRCUIT_BREAKER_MIN_CALLS in the window,
+the failure rate (unreachable, 5xx, 429) or the slow-call rate crosses
+its threshold. While open, allow() returns False immediately, so
+requests fail fast instead of waiting out the provider timeout. After
+CIRCUIT_BREAKER_OPEN_SECONDS the breaker is half-open: one probe call is
+let through per interval, and its outcome closes or re-opens the circuit.
+
+allow() hands out a permit, the breaker's generation, which changes on
+every state change and with every probe. record() ignores results with
+an outdated permit, so calls that started before the circuit opened
+cannot close it again, and only the latest probe decides a half-open
+circuit.
+
+Breakers are per provider, or per provider and model with
+CIRCUIT_BREAKER_PER_MODEL.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window_seconds: int = settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+        min_calls: int = settings.CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate_threshold: float = settings.CIRCUIT_BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate_threshold: float = settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+        open_seconds: float = settings.CIRCUIT_BREAKER_OPEN_SECONDS
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.next_probe_at = 0.0
+        self.generation = 1
+        self.times_opened = 0
+        self.rejected = 0
+        # Ring of [second, calls, failures, slow calls]
+        self.buckets = [[0, 0, 0, 0] for _ in range(window_seconds)]
+        self.lock = threading.Lock()
+
+    def allow(self) -> Optional[int]:
+        """A permit for a call to go upstream now (pass it to record), or None"""
+        # Generation before state: a permit read across a state change is simply outdated
+        generation = self.generation
+        if self.state == CLOSED:
+            return generation
+
+        now = time.monotonic()
+
+        with self.lock:
+            if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self.next_probe_at = now
+
+            if self.state == HALF_OPEN and now >= self.next_probe_at:
+                # One probe per interval; a probe that never reports back is simply retried
+                self.next_probe_at = now + self.open_seconds
+                self.generation += 1
+                return self.generation
+
+            self.rejected += 1
+            return None
+
+    def retry_after(self) -> int:
+        """Seconds until the next call may be let through"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            return max(1, int(self.opened_at + self.open_seconds - now + 0.999))
+        return max(1, int(self.next_probe_at - now + 0.999))
+
+    def record(self, permit: int, success: bool, latency: float):
+        slow = latency >= self.slow_call_seconds
+        now = time.monotonic()
+
+        with self.lock:
+            if permit != self.generation:
+                # Let through before the last state change (or an earlier probe)
+                return
+
+            if self.state == HALF_OPEN:
+                if success and not slow:
+                    self._close()
+                else:
+                    self._open(now)
+                return
+
+            second = int(now)
+            bucket = self.buckets[second % self.window_seconds]
+            if bucket[0] != second:
+                bucket[:] = [second, 0, 0, 0]
+            bucket[1] += 1
+            bucket[2] += 0 if success else 1
+            bucket[3] += 1 if slow else 0
+
+            calls, failures, slow_calls = self._window_totals(second)
+            if calls >= self.min_calls and (
+                failures / calls >= self.failure_rate_threshold
+                or slow_calls / calls >= self.slow_call_rate_threshold
+            ):
+                self._open(now)
+
+    def _window_totals(self, second: int):
+        calls = failures = slow_calls = 0
+        for bucket_second, bucket_calls, bucket_failures, bucket_slow in self.buckets:
+            if second - bucket_second < self.window_seconds:
+                calls += bucket_calls
+                failures += bucket_failures
+                slow_calls += bucket_slow
+        return calls, failures, slow_calls
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self.generation += 1
+
+    def _close(self):
+        self.state = CLOSED
+        self.generation += 1
+        self.buckets = [[0, 0, 0, 0] for _ in range(self.window_seconds)]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            calls, failures, slow_calls = self._window_totals(int(time.monotonic()))
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failures": failures,
+            "window_slow_calls": slow_calls,
+            "failure_rate": round(failures / calls, 4) if calls else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, per_model: bool = settings.CIRCUIT_BREAKER_PER_MODEL):
+        self.per_model = per_model
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str, model_id: Optional[str] = None) -> CircuitBreaker:
+        key = f"{provider}:{model_id}" if self.per_model and model_id else provider
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers.setdefault(key, CircuitBreaker())
+        return breaker
+
+    def stats(self) -> Dict[str, Dict]:
+        return {key: breaker.stats() for key, breaker in self.breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
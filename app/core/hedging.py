@@ -0,0 +1,97 @@
+"""
+Hedged upstream calls.
+
+If a call has not answered within the model's observed p95, an identical
+second call is sent; the first successful answer wins and the other is
+cancelled. A failure of one attempt waits for the other. Probes of a
+half-open circuit breaker are never hedged.
+
+Hedges are paid for out of a budget: every request earns
+HEDGE_BUDGET_PERCENT / 100 of a hedge, and a hedge is only sent when a
+whole one has been earned. Extra upstream calls therefore stay under
+that percentage of traffic even when a provider slows down across the
+board.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+# Unused budget carried over, in hedges
+MAX_BANKED_HEDGES = 10.0
+
+
+class HedgeBudget:
+    def __init__(self, percent: float = settings.HEDGE_BUDGET_PERCENT, max_banked: float = MAX_BANKED_HEDGES):
+        self.ratio = percent / 100
+        self.max_banked = max_banked
+        self.banked = 0.0
+        self.lock = threading.Lock()
+
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+
+    def on_request(self):
+        with self.lock:
+            self.requests += 1
+            self.banked = min(self.max_banked, self.banked + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            if self.banked < 1:
+                self.hedges_denied += 1
+                return False
+            self.banked -= 1
+            self.hedges_sent += 1
+            return True
+
+    def stats(self) -> Dict:
+        return {
+            "budget_percent": self.ratio * 100,
+            "banked_hedges": round(self.banked, 3),
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "hedges_denied": self.hedges_denied,
+            "hedge_rate": round(self.hedges_sent / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+async def hedged_call(call: Callable[[], Awaitable], delay: Optional[float], budget: HedgeBudget):
+    """Run call(), hedging with a second call() if it takes longer than delay"""
+    budget.on_request()
+    primary = asyncio.create_task(call())
+    pending = {primary}
+
+    try:
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not budget.try_spend():
+            return await primary
+
+        hedge = asyncio.create_task(call())
+        pending.add(hedge)
+        error = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        budget.hedges_won += 1
+                    return task.result()
+                error = error or task.exception()
+
+        raise error
+    finally:
+        # Loser (or everything, if the caller went away) is cancelled
+        for task in pending:
+            task.cancel()
+
+
+hedge_budget = HedgeBudget()
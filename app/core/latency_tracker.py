@@ -0,0 +1,51 @@
+"""
+Recent upstream latency per model.
+
+Keeps the last LATENCY_SAMPLES successful call latencies for each model
+and serves their p95, recomputed every P95_REFRESH_EVERY samples so the
+lookup on the request path is a dict read.
+"""
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+LATENCY_SAMPLES = 512
+P95_REFRESH_EVERY = 32
+
+
+class LatencyTracker:
+    def __init__(self, max_samples: int = LATENCY_SAMPLES, refresh_every: int = P95_REFRESH_EVERY):
+        self.max_samples = max_samples
+        self.refresh_every = refresh_every
+        self.samples: Dict[str, Deque[float]] = {}
+        self.since_refresh: Dict[str, int] = {}
+        self.p95_cache: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def record(self, model_id: str, seconds: float):
+        with self.lock:
+            samples = self.samples.get(model_id)
+            if samples is None:
+                samples = self.samples[model_id] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+
+            pending = self.since_refresh.get(model_id, 0) + 1
+            if pending >= self.refresh_every or model_id not in self.p95_cache:
+                ordered = sorted(samples)
+                self.p95_cache[model_id] = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                pending = 0
+            self.since_refresh[model_id] = pending
+
+    def p95(self, model_id: str, min_samples: int = 1) -> Optional[float]:
+        """p95 latency in seconds, or None with fewer than min_samples"""
+        samples = self.samples.get(model_id)
+        if samples is None or len(samples) < min_samples:
+            return None
+        return self.p95_cache.get(model_id)
+
+    def count(self, model_id: str) -> int:
+        samples = self.samples.get(model_id)
+        return len(samples) if samples else 0
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,116 @@
+"""
+Latency histograms per route, provider and model.
+
+Each histogram has log-spaced buckets growing by BUCKET_GROWTH (about
+2.5% relative error), from MIN_SECONDS to MAX_SECONDS, kept in a ring of
+WINDOW_SLOTS sub-windows that together span LATENCY_WINDOW_SECONDS.
+Recording is one log() and a list increment. Quantiles merge the
+sub-windows still inside the window, so /status/latency and /metrics
+always describe the last minute, not the whole uptime.
+"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+MIN_SECONDS = 0.0001
+MAX_SECONDS = 600.0
+BUCKET_GROWTH = 1.05
+LATENCY_WINDOW_SECONDS = 60
+WINDOW_SLOTS = 6
+
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+BUCKET_COUNT = int(math.log(MAX_SECONDS / MIN_SECONDS) / _LOG_GROWTH) + 2
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def bucket_index(seconds: float) -> int:
+    if seconds <= MIN_SECONDS:
+        return 0
+    return min(BUCKET_COUNT - 1, int(math.log(seconds / MIN_SECONDS) / _LOG_GROWTH) + 1)
+
+
+def bucket_upper_bound(index: int) -> float:
+    return MIN_SECONDS * BUCKET_GROWTH ** index
+
+
+class LatencyHistogram:
+    def __init__(self, window_seconds: int = LATENCY_WINDOW_SECONDS, slots: int = WINDOW_SLOTS):
+        self.slot_seconds = window_seconds / slots
+        # Ring of [slot number, counts, sum of seconds]
+        self.slots = [[-1, [0] * BUCKET_COUNT, 0.0] for _ in range(slots)]
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def record(self, seconds: float):
+        number = int(time.monotonic() / self.slot_seconds)
+        slot = self.slots[number % len(self.slots)]
+        if slot[0] != number:
+            slot[0] = number
+            slot[1] = [0] * BUCKET_COUNT
+            slot[2] = 0.0
+        slot[1][bucket_index(seconds)] += 1
+        slot[2] += seconds
+        self.total_count += 1
+        self.total_sum += seconds
+
+    def window(self) -> Tuple[List[int], int, float]:
+        """Merged (bucket counts, count, sum) of the sub-windows inside the window"""
+        current = int(time.monotonic() / self.slot_seconds)
+        counts = [0] * BUCKET_COUNT
+        total = 0.0
+        for number, slot_counts, slot_sum in self.slots:
+            if current - number < len(self.slots):
+                counts = [a + b for a, b in zip(counts, slot_counts)]
+                total += slot_sum
+        return counts, sum(counts), total
+
+    @staticmethod
+    def quantile(counts: List[int], count: int, q: float) -> Optional[float]:
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bucket_upper_bound(index)
+        return MAX_SECONDS
+
+    def summary(self) -> Dict:
+        counts, count, total = self.window()
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 3) if count else None,
+            **{
+                f"p{int(q * 100)}_ms": (
+                    round(self.quantile(counts, count, q) * 1000, 3) if count else None
+                )
+                for q in QUANTILES
+            },
+        }
+
+
+class LatencyMetrics:
+    """Histograms keyed by kind ("route", "provider", "model", ...) and name"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, name: str, seconds: float):
+        histogram = self.histograms.get(kind, {}).get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(kind, {}).setdefault(name, LatencyHistogram())
+        histogram.record(seconds)
+
+    def summary(self) -> Dict:
+        return {
+            kind: {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+            for kind, histograms in self.histograms.items()
+        }
+
+
+latency_metrics = LatencyMetrics()
@@ -0,0 +1,110 @@
+"""
+Virtual models resolved per request ("auto:fastest", "auto:cheapest").
+
+Candidates come from the in-memory model catalog, so resolving a
+virtual model never touches the database. Upstream outcomes feed an
+EWMA of latency and of error rate per model. Candidates are ranked by
+latency or by price, each scaled up by the model's error rate; models
+whose circuit is open, or whose error rate is above
+MODEL_ROUTER_MAX_ERROR_RATE, go to the back of the list.
+"""
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.config import settings
+from app.core.circuit_breaker import OPEN, circuit_breakers
+from app.models.catalog import model_catalog
+
+# Cheapest first; max_category caps the routing at one of these
+CATEGORY_ORDER = ["ULTRA_BUDGET", "BUDGET", "MID_RANGE", "PREMIUM", "ULTRA_PREMIUM"]
+
+VIRTUAL_MODELS = {"auto:fastest", "auto:cheapest"}
+
+
+class ModelIndex:
+    def __init__(
+        self,
+        alpha: float = settings.MODEL_ROUTER_EWMA_ALPHA,
+        default_latency: float = settings.MODEL_ROUTER_DEFAULT_LATENCY_SECONDS,
+        max_error_rate: float = settings.MODEL_ROUTER_MAX_ERROR_RATE
+    ):
+        self.alpha = alpha
+        self.default_latency = default_latency
+        self.max_error_rate = max_error_rate
+        # model_id → [latency EWMA (None until a success), error rate EWMA, samples]
+        self.health: Dict[str, list] = {}
+        self.resolutions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def record(self, model_id: str, success: bool, latency: Optional[float] = None):
+        """Fold one upstream outcome into the model's EWMAs"""
+        with self.lock:
+            health = self.health.get(model_id)
+            if health is None:
+                health = self.health[model_id] = [None, 0.0, 0]
+
+            health[1] += self.alpha * ((0.0 if success else 1.0) - health[1])
+            if success and latency is not None:
+                health[0] = latency if health[0] is None else health[0] + self.alpha * (latency - health[0])
+            health[2] += 1
+
+    def resolve(
+        self,
+        virtual_model: str,
+        providers: Optional[List[str]] = None,
+        max_category: Optional[str] = None,
+        limit: int = settings.MODEL_ROUTER_MAX_CANDIDATES
+    ) -> List[Tuple[str, Mapping]]:
+        """Best concrete models for a virtual model, best first"""
+        snapshot = model_catalog.snapshot
+        if snapshot is None:
+            return []
+
+        max_rank = CATEGORY_ORDER.index(max_category) if max_category in CATEGORY_ORDER else len(CATEGORY_ORDER)
+
+        ranked = []
+        for model_id, entry in snapshot.models.items():
+            config = entry.config
+            if providers and config["provider"] not in providers:
+                continue
+            if config["category"] in CATEGORY_ORDER and CATEGORY_ORDER.index(config["category"]) > max_rank:
+                continue
+
+            latency, error_rate, _ = self.health.get(model_id) or (None, 0.0, 0)
+            if virtual_model == "auto:fastest":
+                score = latency if latency is not None else self.default_latency
+            else:
+                score = config["beaver_ai_input_price"] + config["beaver_ai_output_price"]
+            score /= 1.0 - min(error_rate, 0.99)
+
+            unhealthy = (
+                error_rate > self.max_error_rate
+                or circuit_breakers.get(config["provider"], model_id).state == OPEN
+            )
+            # Price breaks latency ties (and vice versa) so the order is stable
+            tiebreak = (
+                config["beaver_ai_input_price"] + config["beaver_ai_output_price"]
+                if virtual_model == "auto:fastest" else (latency or self.default_latency)
+            )
+            ranked.append((unhealthy, score, tiebreak, model_id))
+
+        ranked.sort()
+        with self.lock:
+            self.resolutions[virtual_model] = self.resolutions.get(virtual_model, 0) + 1
+        return [(model_id, snapshot.models[model_id].config) for *_, model_id in ranked[:limit]]
+
+    def stats(self) -> Dict:
+        return {
+            "resolutions": dict(self.resolutions),
+            "health": {
+                model_id: {
+                    "latency_ewma_ms": round(latency * 1000, 3) if latency is not None else None,
+                    "error_rate_ewma": round(error_rate, 4),
+                    "samples": samples,
+                }
+                for model_id, (latency, error_rate, samples) in self.health.items()
+            },
+        }
+
+
+model_index = ModelIndex()
@@ -1,13 +1,35 @@
 """
 Dynamic Percentile-Based Pricing Engine
 Implements the pricing strategy from Document 05
+
+PricingEngine.recalculate_all_pricing reprices every active model at
+once. IncrementalPricing handles single-model changes (admin create,
+update, deactivate): it keeps the total costs in a sorted index, so the
+percentiles move in O(log n), and rewrites only the models whose
+category changes.
 """
+import asyncio
 import numpy as np
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from decimal import Decimal
+from operator import itemgetter
+from typing import Dict, List, Optional, Set
 from datetime import datetime
+from sortedcontainers import SortedKeyList
+from sqlalchemy import Float, bindparam, cast, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database.models import Model
+from app.database.models import CatalogVersion, Model
+from app.pricing.engine import (
+    PPM,
+    apply_markup,
+    calculate_request_cost,
+    from_micros,
+    picos_to_price,
+    price_to_picos,
+    to_ppm
+)
 
 # Category markups (from PDF)
 CATEGORY_MARKUP_MAP = {
@@ -18,6 +40,21 @@ CATEGORY_MARKUP_MAP = {
     "ULTRA_PREMIUM": 3.5,    # 3.5% markup
 }
 
+# Cheapest first, indexed by the number of percentile thresholds below a model's cost
+CATEGORY_NAMES = np.array(list(CATEGORY_MARKUP_MAP), dtype=object)
+CATEGORY_MARKUPS = np.array(list(CATEGORY_MARKUP_MAP.values()))
+# Price multipliers (1 + markup) in parts per million
+CATEGORY_FACTORS_PPM = np.array([PPM + to_ppm(markup / 100) for markup in CATEGORY_MARKUP_MAP.values()], dtype=np.int64)
+
+PRICING_COLUMNS = (
+    'id', 'name', 'category', 'base_input_price', 'base_output_price',
+    'markup_percent', 'beaver_ai_input_price', 'beaver_ai_output_price'
+)
+TEXT_COLUMNS = ('id', 'name', 'category')
+
+# Stored prices ($ per 1M tokens, 6 decimals) × this = integer pico-dollars per token
+PICOS_PER_PRICE_UNIT = 10 ** Model.__table__.c.beaver_ai_input_price.type.scale
+
 
 class PricingEngine:
     """Core pricing calculation engine"""
@@ -25,7 +62,43 @@ class PricingEngine:
     def __init__(self, db: Session):
         self.db = db
     
-    def calculate_percentiles(self) -> Dict[str, float]:
+    def fetch_active_prices(self) -> Dict[str, np.ndarray]:
+        """
+        Columns of all active models as arrays, in one query
+
+        Returns:
+            {'id', 'name', 'category' (object arrays), 'markup_percent'
+             (float array, NaN where unset), 'base_input_price',
+             'base_output_price', 'beaver_ai_input_price',
+             'beaver_ai_output_price' (int64 pico-dollars per token,
+             -1 where unset)}
+        """
+        table = Model.__table__
+        # Core select with prices cast to floats: no ORM rows, no Decimals
+        rows = self.db.connection().execute(
+            select(*(
+                table.c[column] if column in TEXT_COLUMNS else cast(table.c[column], Float)
+                for column in PRICING_COLUMNS
+            )).where(table.c.status == 'active')
+        ).all()
+
+        if not rows:
+            raise ValueError("No active models found")
+
+        arrays = {}
+        for column, values in zip(PRICING_COLUMNS, zip(*rows)):
+            if column in TEXT_COLUMNS:
+                arrays[column] = np.array(values, dtype=object)
+            elif column == 'markup_percent':
+                # None → NaN
+                arrays[column] = np.array(values, dtype=float)
+            else:
+                # Prices have at most 6 decimals, so the float → integer rounding is exact
+                prices = np.array(values, dtype=float) * PICOS_PER_PRICE_UNIT
+                arrays[column] = np.where(np.isnan(prices), -1, np.rint(prices)).astype(np.int64)
+        return arrays
+
+    def calculate_percentiles(self, total_costs: Optional[np.ndarray] = None) -> Dict[str, float]:
         """
         Calculate P20, P40, P60, P80 from all active models
         
@@ -38,37 +111,25 @@ class PricingEngine:
                 'total_models': int
             }
         """
-        # Get all active models
-        models = self.db.query(Model).filter(
-            Model.status == 'active'
-        ).all()
-        
-        if not models:
-            raise ValueError("No active models found")
-        
-        # Calculate total_cost for each model (input + output)
-        total_costs = []
-        for model in models:
-            total_cost = model.base_input_price + model.base_output_price
-            total_costs.append(total_cost)
-        
-        # Sort costs
-        total_costs.sort()
+        if total_costs is None:
+            prices = self.fetch_active_prices()
+            total_costs = prices['base_input_price'] + prices['base_output_price']
+
+        # Costs in pico-dollars per token; percentiles in $ per 1M tokens
+        p20, p40, p60, p80 = np.percentile(total_costs, [20, 40, 60, 80]) / PICOS_PER_PRICE_UNIT
         
-        # Calculate percentiles using numpy
-        percentiles = {
-            'p20': float(np.percentile(total_costs, 20)),
-            'p40': float(np.percentile(total_costs, 40)),
-            'p60': float(np.percentile(total_costs, 60)),
-            'p80': float(np.percentile(total_costs, 80)),
+        return {
+            'p20': float(p20),
+            'p40': float(p40),
+            'p60': float(p60),
+            'p80': float(p80),
             'total_models': len(total_costs)
         }
-        
-        return percentiles
     
     def assign_category(self, total_cost: float, percentiles: Dict[str, float]) -> str:
         """
         Assign category based on percentile thresholds
+        (scalar form of the assignment in recalculate_all_pricing)
         
         Args:
             total_cost: Sum of input + output price
@@ -92,88 +153,103 @@ class PricingEngine:
         """Get markup percentage for a category"""
         return CATEGORY_MARKUP_MAP.get(category, 5.5)
     
-    def assign_categories_to_all_models(self) -> Dict:
-        """Assign categories to all active models"""
-        # Calculate current percentiles
-        percentiles = self.calculate_percentiles()
-        
-        # Get all active models
-        models = self.db.query(Model).filter(
-            Model.status == 'active'
-        ).all()
-        
-        # Assign category to each model
-        for model in models:
-            total_cost = model.base_input_price + model.base_output_price
-            category = self.assign_category(total_cost, percentiles)
-            
-            # Update model
-            model.category = category
-            model.pricing_updated_at = datetime.utcnow()
-        
-        # Commit changes
-        self.db.commit()
-        
-        print(f"✅ Assigned categories to {len(models)} models")
-        
-        return {
-            'total_models': len(models),
-            'percentiles': percentiles
-        }
-    
-    def calculate_beaver_ai_prices(self) -> Dict:
-        """Calculate Beaver AI prices with markup"""
-        # Get all active models
-        models = self.db.query(Model).filter(
-            Model.status == 'active'
-        ).all()
-        
-        for model in models:
-            # Get markup for this model's category
-            markup_percent = self.get_markup_for_category(model.category)
-            
-            # Calculate Beaver AI prices
-            beaver_ai_input = model.base_input_price * (1 + markup_percent / 100)
-            beaver_ai_output = model.base_output_price * (1 + markup_percent / 100)
-            
-            # Update model
-            model.markup_percent = markup_percent
-            model.beaver_ai_input_price = round(beaver_ai_input, 6)
-            model.beaver_ai_output_price = round(beaver_ai_output, 6)
-            model.pricing_updated_at = datetime.utcnow()
-        
-        # Commit
-        self.db.commit()
-        
-        print(f"✅ Calculated pricing for {len(models)} models")
-        
-        return {
-            'total_models': len(models),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-    
-    def recalculate_all_pricing(self) -> Dict:
+    def recalculate_all_pricing(self, dry_run: bool = False) -> Dict:
         """
-        Complete pricing recalculation:
-        1. Calculate percentiles
-        2. Assign categories
-        3. Calculate Beaver AI prices
+        Complete pricing recalculation, vectorized over all active models:
+        1. Calculate percentiles of input + output price
+        2. Assign categories (a threshold falls in the lower category)
+        3. Calculate Beaver AI prices with the category markup
+
+        Only models whose category, markup or prices change are written,
+        with one executemany, in a single transaction that also bumps the
+        catalog version. With dry_run nothing is written and the changes
+        are returned under 'changes'.
         """
-        print("🔄 Starting pricing recalculation...")
-        
-        # Step 1: Assign categories
-        category_result = self.assign_categories_to_all_models()
-        
-        # Step 2: Calculate prices
-        pricing_result = self.calculate_beaver_ai_prices()
-        
-        print("✅ Pricing recalculation complete!")
-        
-        return {
-            'percentiles': category_result['percentiles'],
-            'total_models': category_result['total_models'],
-            'updated_at': pricing_result['updated_at']
+        prices = self.fetch_active_prices()
+        base_input = prices['base_input_price']
+        base_output = prices['base_output_price']
+        total_costs = base_input + base_output
+
+        # Step 1: Percentiles
+        percentiles = self.calculate_percentiles(total_costs)
+        thresholds = np.percentile(total_costs, [20, 40, 60, 80])
+
+        # Step 2: Categories; side='left' puts a cost equal to a threshold in the lower category
+        category_index = np.searchsorted(thresholds, total_costs, side='left')
+        categories = CATEGORY_NAMES[category_index]
+
+        # Step 3: Prices in integer pico-dollars per token, rounded half up as apply_markup does
+        markups = CATEGORY_MARKUPS[category_index]
+        factors = CATEGORY_FACTORS_PPM[category_index]
+        beaver_input = (base_input * factors + PPM // 2) // PPM
+        beaver_output = (base_output * factors + PPM // 2) // PPM
+
+        changed = (
+            (categories != prices['category'])
+            | (markups != prices['markup_percent'])
+            | (beaver_input != prices['beaver_ai_input_price'])
+            | (beaver_output != prices['beaver_ai_output_price'])
+        )
+        changed_index = np.flatnonzero(changed)
+        updated_at = datetime.utcnow()
+
+        result = {
+            'percentiles': percentiles,
+            'total_models': percentiles['total_models'],
+            'changed_models': len(changed_index),
+            'dry_run': dry_run,
+            'updated_at': updated_at.isoformat()
         }
+
+        if dry_run:
+            result['changes'] = [
+                {
+                    'name': prices['name'][i],
+                    'category': [prices['category'][i], categories[i]],
+                    'markup_percent': [
+                        None if np.isnan(prices['markup_percent'][i]) else float(prices['markup_percent'][i]),
+                        float(markups[i])
+                    ],
+                    'beaver_ai_input_price': [
+                        optional_price(prices['beaver_ai_input_price'][i]), optional_price(beaver_input[i])
+                    ],
+                    'beaver_ai_output_price': [
+                        optional_price(prices['beaver_ai_output_price'][i]), optional_price(beaver_output[i])
+                    ],
+                }
+                for i in changed_index.tolist()
+            ]
+            return result
+
+        if len(changed_index):
+            table = Model.__table__
+            self.db.connection().execute(
+                update(table).where(table.c.id == bindparam('model_id')),
+                [
+                    {
+                        'model_id': model_id,
+                        'category': category,
+                        'markup_percent': Decimal(str(markup)),
+                        'beaver_ai_input_price': picos_to_price(input_price),
+                        'beaver_ai_output_price': picos_to_price(output_price),
+                        'pricing_updated_at': updated_at,
+                    }
+                    for model_id, category, markup, input_price, output_price in zip(
+                        prices['id'][changed_index].tolist(),
+                        categories[changed_index].tolist(),
+                        markups[changed_index].tolist(),
+                        beaver_input[changed_index].tolist(),
+                        beaver_output[changed_index].tolist()
+                    )
+                ]
+            )
+
+            # Tell every worker to reload its model catalog
+            self.db.execute(CatalogVersion.bump())
+
+        self.db.commit()
+        
+        return result
     
     def get_model_pricing(self, model_name: str) -> Optional[Dict]:
         """Get pricing information for a specific model"""
@@ -185,23 +261,14 @@ class PricingEngine:
         if not model:
             return None
         
-        return {
-            'name': model.name,
-            'display_name': model.display_name,
-            'provider': model.provider,
-            'category': model.category,
-            'base_input_price': float(model.base_input_price),
-            'base_output_price': float(model.base_output_price),
-            'markup_percent': float(model.markup_percent) if model.markup_percent else None,
-            'beaver_ai_input_price': float(model.beaver_ai_input_price) if model.beaver_ai_input_price else None,
-            'beaver_ai_output_price': float(model.beaver_ai_output_price) if model.beaver_ai_output_price else None,
-        }
+        return model_pricing(model)
     
     def calculate_cost_for_request(
         self,
         model_name: str,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        rate_ppm: int = PPM
     ) -> Dict:
         """
         Calculate cost for a specific request
@@ -212,9 +279,10 @@ class PricingEngine:
                 'input_tokens': int,
                 'output_tokens': int,
                 'beaver_ai_cost': {
-                    'input_cost': float,
-                    'output_cost': float,
-                    'total_cost': float
+                    'input_cost': Decimal,
+                    'output_cost': Decimal,
+                    'total_cost': Decimal,
+                    'total_cost_micros': int
                 }
             }
         """
@@ -223,23 +291,262 @@ class PricingEngine:
         if not pricing:
             raise ValueError(f"Model not found: {model_name}")
         
-        if not pricing['beaver_ai_input_price'] or not pricing['beaver_ai_output_price']:
-            raise ValueError(f"Pricing not calculated for model: {model_name}")
-        
-        # Calculate costs
-        input_cost = (input_tokens / 1_000_000) * pricing['beaver_ai_input_price']
-        output_cost = (output_tokens / 1_000_000) * pricing['beaver_ai_output_price']
-        total_cost = input_cost + output_cost
-        
+        return cost_for_request(pricing, input_tokens, output_tokens, rate_ppm)
+
+
+@dataclass(frozen=True)
+class IndexedModel:
+    # Pico-dollars per token
+    base_input_price: int
+    base_output_price: int
+    category: Optional[str]
+
+    @property
+    def total_cost(self) -> int:
+        return self.base_input_price + self.base_output_price
+
+
+class CostIndex:
+    """
+    Order statistics of the active models' input + output price
+
+    A SortedKeyList of (total cost, model id), so inserting, removing and
+    reading the k-th smallest cost are all O(log n). The percentiles use
+    the same linear interpolation as np.percentile.
+    """
+
+    def __init__(self):
+        self.costs = SortedKeyList(key=itemgetter(0))
+        self.models: Dict[str, IndexedModel] = {}
+        # Catalog version the index matches; None when it must be rebuilt
+        self.version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def clear(self):
+        self.costs.clear()
+        self.models.clear()
+        self.version = None
+
+    def put(self, model_id: str, model: IndexedModel):
+        self.remove(model_id)
+        self.models[model_id] = model
+        self.costs.add((model.total_cost, model_id))
+
+    def remove(self, model_id: str):
+        model = self.models.pop(model_id, None)
+        if model is not None:
+            self.costs.remove((model.total_cost, model_id))
+
+    def percentile(self, q: float) -> float:
+        position = (len(self.costs) - 1) * q / 100
+        lower = int(position)
+        low = self.costs[lower][0]
+        if lower + 1 >= len(self.costs):
+            return low
+        high = self.costs[lower + 1][0]
+        return low + (high - low) * (position - lower)
+
+    def thresholds(self) -> List[float]:
+        """P20, P40, P60, P80; empty without models"""
+        if not self.costs:
+            return []
+        return [self.percentile(q) for q in (20, 40, 60, 80)]
+
+    def category(self, total_cost: float, thresholds: List[float]) -> str:
+        # A cost equal to a threshold falls in the lower category, as in recalculate_all_pricing
+        index = sum(1 for threshold in thresholds if total_cost > threshold)
+        return CATEGORY_NAMES[index]
+
+    def between(self, low: float, high: float) -> List[str]:
+        """Models with low < total cost <= high"""
+        return [model_id for _, model_id in self.costs.irange_key(low, high, inclusive=(False, True))]
+
+
+class IncrementalPricing:
+    """
+    Keep categories and prices current as single models change
+
+    Callers change the models row in their session, then call apply():
+    under a lock on the catalog_version row it brings the index up to
+    date, moves the percentile thresholds and reprices the changed model
+    plus the models whose costs lie between an old threshold and its new
+    position. Those rows are written, and the catalog version bumped, in
+    the caller's transaction.
+
+    The index is trusted only while the catalog version is the one it
+    was last synchronized at. Any other change (a full recalculation,
+    another worker's admin call) makes the next apply() rebuild it and
+    reprice every model whose category is off.
+    """
+
+    def __init__(self):
+        self.index = CostIndex()
+        self.lock = asyncio.Lock()
+        self.rebuilds = 0
+        self.applied = 0
+
+    async def apply(self, db: AsyncSession, model: Model) -> List[str]:
+        """Reprice after a change to model; commits and returns the names of repriced models"""
+        async with self.lock:
+            try:
+                repriced = await self._apply(db, model)
+            except BaseException:
+                self.index.clear()
+                raise
+        return repriced
+
+    async def _apply(self, db: AsyncSession, model: Model) -> List[str]:
+        await db.flush()
+
+        # Serializes admin changes across workers (row lock; SQLite serializes writers anyway)
+        version = (await db.execute(
+            select(CatalogVersion.version).where(CatalogVersion.id == 1).with_for_update()
+        )).scalar()
+        if version is None:
+            await db.execute(insert(CatalogVersion).values(id=1, version=0))
+            version = 0
+
+        candidates: Set[str] = {model.id}
+
+        if self.index.version != version:
+            # Reads the caller's pending change too, so the index is already current
+            await self._rebuild(db)
+            candidates.update(self.index.models)
+            before = after = self.index.thresholds()
+        else:
+            before = self.index.thresholds()
+            if model.status == 'active':
+                self.index.put(model.id, IndexedModel(
+                    price_to_picos(model.base_input_price), price_to_picos(model.base_output_price), model.category
+                ))
+            else:
+                self.index.remove(model.id)
+            after = self.index.thresholds()
+
+        if len(before) == len(after):
+            for old, new in zip(before, after):
+                candidates.update(self.index.between(min(old, new), max(old, new)))
+        else:
+            # First model added or last one removed
+            candidates.update(self.index.models)
+
+        repriced = []
+        updates = []
+        for model_id in candidates:
+            indexed = self.index.models.get(model_id)
+            if indexed is None:
+                continue
+            category = self.index.category(indexed.total_cost, after)
+            if category == indexed.category and model_id != model.id:
+                continue
+
+            markup = CATEGORY_MARKUP_MAP[category]
+            updates.append({
+                'model_id': model_id,
+                'category': category,
+                'markup_percent': Decimal(str(markup)),
+                'beaver_ai_input_price': picos_to_price(apply_markup(indexed.base_input_price, markup)),
+                'beaver_ai_output_price': picos_to_price(apply_markup(indexed.base_output_price, markup)),
+                'pricing_updated_at': datetime.utcnow(),
+            })
+            self.index.put(model_id, IndexedModel(indexed.base_input_price, indexed.base_output_price, category))
+            repriced.append(model_id)
+
+        table = Model.__table__
+        if updates:
+            await db.execute(update(table).where(table.c.id == bindparam('model_id')), updates)
+        await db.execute(CatalogVersion.bump())
+        await db.commit()
+
+        self.index.version = version + 1
+        self.applied += 1
+
+        names = (await db.execute(select(table.c.name).where(table.c.id.in_(repriced)))).scalars()
+        return sorted(names)
+
+    async def _rebuild(self, db: AsyncSession):
+        table = Model.__table__
+        result = await db.execute(
+            select(
+                table.c.id,
+                table.c.base_input_price,
+                table.c.base_output_price,
+                table.c.category
+            ).where(table.c.status == 'active')
+        )
+        self.index.clear()
+        for model_id, input_price, output_price, category in result:
+            self.index.put(model_id, IndexedModel(price_to_picos(input_price), price_to_picos(output_price), category))
+        self.rebuilds += 1
+
+    def stats(self) -> Dict:
+        thresholds = self.index.thresholds()
         return {
-            'model': model_name,
-            'input_tokens': input_tokens,
-            'output_tokens': output_tokens,
-            'beaver_ai_cost': {
-                'input_cost': round(input_cost, 8),
-                'output_cost': round(output_cost, 8),
-                'total_cost': round(total_cost, 8)
-            },
-            'pricing': pricing
+            "models": len(self.index),
+            "version": self.index.version,
+            "percentiles": dict(zip(
+                ('p20', 'p40', 'p60', 'p80'),
+                (threshold / PICOS_PER_PRICE_UNIT for threshold in thresholds)
+            )),
+            "rebuilds": self.rebuilds,
+            "applied": self.applied,
         }
 
+
+incremental_pricing = IncrementalPricing()
+
+
+def optional_price(picos: int) -> Optional[float]:
+    """Pico-dollars per token (-1 for unset) → $ per 1M tokens, for display"""
+    return None if picos < 0 else float(picos_to_price(int(picos)))
+
+
+def model_pricing(model: Model) -> Dict:
+    """Pricing dict for a models row"""
+    return {
+        'name': model.name,
+        'display_name': model.display_name,
+        'provider': model.provider,
+        'category': model.category,
+        'base_input_price': float(model.base_input_price),
+        'base_output_price': float(model.base_output_price),
+        'markup_percent': float(model.markup_percent) if model.markup_percent else None,
+        'beaver_ai_input_price': float(model.beaver_ai_input_price) if model.beaver_ai_input_price else None,
+        'beaver_ai_output_price': float(model.beaver_ai_output_price) if model.beaver_ai_output_price else None,
+        # Exact integer prices (pico-dollars per token) used for billing
+        'input_picos_per_token': price_to_picos(model.beaver_ai_input_price) if model.beaver_ai_input_price else None,
+        'output_picos_per_token': price_to_picos(model.beaver_ai_output_price) if model.beaver_ai_output_price else None,
+    }
+
+
+def cost_for_request(pricing: Dict, input_tokens: int, output_tokens: int, rate_ppm: int = PPM) -> Dict:
+    """
+    Cost of a request from a pricing dict (see calculate_cost_for_request); no database access.
+    Integer arithmetic throughout; rate_ppm scales the cost before it is rounded to micro-dollars.
+    """
+    model_name = pricing['name']
+    input_picos = pricing['input_picos_per_token']
+    output_picos = pricing['output_picos_per_token']
+
+    if not input_picos or not output_picos:
+        raise ValueError(f"Pricing not calculated for model: {model_name}")
+    
+    # Calculate costs
+    input_cost = calculate_request_cost(input_tokens, 0, input_picos, 0, rate_ppm)
+    output_cost = calculate_request_cost(0, output_tokens, 0, output_picos, rate_ppm)
+    total_cost = calculate_request_cost(input_tokens, output_tokens, input_picos, output_picos, rate_ppm)
+    
+    return {
+        'model': model_name,
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'beaver_ai_cost': {
+            'input_cost': from_micros(input_cost),
+            'output_cost': from_micros(output_cost),
+            'total_cost': from_micros(total_cost),
+            'total_cost_micros': total_cost
+        },
+        'pricing': pricing
+    }
@@ -0,0 +1,136 @@
+"""
+Balance reservations backed by Redis.
+
+Holds are shared by all workers: each account has a sorted set of
+reservation ids scored by expiry and a hash of their amounts. One Lua
+script drops expired holds, checks balance minus held, and records the
+new hold atomically.
+
+The balance they are checked against lives next to them. A worker's
+cached API key snapshot can be up to API_KEY_CACHE_TTL_SECONDS stale, so
+it only seeds the shared balance when there is none. After that, every
+charge writes the balance the database returned (only ever lowering it,
+as results can arrive out of order) and top-ups set it. An idle account's
+balance expires after BALANCE_TTL_SECONDS and is seeded again.
+"""
+import uuid
+from typing import List, Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.core.balance_reservations import balance_reservations
+
+# The shared balance (micro-dollars) expires this long after its last write
+BALANCE_TTL_SECONDS = 3600
+
+# KEYS[1] = expiry zset, KEYS[2] = amount hash, KEYS[3] = balance
+# ARGV[1] = balance (seed), ARGV[2] = amount, ARGV[3] = reservation id,
+# ARGV[4] = ttl (ms), ARGV[5] = balance ttl (ms)
+# Returns 1 if held, 0 if balance minus holds is short
+RESERVE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local balance = redis.call('GET', KEYS[3])
+if not balance then
+    balance = ARGV[1]
+    redis.call('SET', KEYS[3], balance, 'PX', ARGV[5])
+end
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)
+for _, id in ipairs(expired) do
+    redis.call('HDEL', KEYS[2], id)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+
+local held = 0
+for _, amount in ipairs(redis.call('HVALS', KEYS[2])) do
+    held = held + tonumber(amount)
+end
+
+if tonumber(balance) - held < tonumber(ARGV[2]) then
+    return 0
+end
+
+local ttl = tonumber(ARGV[4])
+redis.call('ZADD', KEYS[1], now + ttl, ARGV[3])
+redis.call('HSET', KEYS[2], ARGV[3], ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ttl)
+redis.call('PEXPIRE', KEYS[2], ttl)
+return 1
+"""
+
+# KEYS[1] = balance
+# ARGV[1] = balance after a charge, ARGV[2] = balance ttl (ms)
+LOWER_BALANCE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current or tonumber(ARGV[1]) < tonumber(current) then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+end
+return 1
+"""
+
+
+class RedisBalanceReservations:
+    def __init__(
+        self,
+        client: redis.Redis,
+        ttl_seconds: float = settings.BALANCE_RESERVATION_TTL_SECONDS,
+        key_prefix: str = "beaver:holds:"
+    ):
+        self.client = client
+        self.script = client.register_script(RESERVE_SCRIPT)
+        self.lower_script = client.register_script(LOWER_BALANCE_SCRIPT)
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.balance_ttl_ms = BALANCE_TTL_SECONDS * 1000
+        self.key_prefix = key_prefix
+
+    def _keys(self, account_id: str) -> List[str]:
+        # Hash tag keeps all three keys in one cluster slot
+        base = f"{self.key_prefix}{{{account_id}}}"
+        return [base, f"{base}:amounts", f"{base}:balance"]
+
+    async def reserve(self, account_id: str, balance: int, amount: int) -> Optional[str]:
+        """
+        Hold amount against the shared balance; balance (the caller's
+        snapshot) is only used when Redis has none for the account yet
+        """
+        reservation_id = uuid.uuid4().hex
+
+        try:
+            held = await self.script(
+                keys=self._keys(account_id),
+                args=[balance, amount, reservation_id, self.ttl_ms, self.balance_ttl_ms]
+            )
+        except redis.RedisError:
+            # Redis unavailable → fall back to per-process holds
+            return await balance_reservations.reserve(account_id, balance, amount)
+
+        return reservation_id if held else None
+
+    async def release(self, account_id: str, reservation_id: str):
+        expiries_key, amounts_key, _ = self._keys(account_id)
+
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zrem(expiries_key, reservation_id)
+            pipe.hdel(amounts_key, reservation_id)
+            await pipe.execute()
+        except redis.RedisError:
+            # The hold may have been taken by the fallback; otherwise it expires
+            await balance_reservations.release(account_id, reservation_id)
+
+    async def charged(self, account_id: str, balance: int):
+        """Record the balance a charge left (it only ever lowers the shared one)"""
+        try:
+            await self.lower_script(keys=[self._keys(account_id)[2]], args=[balance, self.balance_ttl_ms])
+        except redis.RedisError:
+            pass  # the stale balance expires
+
+    async def topped_up(self, account_id: str, balance: int):
+        """Replace the shared balance after a top-up"""
+        try:
+            await self.client.set(self._keys(account_id)[2], balance, px=self.balance_ttl_ms)
+        except redis.RedisError:
+            pass  # the stale balance expires
@@ -0,0 +1,178 @@
+"""
+Distributed sliding-window rate limiter backed by Redis.
+
+Each key keeps a sorted set of request timestamps. A Lua script trims the
+window, counts, and records the request atomically, so all workers share
+one limit and every check costs a single round trip (EVALSHA). The
+gateway's admission script also counts the request towards monthly usage
+in the same call. Scripts are loaded once at startup and only reloaded if
+Redis answers NOSCRIPT (after a restart or failover).
+
+Keys that are denied are remembered in a small local deny-cache until
+their window frees up (capped at RATE_LIMIT_DENY_CACHE_SECONDS), so a
+client hammering past its limit is rejected without touching Redis.
+"""
+import time
+import uuid
+from typing import Dict, Tuple
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.core.rate_limits import RATE_LIMITS
+from app.core.rate_limiter import rate_limiter
+from app.core.redis_usage_tracker import USAGE_COUNTER_TTL_SECONDS, RedisUsageTracker
+
+# KEYS[1] = window key
+# ARGV[1] = window (ms), ARGV[2] = max requests, ARGV[3] = unique member
+# Returns {allowed (0/1), retry_after_ms}
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local retry_after = window
+    if oldest[2] then
+        retry_after = tonumber(oldest[2]) + window - now
+    end
+    return {0, retry_after}
+end
+
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, 0}
+"""
+
+# The sliding window, then the monthly usage count for allowed requests
+# KEYS[1] = window key, KEYS[2] = usage month hash
+# ARGV[1] = window (ms), ARGV[2] = max requests, ARGV[3] = unique member,
+# ARGV[4] = usage field (API key id), ARGV[5] = usage hash ttl (s)
+# Returns {allowed (0/1), retry_after_ms, usage count}
+ADMIT_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local retry_after = window
+    if oldest[2] then
+        retry_after = tonumber(oldest[2]) + window - now
+    end
+    -- Rate-limited requests don't count towards monthly usage
+    return {0, retry_after, 0}
+end
+
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+
+local count = redis.call('HINCRBY', KEYS[2], ARGV[4], 1)
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+return {1, 0, count}
+"""
+
+# Upper bound on deny-cache entries before expired ones are pruned
+DENY_CACHE_MAX_SIZE = 10_000
+
+
+class RedisRateLimiter:
+    def __init__(
+        self,
+        client: redis.Redis,
+        deny_cache_seconds: float = settings.RATE_LIMIT_DENY_CACHE_SECONDS,
+        key_prefix: str = "beaver:ratelimit:"
+    ):
+        self.client = client
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+        self.admit_script = client.register_script(ADMIT_SCRIPT)
+        self.deny_cache_seconds = deny_cache_seconds
+        self.key_prefix = key_prefix
+        self.deny_until: Dict[str, float] = {}
+
+    async def load_scripts(self):
+        """Load the scripts ahead of the first request, which then runs a bare EVALSHA"""
+        for script in (self.script, self.admit_script):
+            await self.client.script_load(script.script)
+
+    async def is_allowed(self, api_key: str, plan: str) -> bool:
+        limit = RATE_LIMITS.get(plan)
+
+        if not limit:
+            return False  # Unknown plan → block
+
+        if self.is_denied_locally(api_key):
+            return False
+
+        limit = RATE_LIMITS[plan]
+        try:
+            result = await self.script(
+                keys=[self._window_key(api_key, plan)],
+                args=[limit.window_seconds * 1000, limit.requests, uuid.uuid4().hex]
+            )
+        except redis.RedisError:
+            # Redis unavailable → fall back to the per-process limiter
+            return rate_limiter.is_allowed(api_key=api_key, plan=plan)
+
+        return self.record(api_key, result)
+
+    def is_denied_locally(self, api_key: str) -> bool:
+        denied_until = self.deny_until.get(api_key)
+        if denied_until is None:
+            return False
+
+        if denied_until > time.monotonic():
+            return True
+
+        del self.deny_until[api_key]
+        return False
+
+    async def admit(self, tracker: RedisUsageTracker, api_key: str, plan: str) -> Tuple[bool, int]:
+        """
+        Apply the rate limit and, if the request is allowed, count it in the
+        tracker's monthly usage, in one EVALSHA. The plan must exist in
+        RATE_LIMITS. Returns (allowed, usage count); the count is 0 when denied.
+        """
+        limit = RATE_LIMITS[plan]
+        allowed, retry_after_ms, count = await self.admit_script(
+            keys=[self._window_key(api_key, plan), tracker.month_key()],
+            args=[
+                limit.window_seconds * 1000,
+                limit.requests,
+                uuid.uuid4().hex,
+                api_key,
+                USAGE_COUNTER_TTL_SECONDS,
+            ]
+        )
+        return self.record(api_key, (allowed, retry_after_ms)), int(count)
+
+    def _window_key(self, api_key: str, plan: str) -> str:
+        return f"{self.key_prefix}{plan}:{api_key}"
+
+    def record(self, api_key: str, result) -> bool:
+        """Interpret a script result, remembering denials locally"""
+        allowed, retry_after_ms = result
+
+        if not allowed:
+            self._remember_denial(api_key, time.monotonic(), int(retry_after_ms) / 1000)
+            return False
+
+        return True
+
+    def _remember_denial(self, api_key: str, now: float, retry_after: float):
+        if self.deny_cache_seconds <= 0:
+            return
+
+        if len(self.deny_until) >= DENY_CACHE_MAX_SIZE:
+            self.deny_until = {
+                key: until for key, until in self.deny_until.items() if until > now
+            }
+
+        self.deny_until[api_key] = now + min(retry_after, self.deny_cache_seconds)
@@ -0,0 +1,108 @@
+"""
+Monthly usage counters backed by Redis.
+
+Counts live in one hash per month (beaver:usage:YYYY-MM, field = API key
+id), so they survive restarts and are shared by all workers. The hash
+expires a few weeks after its last write, which retires old months.
+
+Redis counts requests as they are admitted while usage_logs rows are
+written after the response, so a periodic reconciler raises each counter
+to at least the number of logged requests (it never lowers one).
+"""
+import asyncio
+import datetime
+import logging
+from typing import Dict
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.usage_limits import USAGE_LIMITS
+from app.core.usage_tracker import usage_tracker
+from app.usage.usage_repository import get_monthly_usage
+
+logger = logging.getLogger(__name__)
+
+# Counters expire this long after the last increment of their month
+USAGE_COUNTER_TTL_SECONDS = 40 * 24 * 3600
+
+# Fields reconciled per script call
+RECONCILE_BATCH_SIZE = 1000
+
+# KEYS[1] = month hash
+# ARGV[1] = ttl (s), then field/count pairs
+# Raises each field to at least the given count
+RECONCILE_SCRIPT = """
+for i = 2, #ARGV, 2 do
+    local current = tonumber(redis.call('HGET', KEYS[1], ARGV[i]) or '0')
+    local logged = tonumber(ARGV[i + 1])
+    if logged > current then
+        redis.call('HSET', KEYS[1], ARGV[i], logged)
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return #ARGV / 2
+"""
+
+
+class RedisUsageTracker:
+    def __init__(self, client: redis.Redis, key_prefix: str = "beaver:usage:"):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.reconcile_script = client.register_script(RECONCILE_SCRIPT)
+
+    def month_key(self) -> str:
+        now = datetime.datetime.utcnow()
+        return f"{self.key_prefix}{now.year}-{now.month:02d}"
+
+    async def increment(self, api_key: str, plan: str) -> bool:
+        """
+        Returns False if limit exceeded
+        """
+        if plan not in USAGE_LIMITS:
+            return False
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            self.queue(pipe, api_key)
+            count, _ = await pipe.execute()
+        except redis.RedisError:
+            # Redis unavailable → fall back to the per-process tracker
+            return usage_tracker.increment(api_key=api_key, plan=plan)
+
+        return self.check(count, plan)
+
+    def queue(self, pipe, api_key: str):
+        """Queue the increment (HINCRBY + EXPIRE) on a pipeline"""
+        month_key = self.month_key()
+        pipe.hincrby(month_key, api_key, 1)
+        pipe.expire(month_key, USAGE_COUNTER_TTL_SECONDS)
+
+    def check(self, count: int, plan: str) -> bool:
+        return int(count) <= USAGE_LIMITS[plan].max_requests
+
+    async def reconcile(self, counts: Dict[str, int]) -> int:
+        """Raise this month's counters to the logged request counts"""
+        month_key = self.month_key()
+        items = list(counts.items())
+
+        for start in range(0, len(items), RECONCILE_BATCH_SIZE):
+            args = [USAGE_COUNTER_TTL_SECONDS]
+            for api_key_id, count in items[start:start + RECONCILE_BATCH_SIZE]:
+                args.extend((api_key_id, count))
+            await self.reconcile_script(keys=[month_key], args=args)
+
+        return len(items)
+
+    async def run_reconciler(self, engine: AsyncEngine, interval_seconds: float):
+        """Reconcile from usage_logs now and then every interval_seconds"""
+        while True:
+            try:
+                counts = await get_monthly_usage(engine)
+                await self.reconcile(counts)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Usage counter reconciliation failed")
+
+            await asyncio.sleep(interval_seconds)
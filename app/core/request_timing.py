@@ -0,0 +1,234 @@
+"""
+Per-request phase timing and sampled trace spans.
+
+The metrics middleware starts a RequestTimer for every HTTP request and
+keeps it in a context variable; code on the request path marks phases
+with `with request_phase("provider"):`. Phases finished before the
+response starts are sent in a Server-Timing header. A TRACE_SAMPLE_RATE
+share of requests are exported as OpenTelemetry spans in OTLP/JSON: one
+line per trace appended to TRACE_EXPORT_PATH (rotated past
+TRACE_EXPORT_MAX_BYTES) and/or POSTed to a collector at TRACE_EXPORT_URL.
+Export is batched off the request path. An inbound W3C traceparent is
+always joined, but its "sampled" flag only forces export with
+TRACE_HONOR_PARENT_SAMPLED, since any client can set it.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class RequestTimer:
+    def __init__(self, name: str, traceparent: Optional[str] = None):
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        # [name, offset from start (s), duration (s)]
+        self.phases: List[list] = []
+        self.attributes: Dict[str, object] = {}
+
+        self.trace_id = self.parent_span_id = None
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+        if traceparent:
+            # version-traceid-parentid-flags
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                self.trace_id, self.parent_span_id = parts[1], parts[2]
+                if settings.TRACE_HONOR_PARENT_SAMPLED:
+                    sampled = sampled or parts[3] == "01"
+        self.sampled = sampled
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append([name, start - self.start, time.perf_counter() - start])
+
+    def server_timing(self) -> str:
+        """Server-Timing value; repeated phases (e.g. failover attempts) are summed"""
+        durations: Dict[str, float] = {}
+        for name, _, duration in self.phases:
+            durations[name] = durations.get(name, 0.0) + duration
+        durations["total"] = time.perf_counter() - self.start
+        return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in durations.items())
+
+    def spans(self, status_code: int) -> List[Dict]:
+        """The request as a server span with one child span per phase (OTLP/JSON)"""
+        trace_id = self.trace_id or os.urandom(16).hex()
+        root_id = os.urandom(8).hex()
+        end_ns = self.start_ns + int((time.perf_counter() - self.start) * 1e9)
+
+        root = {
+            "traceId": trace_id,
+            "spanId": root_id,
+            "name": self.name,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": _attributes({**self.attributes, "http.response.status_code": status_code}),
+            "status": {"code": STATUS_ERROR if status_code >= 500 else STATUS_OK},
+        }
+        if self.parent_span_id:
+            root["parentSpanId"] = self.parent_span_id
+
+        spans = [root]
+        for name, offset, duration in self.phases:
+            start_ns = self.start_ns + int(offset * 1e9)
+            spans.append({
+                "traceId": trace_id,
+                "spanId": os.urandom(8).hex(),
+                "parentSpanId": root_id,
+                "name": name,
+                "kind": SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + int(duration * 1e9)),
+            })
+        return spans
+
+
+def _attributes(values: Dict[str, object]) -> List[Dict]:
+    attributes = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            attributes.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            attributes.append({"key": key, "value": {"intValue": str(value)}})
+        else:
+            attributes.append({"key": key, "value": {"stringValue": str(value)}})
+    return attributes
+
+
+current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("current_timer", default=None)
+
+
+@contextmanager
+def request_phase(name: str) -> Iterator[None]:
+    """Time a phase of the current request (a no-op outside a request)"""
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+def set_request_attribute(key: str, value):
+    timer = current_timer.get()
+    if timer is not None:
+        timer.attributes[key] = value
+
+
+class SpanExporter:
+    def __init__(
+        self,
+        path: Optional[str] = settings.TRACE_EXPORT_PATH,
+        url: Optional[str] = settings.TRACE_EXPORT_URL,
+        max_file_bytes: int = settings.TRACE_EXPORT_MAX_BYTES,
+        flush_interval_seconds: float = 1.0,
+        max_pending: int = 10_000
+    ):
+        self.path = path
+        self.url = url
+        self.max_file_bytes = max_file_bytes
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.pending: List[List[Dict]] = []
+        self.exported = 0
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def export(self, spans: List[Dict]):
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.pending.append(spans)
+
+    def start(self):
+        if self.url:
+            self.client = httpx.AsyncClient(timeout=5.0)
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        try:
+            await self.flush()
+        except Exception:
+            # Shutdown goes on without the last batch
+            logger.exception("Final span export failed")
+        finally:
+            if self.client is not None:
+                await self.client.aclose()
+                self.client = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Span export failed")
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+
+        payloads = [_otlp_payload(spans) for spans in batch]
+        if self.path:
+            lines = "".join(json.dumps(payload, separators=(",", ":")) + "\n" for payload in payloads)
+            await asyncio.to_thread(_append, self.path, lines, self.max_file_bytes)
+        if self.client is not None:
+            await self.client.post(self.url, json=_otlp_payload([span for spans in batch for span in spans]))
+        self.exported += len(batch)
+
+    def stats(self) -> Dict:
+        return {
+            "sample_rate": settings.TRACE_SAMPLE_RATE,
+            "pending": len(self.pending),
+            "exported_traces": self.exported,
+            "dropped_traces": self.dropped,
+        }
+
+
+def _otlp_payload(spans: List[Dict]) -> Dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": settings.APP_NAME})},
+            "scopeSpans": [{"scope": {"name": "beaver.request_timing"}, "spans": spans}],
+        }]
+    }
+
+
+def _append(path: str, lines: str, max_bytes: int):
+    """Append to path, first moving it to path.1 if it has grown past max_bytes"""
+    try:
+        if os.path.getsize(path) >= max_bytes:
+            os.replace(path, f"{path}.1")
+    except FileNotFoundError:
+        pass
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+span_exporter = SpanExporter()
@@ -0,0 +1,132 @@
+"""
+Exact-match cache for deterministic chat completions.
+
+Requests with temperature 0 are keyed by a canonical SHA-256 of the
+model, messages, temperature and max_tokens. Entries live in an
+in-process LRU and, when configured, in Redis behind it so that all
+workers share hits. Both tiers expire entries after
+RESPONSE_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+
+
+def canonical_request_hash(
+    model_id: str,
+    messages: List,
+    temperature: Optional[float],
+    max_tokens: Optional[int]
+) -> str:
+    """Stable hash of everything that determines a completion"""
+    canonical = json.dumps(
+        {
+            "model": model_id,
+            "messages": [{"role": m.role, "content": m.content} for m in messages],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.RESPONSE_CACHE_TTL_SECONDS,
+        redis_client: Optional[redis.Redis] = None,
+        key_prefix: str = "beaver:respcache:"
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        # key → (expires at, payload)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bytes_saved = 0
+
+    async def get(self, key: str) -> Optional[Dict]:
+        payload = self._get_local(key)
+
+        if payload is not None:
+            self.memory_hits += 1
+        elif self.redis is not None:
+            try:
+                payload = await self.redis.get(self.key_prefix + key)
+            except redis.RedisError:
+                payload = None
+            if payload is not None:
+                self.redis_hits += 1
+                self._put_local(key, payload)
+
+        if payload is None:
+            self.misses += 1
+            return None
+
+        self.bytes_saved += len(payload.encode())
+        return json.loads(payload)
+
+    async def put(self, key: str, value: Dict):
+        payload = json.dumps(value, separators=(",", ":"))
+        self._put_local(key, payload)
+        self.stores += 1
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.key_prefix + key, payload, ex=int(self.ttl_seconds))
+            except redis.RedisError:
+                pass  # The local tier still has it
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return payload
+
+    def _put_local(self, key: str, payload: str):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        hits = self.memory_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self.entries),
+            "tiers": ["memory", "redis"] if self.redis is not None else ["memory"],
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
@@ -0,0 +1,112 @@
+"""
+Single-flight coalescing of identical in-flight upstream calls.
+
+Concurrent requests with the same key share one upstream call: the first
+caller starts it and later callers wait on the same result. Buffered
+calls share a task; streams share a SharedStream that buffers chunks and
+replays them to every subscriber, so a late joiner still sees the whole
+response. Callers stay independent otherwise; each is billed and logged
+on its own. Only deterministic (temperature 0) requests are coalesced;
+sampled ones would otherwise all get the same completion.
+
+The shared work runs as its own task, so one caller disconnecting does
+not fail the others. A shared stream is cancelled only when its last
+subscriber has gone.
+"""
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class SharedStream:
+    def __init__(self, chunks: AsyncIterator[dict]):
+        self.buffer: List[dict] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.condition = asyncio.Condition()
+        self.task = asyncio.create_task(self._pump(chunks))
+
+    async def _pump(self, chunks: AsyncIterator[dict]):
+        try:
+            async for chunk in chunks:
+                async with self.condition:
+                    self.buffer.append(chunk)
+                    self.condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            async with self.condition:
+                self.condition.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[dict]:
+        self.subscribers += 1
+        index = 0
+
+        try:
+            while True:
+                async with self.condition:
+                    await self.condition.wait_for(lambda: index < len(self.buffer) or self.done)
+                    pending = self.buffer[index:]
+
+                for chunk in pending:
+                    yield chunk
+                index += len(pending)
+
+                if not pending and self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Nobody is listening any more → stop paying for generation
+                self.task.cancel()
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Task] = {}
+        self.streams: Dict[str, SharedStream] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable]):
+        """Await call(), or the identical call already in flight"""
+        task = self.calls.get(key)
+
+        if task is None:
+            self.leaders += 1
+            task = self.calls[key] = asyncio.create_task(call())
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        else:
+            self.followers += 1
+
+        # Shielded: a caller going away must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stream(self, key: str, open_stream: Callable[[], AsyncIterator[dict]]) -> AsyncIterator[dict]:
+        """Subscribe to the identical stream in flight, or start it"""
+        shared = self.streams.get(key)
+
+        if shared is None or shared.done:
+            self.leaders += 1
+            shared = self.streams[key] = SharedStream(open_stream())
+            shared.task.add_done_callback(
+                lambda _: self.streams.pop(key, None) if self.streams.get(key) is shared else None
+            )
+        else:
+            self.followers += 1
+
+        return shared.subscribe()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight_calls": len(self.calls),
+            "in_flight_streams": len(self.streams),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+
+single_flight = SingleFlight()
@@ -1,8 +1,13 @@
 """
 Centralized database configuration
 Supports both SQLite (dev) and PostgreSQL (prod)
+
+The app uses the async engine (aiosqlite / asyncpg) through AsyncSession;
+the sync engine is kept for scripts (init_db.py, populate_models.py, ...)
+and Alembic.
 """
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool, QueuePool
 from sqlalchemy.engine import Engine
@@ -17,6 +22,20 @@ else:
     # Default to SQLite for development
     DATABASE_URL = "sqlite:///./beaver.db"
 
+
+def _to_async_url(url: str) -> str:
+    """Swap the sync driver for its async counterpart"""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+")[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+
 # Configure engine based on database type
 if DATABASE_URL.startswith("sqlite"):
     # SQLite configuration
@@ -26,6 +45,10 @@ if DATABASE_URL.startswith("sqlite"):
         poolclass=StaticPool,
         echo=False  # Set to True for SQL query logging
     )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False
+    )
     
     # Enable foreign key constraints for SQLite
     @event.listens_for(Engine, "connect")
@@ -43,6 +66,29 @@ else:
         pool_pre_ping=True,  # Verify connections before using
         echo=False  # Set to True for SQL query logging
     )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        echo=False
+    )
+
+
+class QueryCounter:
+    """Statements sent by the app's async engine (reported at /metrics)"""
+
+    def __init__(self):
+        self.count = 0
+
+
+db_queries = QueryCounter()
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    db_queries.count += 1
+
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -50,6 +96,14 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Objects stay usable after commit (routes read them to build responses)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, Numeric
 from datetime import datetime
 import uuid
-from sqlalchemy import Float
+from sqlalchemy import Float, event, update
 from sqlalchemy.orm import relationship
 
 from app.database.db import Base
@@ -14,7 +14,7 @@ class Account(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(Text, nullable=True)  # NULL for backward compatibility, Text for bcrypt hashes
     email_verified = Column(Boolean, default=False, nullable=False)
-    balance = Column(Numeric(10, 2), default=0.0, nullable=False)  # Use Numeric for precise decimal handling
+    balance = Column(Numeric(16, 6), default=0.0, nullable=False)  # Use Numeric for precise decimal handling
     created_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=False), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -55,7 +55,7 @@ class UsageLog(Base):
     provider = Column(String(50), nullable=True)
     input_tokens = Column(Integer, nullable=True)
     output_tokens = Column(Integer, nullable=True)
-    total_cost = Column(Numeric(10, 6), nullable=True)  # Use Numeric for precise cost tracking
+    total_cost = Column(Numeric(16, 6), nullable=True)  # Use Numeric for precise cost tracking
     created_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
 
 
@@ -64,7 +64,7 @@ class Transaction(Base):
 
     id = Column(String(255), primary_key=True, index=True)
     account_id = Column(String(255), ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False, index=True)
-    amount = Column(Numeric(10, 2), nullable=False)  # Use Numeric for precise amounts
+    amount = Column(Numeric(16, 6), nullable=False)  # Use Numeric for precise amounts
     transaction_type = Column(String(50), nullable=False)  # 'topup' or 'deduction'
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
@@ -98,14 +98,14 @@ class Model(Base):
     status = Column(String(20), default="active", nullable=False)  # active, inactive
     
     # Base prices (from provider, per 1M tokens)
-    base_input_price = Column(Numeric(10, 4), nullable=False)  # Use Numeric for precise pricing
-    base_output_price = Column(Numeric(10, 4), nullable=False)
+    base_input_price = Column(Numeric(16, 6), nullable=False)  # Use Numeric for precise pricing
+    base_output_price = Column(Numeric(16, 6), nullable=False)
     
     # Dynamic pricing (calculated by pricing engine)
     category = Column(String(50), index=True, nullable=True)  # ULTRA_BUDGET, BUDGET, MID_RANGE, PREMIUM, ULTRA_PREMIUM
     markup_percent = Column(Numeric(5, 2), nullable=True)  # Markup percentage applied
-    beaver_ai_input_price = Column(Numeric(10, 4), nullable=True)  # Final price after markup
-    beaver_ai_output_price = Column(Numeric(10, 4), nullable=True)  # Final price after markup
+    beaver_ai_input_price = Column(Numeric(16, 6), nullable=True)  # Final price after markup
+    beaver_ai_output_price = Column(Numeric(16, 6), nullable=True)  # Final price after markup
     
     # Metadata
     pricing_updated_at = Column(DateTime(timezone=False), nullable=True)
@@ -115,3 +115,26 @@ class Model(Base):
     @staticmethod
     def generate_id() -> str:
         return f"model_{uuid.uuid4().hex}"
+
+
+class CatalogVersion(Base):
+    """Single-row counter, bumped in the same transaction as any change to models or their prices"""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=False), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    @staticmethod
+    def bump():
+        """UPDATE statement announcing a new catalog version to every worker"""
+        return update(CatalogVersion).where(CatalogVersion.id == 1).values(
+            version=CatalogVersion.version + 1,
+            updated_at=datetime.utcnow()
+        )
+
+
+@event.listens_for(CatalogVersion.__table__, "after_create")
+def seed_catalog_version(table, connection, **kw):
+    """create_all (init_db) seeds the single row, as the migration does, so bump() has a row to update"""
+    connection.execute(table.insert().values(id=1, version=0, updated_at=datetime.utcnow()))
@@ -1,7 +1,19 @@
 from contextlib import asynccontextmanager
-import httpx
+import asyncio
 import redis.asyncio as redis
 from app.config import settings
+from app.core.rate_limiter import rate_limiter
+from app.core.redis_rate_limiter import RedisRateLimiter
+from app.core.usage_tracker import usage_tracker
+from app.core.redis_usage_tracker import RedisUsageTracker
+from app.core.balance_reservations import balance_reservations
+from app.core.redis_balance_reservations import RedisBalanceReservations
+from app.core.response_cache import ResponseCache
+from app.core.request_timing import span_exporter
+from app.database.db import AsyncSessionLocal, async_engine
+from app.models.catalog import model_catalog
+from app.providers.clients import ProviderClientRegistry
+from app.usage.writer import usage_log_writer
 
 @asynccontextmanager
 async def lifespan(app):
@@ -10,21 +22,73 @@ async def lifespan(app):
     """
 
     # 🔥 Startup (runs once)
-    app.state.http_client = httpx.AsyncClient(
-        timeout=60.0,
-        limits=httpx.Limits(
-            max_connections=200,
-            max_keepalive_connections=50
-        )
-    )
+    # One pool per provider, so a slow provider cannot starve the others
+    app.state.provider_clients = ProviderClientRegistry()
 
     app.state.redis = redis.from_url(
         settings.REDIS_URL,
         decode_responses=True
     )
 
+    # Shared Redis limiter for multi-worker deployments, in-memory otherwise
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        app.state.rate_limiter = RedisRateLimiter(app.state.redis)
+        try:
+            await app.state.rate_limiter.load_scripts()
+        except redis.RedisError:
+            pass  # loaded on the first NOSCRIPT instead
+    else:
+        app.state.rate_limiter = rate_limiter
+
+    # Monthly usage counters, reconciled against usage_logs when in Redis
+    reconciler = None
+    if settings.USAGE_TRACKER_BACKEND == "redis":
+        app.state.usage_tracker = RedisUsageTracker(app.state.redis)
+        reconciler = asyncio.create_task(
+            app.state.usage_tracker.run_reconciler(
+                async_engine,
+                settings.USAGE_RECONCILE_INTERVAL_SECONDS
+            )
+        )
+    else:
+        app.state.usage_tracker = usage_tracker
+
+    # Worst-case cost holds taken before provider calls
+    if settings.BALANCE_RESERVATION_BACKEND == "redis":
+        app.state.balance_reservations = RedisBalanceReservations(app.state.redis)
+    else:
+        app.state.balance_reservations = balance_reservations
+
+    # Exact-match response cache, off unless enabled
+    app.state.response_cache = None
+    if settings.RESPONSE_CACHE_ENABLED:
+        app.state.response_cache = ResponseCache(
+            redis_client=app.state.redis if settings.RESPONSE_CACHE_BACKEND == "redis" else None
+        )
+
+    # Active models and prices in memory; the chat path makes no catalog queries
+    await model_catalog.load(AsyncSessionLocal)
+    catalog_watcher = asyncio.create_task(
+        model_catalog.run_watcher(
+            AsyncSessionLocal,
+            settings.CATALOG_VERSION_POLL_SECONDS,
+            settings.CATALOG_MAX_AGE_SECONDS
+        )
+    )
+
+    # Batched usage_logs writes
+    usage_log_writer.start()
+
+    # Sampled request spans, written in batches
+    span_exporter.start()
+
     yield
 
     # 🧹 Shutdown (runs once)
-    await app.state.http_client.aclose()
+    if reconciler:
+        reconciler.cancel()
+    catalog_watcher.cancel()
+    await usage_log_writer.stop()
+    await span_exporter.stop()
+    await app.state.provider_clients.aclose()
     await app.state.redis.close()
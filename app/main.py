@@ -12,16 +12,24 @@ from app.routes.auth import router as auth_router
 from app.routes.api_keys import router as api_keys_router
 from app.routes.status import router as status_router
 from app.routes.users import router as users_router
-from app.middleware.auth import AuthMiddleware
-from app.middleware.rate_limit import RateLimitMiddleware
-from app.middleware.usage_limit import UsageLimitMiddleware
+from app.routes.metrics import router as metrics_router
+from app.middleware.gateway import GatewayMiddleware
+from app.middleware.metrics import MetricsMiddleware
 
 app = FastAPI(
     title=settings.APP_NAME,
     lifespan=lifespan
 )
 
-# CORS Middleware - Must be added first to allow frontend requests
+# Gateway middleware - auth, rate limit and usage limit in one ASGI pass.
+# Middleware added later wraps middleware added earlier, so registering it
+# before CORS keeps its 401/402/429 responses inside the CORS layer.
+app.add_middleware(GatewayMiddleware)
+
+# Route latency histograms; outside the gateway so rejections are timed too
+app.add_middleware(MetricsMiddleware)
+
+# CORS Middleware - Must be outermost to allow frontend requests
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS + ["https://lovable.dev"],
@@ -51,13 +59,15 @@ v1_app.add_middleware(
 v1_app.include_router(chat_router)
 v1_app.include_router(models_router)
 
-# Mount v1 sub-application at /v1
-app.mount("/v1", v1_app)
-
 # Include v1 routes in main app to maintain original paths
 app.include_router(chat_router)
 app.include_router(models_router)
 
+# Mount v1 sub-application at /v1
+# Routes are matched in registration order, so the mount goes after the main
+# app's /v1 routes; mounted first it captured every /v1/* request and 404'd.
+app.mount("/v1", v1_app)
+
 # Include non-v1 routes in main app
 app.include_router(health_router)
 app.include_router(protected_router)
@@ -67,8 +77,4 @@ app.include_router(auth_router)
 app.include_router(api_keys_router)
 app.include_router(status_router)
 app.include_router(users_router)
-
-# Middleware order matters - AuthMiddleware must run first
-app.add_middleware(AuthMiddleware)
-app.add_middleware(RateLimitMiddleware)
-app.add_middleware(UsageLimitMiddleware)
\ No newline at end of file
+app.include_router(metrics_router)
@@ -0,0 +1,157 @@
+"""
+Gateway middleware: API key auth, rate limiting and monthly usage limits
+in a single pure-ASGI pass.
+
+Unlike BaseHTTPMiddleware this does not spawn a task or wrap the response
+per layer: allowed requests are handed to the app with the original
+receive/send callables, so response bodies (including streams) pass
+straight through. Rejections are sent as JSON error responses.
+"""
+import inspect
+from typing import Optional, Tuple
+
+import redis.asyncio as redis
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.auth.api_key import get_api_key_snapshot
+from app.core.rate_limiter import rate_limiter
+from app.core.rate_limits import RATE_LIMITS
+from app.core.redis_rate_limiter import RedisRateLimiter
+from app.core.redis_usage_tracker import RedisUsageTracker
+from app.core.request_timing import request_phase
+from app.core.usage_limits import USAGE_LIMITS
+from app.core.usage_tracker import usage_tracker
+
+# Endpoints that never require an API key
+PUBLIC_PATHS = {"/health", "/docs", "/openapi.json", "/redoc"}
+
+# Admin (account creation, etc.) and auth (register, login) endpoints
+PUBLIC_PREFIXES = ("/admin", "/auth")
+
+API_KEY_PREFIX = "beaver_"
+
+
+class GatewayMiddleware:
+    """Extract and validate the API key, then apply rate and usage limits"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Allow OPTIONS requests for CORS preflight
+        if scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path in PUBLIC_PATHS or path.startswith(PUBLIC_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = Headers(scope=scope).get("authorization")
+
+        if not authorization:
+            # Only require auth for protected routes
+            if "/v1/" in path or "/account" in path:
+                await self.reject(scope, receive, send, 401, "Missing Authorization header")
+                return
+            await self.app(scope, receive, send)
+            return
+
+        if not authorization.startswith("Bearer "):
+            await self.reject(scope, receive, send, 401, "Invalid Authorization format")
+            return
+
+        api_key_value = authorization.replace("Bearer ", "").strip()
+
+        # Other bearer tokens (JWTs) are validated by the route dependencies
+        if not api_key_value.startswith(API_KEY_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        with request_phase("auth"):
+            api_key = await get_api_key_snapshot(api_key_value)
+
+        if not api_key:
+            await self.reject(scope, receive, send, 403, "Invalid or disabled API key")
+            return
+
+        if api_key.account.balance < 0:
+            await self.reject(
+                scope, receive, send, 402,
+                "Insufficient account balance. Please top up your account."
+            )
+            return
+
+        # Use default plan for all accounts (can be enhanced later)
+        plan = "pro"
+
+        with request_phase("rate_limit"):
+            rejection = await self.check_limits(scope["app"].state, api_key.id, plan)
+        if rejection:
+            await self.reject(scope, receive, send, *rejection)
+            return
+
+        # Set API key in request state for use by routes
+        scope.setdefault("state", {})["api_key"] = api_key
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def check_limits(state, api_key_id: str, plan: str) -> Optional[Tuple[int, str]]:
+        """
+        Apply the rate limit, then count the request against the monthly
+        usage limit. Returns (status_code, detail) when the request is refused.
+        Backends are selected at startup; when both live in Redis the two
+        checks are one script call (a single EVALSHA round trip).
+        """
+        limiter = getattr(state, "rate_limiter", rate_limiter)
+        tracker = getattr(state, "usage_tracker", usage_tracker)
+
+        if (
+            isinstance(limiter, RedisRateLimiter)
+            and isinstance(tracker, RedisUsageTracker)
+            and plan in RATE_LIMITS
+            and plan in USAGE_LIMITS
+        ):
+            if limiter.is_denied_locally(api_key_id):
+                return 429, "Rate limit exceeded"
+
+            try:
+                allowed, usage_count = await limiter.admit(tracker, api_key_id, plan)
+
+                if not allowed:
+                    return 429, "Rate limit exceeded"
+
+                if not tracker.check(usage_count, plan):
+                    return 402, "Monthly usage limit exceeded"
+
+                return None
+            except redis.RedisError:
+                # Redis unavailable → fall back to the per-process limiters
+                limiter, tracker = rate_limiter, usage_tracker
+
+        allowed = limiter.is_allowed(api_key=api_key_id, plan=plan)
+        if inspect.isawaitable(allowed):
+            allowed = await allowed
+        if not allowed:
+            return 429, "Rate limit exceeded"
+
+        allowed = tracker.increment(api_key=api_key_id, plan=plan)
+        if inspect.isawaitable(allowed):
+            allowed = await allowed
+        if not allowed:
+            return 402, "Monthly usage limit exceeded"
+
+        return None
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str):
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
@@ -0,0 +1,64 @@
+"""
+Route latency and request timing middleware (pure ASGI).
+
+Times each HTTP request from arrival until its response is fully sent,
+streams included, and records it under the matched route template
+(e.g. "POST /v1/models/{model_id}/chat") so path parameters don't
+multiply the series. It also starts the request's RequestTimer: phases
+finished by the time the response starts go out in a Server-Timing
+header, and sampled requests are exported as trace spans at the end.
+"""
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.metrics import latency_metrics
+from app.core.request_timing import RequestTimer, current_timer, span_exporter
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timer = RequestTimer(
+            f"{scope['method']} {scope['path']}",
+            traceparent=Headers(scope=scope).get("traceparent")
+        )
+        token = current_timer.set(timer)
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    MutableHeaders(scope=message).append("Server-Timing", timer.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timer.reset(token)
+
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path_format", None) or "unmatched"
+            name = f"{scope['method']} {path}"
+            latency_metrics.record("route", name, time.perf_counter() - start)
+
+            if timer.sampled:
+                timer.name = name
+                timer.attributes.update({
+                    "http.request.method": scope["method"],
+                    "http.route": path,
+                    "url.path": scope["path"],
+                })
+                span_exporter.export(timer.spans(status_code))
@@ -0,0 +1,142 @@
+"""
+Versioned, immutable in-memory model catalog.
+
+Every worker loads the active models at startup into a CatalogSnapshot:
+read-only configs (as returned by get_model) and pricing dicts (as
+returned by PricingEngine.get_model_pricing), keyed by model name. The
+chat path reads the current snapshot and never queries the models
+table.
+
+Changes to models or prices bump the single-row catalog_version table in
+the same transaction (PricingEngine.recalculate_all_pricing does). Each
+worker polls that counter every CATALOG_VERSION_POLL_SECONDS and, on a
+new version, builds a fresh snapshot and swaps it in with one
+assignment, so a request sees either the old catalog or the new one,
+never a mix.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
+
+from sqlalchemy import insert, select
+
+from app.core.pricing_engine import model_pricing
+from app.database.models import CatalogVersion, Model
+from app.pricing.engine import price_to_picos
+
+logger = logging.getLogger(__name__)
+
+
+def model_config(model: Model) -> dict:
+    """Model configuration dict for a models row"""
+    # Use Beaver AI prices if available, otherwise use base prices
+    input_price = model.beaver_ai_input_price if model.beaver_ai_input_price else model.base_input_price
+    output_price = model.beaver_ai_output_price if model.beaver_ai_output_price else model.base_output_price
+    
+    return {
+        "provider": model.provider,
+        "active": model.status == "active",
+        "category": model.category or "PREMIUM",  # Fallback to PREMIUM if not categorized
+        "base_input_price": float(model.base_input_price),
+        "base_output_price": float(model.base_output_price),
+        "beaver_ai_input_price": float(input_price),
+        "beaver_ai_output_price": float(output_price),
+        "markup_percent": float(model.markup_percent) if model.markup_percent else None,
+        "display_name": model.display_name,
+        # Billing uses these exact integer prices (pico-dollars per token)
+        "input_picos_per_token": price_to_picos(input_price),
+        "output_picos_per_token": price_to_picos(output_price)
+    }
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    config: Mapping
+    pricing: Mapping
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    models: Mapping[str, CatalogEntry]
+    loaded_at: float
+
+
+class ModelCatalog:
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.reloads = 0
+        self.version_checks = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.snapshot is not None
+
+    def get(self, model_id: str) -> Optional[CatalogEntry]:
+        snapshot = self.snapshot
+        return snapshot.models.get(model_id) if snapshot is not None else None
+
+    async def load(self, session_factory):
+        """Build a new snapshot from the database and swap it in"""
+        async with session_factory() as db:
+            # Version first: a bump racing this load then triggers another reload
+            version = await self._read_version(db)
+            result = await db.execute(select(Model).where(Model.status == "active"))
+            entries = {
+                model.name: CatalogEntry(
+                    config=MappingProxyType(model_config(model)),
+                    pricing=MappingProxyType(model_pricing(model))
+                )
+                for model in result.scalars()
+            }
+
+        self.snapshot = CatalogSnapshot(
+            version=version,
+            models=MappingProxyType(entries),
+            loaded_at=time.time()
+        )
+        self.reloads += 1
+
+    @staticmethod
+    async def _read_version(db) -> int:
+        version = (await db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1))).scalar()
+        if version is None:
+            # Databases created before the counter existed
+            await db.execute(insert(CatalogVersion).values(id=1, version=0))
+            await db.commit()
+            version = 0
+        return version
+
+    async def run_watcher(self, session_factory, interval_seconds: float, max_age_seconds: float):
+        """Reload when the version counter moves (or the snapshot gets old)"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                async with session_factory() as db:
+                    version = (await db.execute(
+                        select(CatalogVersion.version).where(CatalogVersion.id == 1)
+                    )).scalar()
+                self.version_checks += 1
+
+                snapshot = self.snapshot
+                if snapshot is None or version != snapshot.version or time.time() - snapshot.loaded_at > max_age_seconds:
+                    await self.load(session_factory)
+            except Exception:
+                logger.exception("Model catalog refresh failed; keeping the current snapshot")
+
+    def stats(self) -> Dict:
+        snapshot = self.snapshot
+        return {
+            "loaded": snapshot is not None,
+            "version": snapshot.version if snapshot else None,
+            "models": len(snapshot.models) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "reloads": self.reloads,
+            "version_checks": self.version_checks,
+        }
+
+
+model_catalog = ModelCatalog()
@@ -1,44 +1,41 @@
 """
-Model registry - now uses database with dynamic pricing
+Model registry - served from the in-memory model catalog, with the
+database as fallback when no catalog is loaded (scripts, tests)
 """
-from typing import Dict, Optional
-from sqlalchemy.orm import Session
+from typing import Mapping, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models import Model
-from app.core.pricing_engine import PricingEngine
+from app.models.catalog import model_catalog, model_config
 
 
-def get_model(model_id: str, db: Session) -> dict:
+async def get_model(model_id: str, db: Optional[AsyncSession] = None) -> Mapping:
     """
-    Get model from database with pricing information
+    Get model with pricing information
     
     Args:
         model_id: Model name/ID
-        db: Database session
+        db: Database session, used only when the catalog is not loaded
         
     Returns:
-        Model configuration dict
+        Model configuration (read-only when served from the catalog)
     """
-    model = db.query(Model).filter(
-        Model.name == model_id,
-        Model.status == 'active'
-    ).first()
+    if model_catalog.loaded:
+        entry = model_catalog.get(model_id)
+        if entry is None:
+            raise ValueError(f"Model not found: {model_id}")
+        return entry.config
+
+    result = await db.execute(
+        select(Model).where(
+            Model.name == model_id,
+            Model.status == 'active'
+        )
+    )
+    model = result.scalars().first()
     
     if not model:
         raise ValueError(f"Model not found: {model_id}")
     
-    # Use Beaver AI prices if available, otherwise use base prices
-    input_price = model.beaver_ai_input_price if model.beaver_ai_input_price else model.base_input_price
-    output_price = model.beaver_ai_output_price if model.beaver_ai_output_price else model.base_output_price
-    
-    return {
-        "provider": model.provider,
-        "active": model.status == "active",
-        "category": model.category or "PREMIUM",  # Fallback to PREMIUM if not categorized
-        "base_input_price": float(model.base_input_price),
-        "base_output_price": float(model.base_output_price),
-        "beaver_ai_input_price": float(input_price),
-        "beaver_ai_output_price": float(output_price),
-        "markup_percent": float(model.markup_percent) if model.markup_percent else None,
-        "display_name": model.display_name
-    }
+    return model_config(model)
@@ -1,4 +1,29 @@
-from typing import Dict
+"""
+Fixed-point billing arithmetic.
+
+Money is integer micro-dollars (the scale of every stored amount), and
+prices are integer pico-dollars per token: a price of $p per 1M tokens
+is p × 10⁶ pico-dollars per token, exact for prices with up to six
+decimals. A request then costs two integer multiplies and one rounding
+division, with no floats and no Decimal context in the hot path.
+Decimals appear only at the database boundary, where to_micros and
+from_micros convert exactly.
+
+Costs round half up to the micro-dollar, the same result as Decimal
+math quantized to 6 places with ROUND_HALF_UP.
+"""
+from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP
+from typing import Dict, Union
+
+MICROS_PER_DOLLAR = 1_000_000
+PICOS_PER_MICRO = 1_000_000
+
+# Decimal places of stored amounts and prices
+MONEY_SCALE = 6
+PRICE_SCALE = 6
+
+# Markups and billing rates as integer parts per million
+PPM = 1_000_000
 
 # Pricing categories & markups (percent)
 CATEGORY_MARKUP: Dict[str, float] = {
@@ -9,24 +34,69 @@ CATEGORY_MARKUP: Dict[str, float] = {
     "ULTRA_PREMIUM": 3.5
 }
 
+Amount = Union[Decimal, int, float, str]
+
+
+def _decimal(amount: Amount) -> Decimal:
+    # str() keeps a float's shortest repr (0.1 → Decimal("0.1"), not its binary expansion)
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+
+def to_micros(amount: Amount, rounding: str = ROUND_HALF_UP) -> int:
+    """Dollars → micro-dollars; exact for amounts with up to 6 decimals"""
+    return int(_decimal(amount).scaleb(MONEY_SCALE).to_integral_value(rounding=rounding))
+
+
+def to_micros_floor(amount: Amount) -> int:
+    """Dollars → micro-dollars, rounded down (a balance never rounds up)"""
+    return to_micros(amount, ROUND_FLOOR)
+
+
+def from_micros(micros: int) -> Decimal:
+    """Micro-dollars → dollars, exact, as stored in Numeric(..., 6) columns"""
+    return Decimal(micros).scaleb(-MONEY_SCALE)
+
+
+def price_to_picos(price_per_1m: Amount) -> int:
+    """$ per 1M tokens → pico-dollars per token"""
+    return int(_decimal(price_per_1m).scaleb(PRICE_SCALE).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def picos_to_price(picos_per_token: int) -> Decimal:
+    """Pico-dollars per token → $ per 1M tokens"""
+    return Decimal(picos_per_token).scaleb(-PRICE_SCALE)
+
+
+def to_ppm(fraction: Amount) -> int:
+    """A fraction (0.1, 1.125, ...) as integer parts per million"""
+    return int(_decimal(fraction).scaleb(6).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def round_div(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded half up, for numerator >= 0"""
+    return (numerator + denominator // 2) // denominator
+
 
-def apply_markup(base_price: float, markup_percent: float) -> float:
+def apply_markup(base_picos: int, markup_percent: Amount) -> int:
     """
-    Apply markup percentage to a base price.
+    Apply markup percentage to a base price (pico-dollars per token).
     """
-    return round(base_price * (1 + markup_percent / 100), 6)
+    factor_ppm = PPM + to_ppm(_decimal(markup_percent) / 100)
+    return round_div(base_picos * factor_ppm, PPM)
 
 
 def calculate_request_cost(
     input_tokens: int,
     output_tokens: int,
-    input_price_per_1m: float,
-    output_price_per_1m: float
-) -> float:
+    input_picos_per_token: int,
+    output_picos_per_token: int,
+    rate_ppm: int = PPM
+) -> int:
     """
-    Calculate total cost for a request.
-    Prices are per 1M tokens.
+    Calculate total cost for a request, in micro-dollars.
+    rate_ppm scales the cost (e.g. the discounted rate for cache hits).
     """
-    input_cost = (input_tokens / 1_000_000) * input_price_per_1m
-    output_cost = (output_tokens / 1_000_000) * output_price_per_1m
-    return round(input_cost + output_cost, 8)
+    picos = input_tokens * input_picos_per_token + output_tokens * output_picos_per_token
+    if rate_ppm != PPM:
+        return round_div(picos * rate_ppm, PICOS_PER_MICRO * PPM)
+    return round_div(picos, PICOS_PER_MICRO)
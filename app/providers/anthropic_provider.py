@@ -1,25 +1,25 @@
-from typing import List
+from typing import AsyncIterator, List
 from app.schemas.chat_request import Message
 from app.config import settings
 import httpx
 
-ANTHROPIC_CHAT_URL = "https://api.anthropic.com/v1/messages"
+from app.providers.clients import ProviderClient
+from app.providers.errors import ProviderError
+from app.providers.sse import iter_sse_data, parse_sse_json
 
+ANTHROPIC_CHAT_URL = f"{settings.ANTHROPIC_BASE_URL}/messages"
 
-class AnthropicProviderError(Exception):
+
+class AnthropicProviderError(ProviderError):
     pass
 
 
-async def call_anthropic(
+def _build_payload(
     model: str,
     messages: List[Message],
     temperature: float,
-    max_tokens: int,
-    client: httpx.AsyncClient
+    max_tokens: int
 ) -> dict:
-    if not settings.ANTHROPIC_API_KEY:
-        raise AnthropicProviderError("Anthropic API key not configured")
-    
     # Convert messages format (Anthropic uses different format)
     # Anthropic doesn't support system messages in the same way, so we'll prepend it to the first user message
     anthropic_messages = []
@@ -44,17 +44,25 @@ async def call_anthropic(
     if system_message:
         payload["system"] = system_message
 
-    headers = {
-        "x-api-key": settings.ANTHROPIC_API_KEY,
-        "anthropic-version": "2023-06-01",
-        "Content-Type": "application/json"
-    }
+    return payload
+
+
+async def call_anthropic(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> dict:
+    if not settings.ANTHROPIC_API_KEY:
+        raise AnthropicProviderError("Anthropic API key not configured", config_error=True)
+    
+    payload = _build_payload(model, messages, temperature, max_tokens)
 
     try:
         response = await client.post(
             ANTHROPIC_CHAT_URL,
-            json=payload,
-            headers=headers
+            json=payload
         )
     except httpx.RequestError as e:
         raise AnthropicProviderError("Failed to reach Anthropic API") from e
@@ -66,7 +74,7 @@ async def call_anthropic(
         except Exception:
             error_msg = response.text
 
-        raise AnthropicProviderError(error_msg)
+        raise AnthropicProviderError(error_msg, status_code=response.status_code)
 
     data = response.json()
     
@@ -93,3 +101,76 @@ async def call_anthropic(
         }
     }
 
+
+async def stream_anthropic(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> AsyncIterator[dict]:
+    """
+    Stream a completion, converting Anthropic's message events into
+    OpenAI-like chunks. message_start carries the input token count and
+    message_delta the final output token count.
+    """
+    if not settings.ANTHROPIC_API_KEY:
+        raise AnthropicProviderError("Anthropic API key not configured", config_error=True)
+
+    payload = _build_payload(model, messages, temperature, max_tokens)
+    payload["stream"] = True
+
+    input_tokens = 0
+
+    try:
+        async with client.stream(
+            "POST",
+            ANTHROPIC_CHAT_URL,
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    error_data = response.json()
+                    error_msg = error_data.get("error", {}).get("message", "Anthropic error")
+                except Exception:
+                    error_msg = response.text
+
+                raise AnthropicProviderError(error_msg, status_code=response.status_code)
+
+            async for data in iter_sse_data(response):
+                event = parse_sse_json(data, AnthropicProviderError)
+                event_type = event.get("type")
+
+                if event_type == "message_start":
+                    usage = event.get("message", {}).get("usage", {})
+                    input_tokens = usage.get("input_tokens", 0)
+
+                elif event_type == "content_block_delta":
+                    text = event.get("delta", {}).get("text")
+                    if text:
+                        yield {"choices": [{"delta": {"content": text}}]}
+
+                elif event_type == "message_delta":
+                    output_tokens = event.get("usage", {}).get("output_tokens", 0)
+                    yield {
+                        "choices": [{
+                            "delta": {},
+                            "finish_reason": event.get("delta", {}).get("stop_reason")
+                        }],
+                        "usage": {
+                            "prompt_tokens": input_tokens,
+                            "completion_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens
+                        }
+                    }
+
+                elif event_type == "message_stop":
+                    break
+
+                elif event_type == "error":
+                    raise AnthropicProviderError(
+                        event.get("error", {}).get("message", "Anthropic error")
+                    )
+    except httpx.RequestError as e:
+        raise AnthropicProviderError("Failed to reach Anthropic API") from e
@@ -0,0 +1,178 @@
+"""
+Per-provider HTTP clients.
+
+Every provider gets its own httpx.AsyncClient, so a slow provider can
+only exhaust its own pool. Each client has its own limits, timeouts and
+optional HTTP/2 (when the h2 package is installed), and carries that
+provider's auth headers, which are built once at startup.
+
+Requests pass through a per-provider semaphore sized to the pool, so
+time spent waiting for a connection is measured here, not hidden inside
+httpx, and reported with pool occupancy at /status/providers.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class ProviderPool:
+    max_connections: int
+    max_keepalive_connections: int
+    max_concurrent_requests: int  # Above max_connections only with HTTP/2 multiplexing
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    pool_timeout: float = 10.0
+    http2: bool = False
+
+
+PROVIDER_POOLS = {
+    "openai": ProviderPool(max_connections=50, max_keepalive_connections=50, max_concurrent_requests=200, http2=True),
+    "anthropic": ProviderPool(max_connections=50, max_keepalive_connections=50, max_concurrent_requests=200, http2=True),
+    "google": ProviderPool(max_connections=50, max_keepalive_connections=50, max_concurrent_requests=200, http2=True),
+    "deepseek": ProviderPool(max_connections=50, max_keepalive_connections=20, max_concurrent_requests=50),
+    "perplexity": ProviderPool(max_connections=50, max_keepalive_connections=20, max_concurrent_requests=50),
+    "xai": ProviderPool(max_connections=50, max_keepalive_connections=20, max_concurrent_requests=50),
+}
+
+DEFAULT_POOL = ProviderPool(max_connections=20, max_keepalive_connections=10, max_concurrent_requests=20)
+
+
+def build_auth_headers(provider: str) -> Dict[str, str]:
+    """Static auth headers for a provider"""
+    if provider == "anthropic":
+        return {
+            "x-api-key": settings.ANTHROPIC_API_KEY,
+            "anthropic-version": "2023-06-01"
+        }
+
+    if provider == "google":
+        return {"x-goog-api-key": settings.GOOGLE_API_KEY}
+
+    api_keys = {
+        "openai": settings.OPENAI_API_KEY,
+        "deepseek": settings.DEEPSEEK_API_KEY,
+        "perplexity": settings.PERPLEXITY_API_KEY,
+        "xai": settings.XAI_API_KEY,
+    }
+    return {"Authorization": f"Bearer {api_keys.get(provider, '')}"}
+
+
+class ProviderClient:
+    def __init__(self, provider: str, pool: ProviderPool):
+        self.provider = provider
+        self.pool = pool
+        self.http2 = pool.http2 and HTTP2_AVAILABLE
+
+        if pool.http2 and not HTTP2_AVAILABLE:
+            logger.warning("h2 not installed; %s client falls back to HTTP/1.1", provider)
+
+        self.client = httpx.AsyncClient(
+            headers=build_auth_headers(provider),
+            timeout=httpx.Timeout(
+                pool.read_timeout,
+                connect=pool.connect_timeout,
+                pool=pool.pool_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=pool.max_connections,
+                max_keepalive_connections=pool.max_keepalive_connections
+            ),
+            http2=self.http2
+        )
+        self.slots = asyncio.Semaphore(pool.max_concurrent_requests)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.pool_timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        async with self._slot():
+            return await self.client.post(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        # The slot is held until the stream is closed
+        async with self._slot():
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    @asynccontextmanager
+    async def _slot(self):
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.pool.pool_timeout)
+        except asyncio.TimeoutError:
+            self.pool_timeouts += 1
+            raise httpx.PoolTimeout(f"No {self.provider} connection available")
+        finally:
+            self.waiting -= 1
+
+        wait = time.perf_counter() - start
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+
+    def stats(self) -> Dict:
+        return {
+            "http2": self.http2,
+            "max_connections": self.pool.max_connections,
+            "max_concurrent_requests": self.pool.max_concurrent_requests,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "occupancy": round(self.in_flight / self.pool.max_concurrent_requests, 4),
+            "requests": self.requests,
+            "pool_timeouts": self.pool_timeouts,
+            "avg_wait_ms": round(self.total_wait / self.requests * 1000, 3) if self.requests else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class ProviderClientRegistry:
+    def __init__(self, pools: Dict[str, ProviderPool] = PROVIDER_POOLS):
+        self.clients: Dict[str, ProviderClient] = {
+            provider: ProviderClient(provider, pool) for provider, pool in pools.items()
+        }
+
+    def get(self, provider: str) -> ProviderClient:
+        client = self.clients.get(provider)
+        if client is None:
+            # Providers without a tuned pool get a small one of their own
+            client = self.clients[provider] = ProviderClient(provider, DEFAULT_POOL)
+        return client
+
+    def stats(self) -> Dict[str, Dict]:
+        return {provider: client.stats() for provider, client in self.clients.items()}
+
+    async def aclose(self):
+        for client in self.clients.values():
+            await client.aclose()
@@ -1,12 +1,16 @@
-from typing import List
+from typing import AsyncIterator, List
 from app.schemas.chat_request import Message
 from app.config import settings
 import httpx
 
-DEEPSEEK_CHAT_URL = "https://api.deepseek.com/v1/chat/completions"
+from app.providers.clients import ProviderClient
+from app.providers.errors import ProviderError
+from app.providers.sse import iter_sse_data, parse_sse_json
 
+DEEPSEEK_CHAT_URL = f"{settings.DEEPSEEK_BASE_URL}/chat/completions"
 
-class DeepseekProviderError(Exception):
+
+class DeepseekProviderError(ProviderError):
     pass
 
 
@@ -15,7 +19,7 @@ async def call_deepseek(
     messages: List[Message],
     temperature: float,
     max_tokens: int,
-    client: httpx.AsyncClient
+    client: ProviderClient
 ) -> dict:
     # Deepseek uses OpenAI-compatible API
     payload = {
@@ -25,16 +29,10 @@ async def call_deepseek(
         "max_tokens": max_tokens
     }
 
-    headers = {
-        "Authorization": f"Bearer {getattr(settings, 'DEEPSEEK_API_KEY', '')}",
-        "Content-Type": "application/json"
-    }
-
     try:
         response = await client.post(
             DEEPSEEK_CHAT_URL,
-            json=payload,
-            headers=headers
+            json=payload
         )
     except httpx.RequestError as e:
         raise DeepseekProviderError("Failed to reach Deepseek API") from e
@@ -46,7 +44,49 @@ async def call_deepseek(
         except Exception:
             error_msg = response.text
 
-        raise DeepseekProviderError(error_msg)
+        raise DeepseekProviderError(error_msg, status_code=response.status_code)
 
     return response.json()
 
+
+async def stream_deepseek(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> AsyncIterator[dict]:
+    """
+    Stream a completion, yielding each chat.completion.chunk as a dict.
+    """
+    payload = {
+        "model": model,
+        "messages": [m.model_dump() for m in messages],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+        # Final chunk carries token usage
+        "stream_options": {"include_usage": True}
+    }
+
+    try:
+        async with client.stream(
+            "POST",
+            DEEPSEEK_CHAT_URL,
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    error_msg = response.json().get("error", {}).get("message", "Deepseek API error")
+                except Exception:
+                    error_msg = response.text
+
+                raise DeepseekProviderError(error_msg, status_code=response.status_code)
+
+            async for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                yield parse_sse_json(data, DeepseekProviderError)
+    except httpx.RequestError as e:
+        raise DeepseekProviderError("Failed to reach Deepseek API") from e
@@ -0,0 +1,33 @@
+from typing import Optional
+
+
+class ProviderError(Exception):
+    """
+    Base class for provider failures.
+    status_code is the upstream HTTP status, or None if no response was received.
+    config_error marks failures raised before any network I/O (e.g. a missing
+    API key): they say nothing about provider health.
+    provider is filled in by the router for error messages.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, config_error: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.config_error = config_error
+        self.provider: Optional[str] = None
+
+    @property
+    def retryable(self) -> bool:
+        """Provider-side failure (unreachable, 5xx, 429) rather than a bad request or missing configuration"""
+        if self.config_error:
+            return False
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling upstream while a provider's circuit breaker is open"""
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(f"{provider.upper()} is temporarily unavailable", status_code=503)
+        self.provider = provider
+        self.retry_after = retry_after
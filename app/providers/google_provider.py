@@ -1,25 +1,25 @@
-from typing import List
+from typing import AsyncIterator, List
 from app.schemas.chat_request import Message
 from app.config import settings
 import httpx
 
-GOOGLE_CHAT_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+from app.providers.clients import ProviderClient
+from app.providers.errors import ProviderError
+from app.providers.sse import iter_sse_data, parse_sse_json
 
+GOOGLE_CHAT_URL = settings.GOOGLE_BASE_URL + "/models/{model}:generateContent"
+GOOGLE_STREAM_URL = settings.GOOGLE_BASE_URL + "/models/{model}:streamGenerateContent"
 
-class GoogleProviderError(Exception):
+
+class GoogleProviderError(ProviderError):
     pass
 
 
-async def call_google(
-    model: str,
+def _build_payload(
     messages: List[Message],
     temperature: float,
-    max_tokens: int,
-    client: httpx.AsyncClient
+    max_tokens: int
 ) -> dict:
-    if not settings.GOOGLE_API_KEY:
-        raise GoogleProviderError("Google API key not configured")
-    
     # Convert messages format for Google Gemini API
     contents = []
     system_instruction = None
@@ -46,14 +46,27 @@ async def call_google(
             "parts": [{"text": system_instruction}]
         }
 
+    return payload
+
+
+async def call_google(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> dict:
+    if not settings.GOOGLE_API_KEY:
+        raise GoogleProviderError("Google API key not configured", config_error=True)
+    
+    payload = _build_payload(messages, temperature, max_tokens)
+
     url = GOOGLE_CHAT_URL.format(model=model)
-    params = {"key": settings.GOOGLE_API_KEY}
 
     try:
         response = await client.post(
             url,
-            json=payload,
-            params=params
+            json=payload
         )
     except httpx.RequestError as e:
         raise GoogleProviderError("Failed to reach Google API") from e
@@ -65,7 +78,7 @@ async def call_google(
         except Exception:
             error_msg = response.text
 
-        raise GoogleProviderError(error_msg)
+        raise GoogleProviderError(error_msg, status_code=response.status_code)
 
     data = response.json()
     
@@ -96,3 +109,66 @@ async def call_google(
         }
     }
 
+
+async def stream_google(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> AsyncIterator[dict]:
+    """
+    Stream a completion (alt=sse), converting each Gemini response chunk
+    into an OpenAI-like chunk. usageMetadata on the last chunk is final.
+    """
+    if not settings.GOOGLE_API_KEY:
+        raise GoogleProviderError("Google API key not configured", config_error=True)
+
+    payload = _build_payload(messages, temperature, max_tokens)
+
+    url = GOOGLE_STREAM_URL.format(model=model)
+    params = {"alt": "sse"}
+
+    try:
+        async with client.stream(
+            "POST",
+            url,
+            json=payload,
+            params=params
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    error_data = response.json()
+                    error_msg = error_data.get("error", {}).get("message", "Google API error")
+                except Exception:
+                    error_msg = response.text
+
+                raise GoogleProviderError(error_msg, status_code=response.status_code)
+
+            async for data in iter_sse_data(response):
+                event = parse_sse_json(data, GoogleProviderError)
+
+                candidates = event.get("candidates", [])
+                candidate = candidates[0] if candidates else {}
+                parts = candidate.get("content", {}).get("parts", [])
+                text = "".join(part.get("text", "") for part in parts)
+
+                chunk = {
+                    "choices": [{
+                        "delta": {"content": text} if text else {},
+                        "finish_reason": candidate.get("finishReason")
+                    }]
+                }
+
+                usage_metadata = event.get("usageMetadata")
+                if usage_metadata:
+                    chunk["usage"] = {
+                        "prompt_tokens": usage_metadata.get("promptTokenCount", 0),
+                        "completion_tokens": usage_metadata.get("candidatesTokenCount", 0),
+                        "total_tokens": usage_metadata.get("totalTokenCount", 0)
+                    }
+
+                yield chunk
+    except httpx.RequestError as e:
+        raise GoogleProviderError("Failed to reach Google API") from e
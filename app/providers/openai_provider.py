@@ -1,11 +1,15 @@
-from typing import List
+from typing import AsyncIterator, List
 from app.schemas.chat_request import Message
 from app.config import settings
 import httpx
 
-OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+from app.providers.clients import ProviderClient
+from app.providers.errors import ProviderError
+from app.providers.sse import iter_sse_data, parse_sse_json
 
-class OpenAIProviderError(Exception):
+OPENAI_CHAT_URL = f"{settings.OPENAI_BASE_URL}/chat/completions"
+
+class OpenAIProviderError(ProviderError):
     pass
 
 async def call_openai(
@@ -13,7 +17,7 @@ async def call_openai(
     messages: List[Message],
     temperature: float,
     max_tokens: int,
-    client: httpx.AsyncClient
+    client: ProviderClient
 ) -> dict:
     payload = {
         "model": model,
@@ -22,16 +26,10 @@ async def call_openai(
         "max_tokens": max_tokens
     }
 
-    headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
     try:
         response = await client.post(
             OPENAI_CHAT_URL,
-            json=payload,
-            headers=headers
+            json=payload
         )
     except httpx.RequestError as e:
         raise OpenAIProviderError("Failed to reach OpenAI") from e
@@ -43,6 +41,49 @@ async def call_openai(
         except Exception:
             error_msg = response.text
 
-        raise OpenAIProviderError(error_msg)
+        raise OpenAIProviderError(error_msg, status_code=response.status_code)
 
     return response.json()
+
+
+async def stream_openai(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> AsyncIterator[dict]:
+    """
+    Stream a completion, yielding each chat.completion.chunk as a dict.
+    """
+    payload = {
+        "model": model,
+        "messages": [m.model_dump() for m in messages],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+        # Final chunk carries token usage
+        "stream_options": {"include_usage": True}
+    }
+
+    try:
+        async with client.stream(
+            "POST",
+            OPENAI_CHAT_URL,
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    error_msg = response.json().get("error", {}).get("message", "OpenAI error")
+                except Exception:
+                    error_msg = response.text
+
+                raise OpenAIProviderError(error_msg, status_code=response.status_code)
+
+            async for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                yield parse_sse_json(data, OpenAIProviderError)
+    except httpx.RequestError as e:
+        raise OpenAIProviderError("Failed to reach OpenAI") from e
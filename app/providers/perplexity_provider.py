@@ -1,12 +1,16 @@
-from typing import List
+from typing import AsyncIterator, List
 from app.schemas.chat_request import Message
 from app.config import settings
 import httpx
 
-PERPLEXITY_CHAT_URL = "https://api.perplexity.ai/chat/completions"
+from app.providers.clients import ProviderClient
+from app.providers.errors import ProviderError
+from app.providers.sse import iter_sse_data, parse_sse_json
 
+PERPLEXITY_CHAT_URL = f"{settings.PERPLEXITY_BASE_URL}/chat/completions"
 
-class PerplexityProviderError(Exception):
+
+class PerplexityProviderError(ProviderError):
     pass
 
 
@@ -15,7 +19,7 @@ async def call_perplexity(
     messages: List[Message],
     temperature: float,
     max_tokens: int,
-    client: httpx.AsyncClient
+    client: ProviderClient
 ) -> dict:
     # Perplexity uses OpenAI-compatible API
     payload = {
@@ -25,16 +29,10 @@ async def call_perplexity(
         "max_tokens": max_tokens
     }
 
-    headers = {
-        "Authorization": f"Bearer {getattr(settings, 'PERPLEXITY_API_KEY', '')}",
-        "Content-Type": "application/json"
-    }
-
     try:
         response = await client.post(
             PERPLEXITY_CHAT_URL,
-            json=payload,
-            headers=headers
+            json=payload
         )
     except httpx.RequestError as e:
         raise PerplexityProviderError("Failed to reach Perplexity API") from e
@@ -46,7 +44,48 @@ async def call_perplexity(
         except Exception:
             error_msg = response.text
 
-        raise PerplexityProviderError(error_msg)
+        raise PerplexityProviderError(error_msg, status_code=response.status_code)
 
     return response.json()
 
+
+async def stream_perplexity(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> AsyncIterator[dict]:
+    """
+    Stream a completion, yielding each chat.completion.chunk as a dict.
+    Perplexity reports cumulative usage on every chunk.
+    """
+    payload = {
+        "model": model,
+        "messages": [m.model_dump() for m in messages],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True
+    }
+
+    try:
+        async with client.stream(
+            "POST",
+            PERPLEXITY_CHAT_URL,
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    error_msg = response.json().get("error", {}).get("message", "Perplexity API error")
+                except Exception:
+                    error_msg = response.text
+
+                raise PerplexityProviderError(error_msg, status_code=response.status_code)
+
+            async for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                yield parse_sse_json(data, PerplexityProviderError)
+    except httpx.RequestError as e:
+        raise PerplexityProviderError("Failed to reach Perplexity API") from e
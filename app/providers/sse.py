@@ -0,0 +1,41 @@
+"""
+Server-Sent Events parsing for streaming provider responses
+"""
+import json
+from typing import AsyncIterator, Type
+
+import httpx
+
+from app.providers.errors import ProviderError
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield the data field of each event in an SSE response body"""
+    data = []
+
+    async for line in response.aiter_lines():
+        if not line:
+            # Blank line ends an event
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+
+        if line.startswith("data:"):
+            value = line[5:]
+            data.append(value[1:] if value.startswith(" ") else value)
+
+    if data:
+        yield "\n".join(data)
+
+
+def parse_sse_json(data: str, error: Type[ProviderError]) -> dict:
+    """Decode an event's JSON data; anything else raises the provider's error"""
+    try:
+        event = json.loads(data)
+    except ValueError as e:
+        raise error(f"Undecodable stream event: {data[:200]!r}") from e
+
+    if not isinstance(event, dict):
+        raise error(f"Unexpected stream event: {data[:200]!r}")
+    return event
@@ -1,12 +1,16 @@
-from typing import List
+from typing import AsyncIterator, List
 from app.schemas.chat_request import Message
 from app.config import settings
 import httpx
 
-XAI_CHAT_URL = "https://api.x.ai/v1/chat/completions"
+from app.providers.clients import ProviderClient
+from app.providers.errors import ProviderError
+from app.providers.sse import iter_sse_data, parse_sse_json
 
+XAI_CHAT_URL = f"{settings.XAI_BASE_URL}/chat/completions"
 
-class XAIProviderError(Exception):
+
+class XAIProviderError(ProviderError):
     pass
 
 
@@ -15,7 +19,7 @@ async def call_xai(
     messages: List[Message],
     temperature: float,
     max_tokens: int,
-    client: httpx.AsyncClient
+    client: ProviderClient
 ) -> dict:
     # XAI (Grok) uses OpenAI-compatible API
     payload = {
@@ -25,16 +29,10 @@ async def call_xai(
         "max_tokens": max_tokens
     }
 
-    headers = {
-        "Authorization": f"Bearer {getattr(settings, 'XAI_API_KEY', '')}",
-        "Content-Type": "application/json"
-    }
-
     try:
         response = await client.post(
             XAI_CHAT_URL,
-            json=payload,
-            headers=headers
+            json=payload
         )
     except httpx.RequestError as e:
         raise XAIProviderError("Failed to reach XAI API") from e
@@ -46,7 +44,49 @@ async def call_xai(
         except Exception:
             error_msg = response.text
 
-        raise XAIProviderError(error_msg)
+        raise XAIProviderError(error_msg, status_code=response.status_code)
 
     return response.json()
 
+
+async def stream_xai(
+    model: str,
+    messages: List[Message],
+    temperature: float,
+    max_tokens: int,
+    client: ProviderClient
+) -> AsyncIterator[dict]:
+    """
+    Stream a completion, yielding each chat.completion.chunk as a dict.
+    """
+    payload = {
+        "model": model,
+        "messages": [m.model_dump() for m in messages],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+        # Final chunk carries token usage
+        "stream_options": {"include_usage": True}
+    }
+
+    try:
+        async with client.stream(
+            "POST",
+            XAI_CHAT_URL,
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    error_msg = response.json().get("error", {}).get("message", "XAI API error")
+                except Exception:
+                    error_msg = response.text
+
+                raise XAIProviderError(error_msg, status_code=response.status_code)
+
+            async for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                yield parse_sse_json(data, XAIProviderError)
+    except httpx.RequestError as e:
+        raise XAIProviderError("Failed to reach XAI API") from e
@@ -1,29 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
-from app.database.db import SessionLocal
 from app.database.models import Account, Transaction, UsageLog
-from app.auth.dependencies import get_current_user_flexible
+from app.auth.dependencies import get_db, get_current_user_flexible
 from app.database.models import Account
+from app.pricing.engine import from_micros, to_micros
 
 router = APIRouter(prefix="/account")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/balance")
 async def get_balance(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current account balance
     Supports both JWT and API key authentication"""
@@ -38,17 +30,20 @@ async def get_balance(
 @router.get("/transactions")
 async def get_transactions(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     limit: int = 50
 ):
     """Get transaction history
     Supports both JWT and API key authentication"""
     
-    transactions = db.query(Transaction).filter(
-        Transaction.account_id == account.id
-    ).order_by(
-        Transaction.created_at.desc()
-    ).limit(limit).all()
+    result = await db.execute(
+        select(Transaction).where(
+            Transaction.account_id == account.id
+        ).order_by(
+            Transaction.created_at.desc()
+        ).limit(limit)
+    )
+    transactions = result.scalars().all()
     
     return {
         "account_id": account.id,
@@ -68,7 +63,7 @@ async def get_transactions(
 @router.get("/usage")
 async def get_usage(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     days: int = 30
 ):
     """
@@ -82,17 +77,21 @@ async def get_usage(
     start_date = end_date - timedelta(days=days)
     
     # Get usage logs
-    usage_logs = db.query(UsageLog).filter(
-        UsageLog.account_id == account.id,
-        UsageLog.created_at >= start_date,
-        UsageLog.created_at <= end_date
-    ).all()
+    result = await db.execute(
+        select(UsageLog).where(
+            UsageLog.account_id == account.id,
+            UsageLog.created_at >= start_date,
+            UsageLog.created_at <= end_date
+        )
+    )
+    usage_logs = result.scalars().all()
     
     # Calculate statistics
     total_requests = len(usage_logs)
     total_input_tokens = sum(log.input_tokens for log in usage_logs)
     total_output_tokens = sum(log.output_tokens for log in usage_logs)
-    total_cost = sum(log.total_cost for log in usage_logs)
+    # Summed as integer micro-dollars (failed requests are logged without a cost)
+    total_cost = sum(to_micros(log.total_cost or 0) for log in usage_logs)
     
     # Group by model
     model_stats = {}
@@ -103,12 +102,15 @@ async def get_usage(
                 "requests": 0,
                 "input_tokens": 0,
                 "output_tokens": 0,
-                "cost": 0.0
+                "cost": 0
             }
         model_stats[log.model_id]["requests"] += 1
         model_stats[log.model_id]["input_tokens"] += log.input_tokens
         model_stats[log.model_id]["output_tokens"] += log.output_tokens
-        model_stats[log.model_id]["cost"] += log.total_cost
+        model_stats[log.model_id]["cost"] += to_micros(log.total_cost or 0)
+    
+    for stats in model_stats.values():
+        stats["cost"] = float(from_micros(stats["cost"]))
     
     return {
         "account_id": account.id,
@@ -120,7 +122,7 @@ async def get_usage(
             "total_input_tokens": total_input_tokens,
             "total_output_tokens": total_output_tokens,
             "total_tokens": total_input_tokens + total_output_tokens,
-            "total_cost": round(total_cost, 6)
+            "total_cost": float(from_micros(total_cost))
         },
         "by_model": list(model_stats.values())
     }
@@ -129,7 +131,7 @@ async def get_usage(
 @router.get("/billing")
 async def get_billing(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     limit: int = 100
 ):
     """
@@ -138,11 +140,14 @@ async def get_billing(
     Supports both JWT and API key authentication
     """
     
-    transactions = db.query(Transaction).filter(
-        Transaction.account_id == account.id
-    ).order_by(
-        Transaction.created_at.desc()
-    ).limit(limit).all()
+    result = await db.execute(
+        select(Transaction).where(
+            Transaction.account_id == account.id
+        ).order_by(
+            Transaction.created_at.desc()
+        ).limit(limit)
+    )
+    transactions = result.scalars().all()
     
     return {
         "account_id": account.id,
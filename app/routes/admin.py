@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, EmailStr, Field
+from typing import Literal, Optional
 import uuid
+from decimal import Decimal
 
-from app.database.db import SessionLocal
-from app.database.models import APIKey, Account, Transaction
+from app.database.db import AsyncSessionLocal
+from app.database.models import APIKey, Account, Model, Transaction
+from app.core.api_key_cache import api_key_cache
+from app.core.pricing_engine import incremental_pricing, model_pricing
+from app.pricing.engine import to_micros_floor
 
 router = APIRouter(prefix="/admin")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 class CreateAccountRequest(BaseModel):
@@ -32,14 +35,31 @@ class TopUpRequest(BaseModel):
     amount: float
 
 
+class CreateModelRequest(BaseModel):
+    name: str
+    display_name: str
+    provider: str
+    base_input_price: float = Field(ge=0)
+    base_output_price: float = Field(ge=0)
+
+
+class UpdateModelRequest(BaseModel):
+    display_name: Optional[str] = None
+    provider: Optional[str] = None
+    base_input_price: Optional[float] = Field(default=None, ge=0)
+    base_output_price: Optional[float] = Field(default=None, ge=0)
+    status: Optional[Literal["active", "inactive"]] = None
+
+
 @router.post("/accounts")
 async def create_account(
     request: CreateAccountRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new account"""
     # Check if account already exists
-    existing = db.query(Account).filter(Account.email == request.email).first()
+    result = await db.execute(select(Account).where(Account.email == request.email))
+    existing = result.scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Account with this email already exists")
     
@@ -62,8 +82,8 @@ async def create_account(
         )
         db.add(transaction)
     
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    await db.refresh(account)
     
     return {
         "account_id": account.id,
@@ -76,11 +96,12 @@ async def create_account(
 @router.post("/api-keys")
 async def create_api_key(
     request: CreateAPIKeyRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new API key for an account"""
     # Verify account exists
-    account = db.query(Account).filter(Account.id == request.account_id).first()
+    result = await db.execute(select(Account).where(Account.id == request.account_id))
+    account = result.scalars().first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
@@ -93,10 +114,10 @@ async def create_api_key(
         )
         
         db.add(new_key)
-        db.commit()
-        db.refresh(new_key)
+        await db.commit()
+        await db.refresh(new_key)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create API key: {str(e)}")
     
     return {
@@ -111,18 +132,20 @@ async def create_api_key(
 @router.post("/top-up")
 async def top_up_account(
     request: TopUpRequest,
-    db: Session = Depends(get_db)
+    req: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """Top up an account balance"""
     if request.amount <= 0:
         raise HTTPException(status_code=400, detail="Amount must be greater than 0")
     
-    account = db.query(Account).filter(Account.id == request.account_id).first()
+    result = await db.execute(select(Account).where(Account.id == request.account_id))
+    account = result.scalars().first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
     # Update balance
-    account.balance += request.amount
+    account.balance += Decimal(str(request.amount))
     
     # Create transaction record
     transaction = Transaction(
@@ -134,8 +157,12 @@ async def top_up_account(
     )
     
     db.add(transaction)
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    await db.refresh(account)
+    
+    # Cached key snapshots carry the old balance
+    api_key_cache.invalidate_account(account.id)
+    await req.app.state.balance_reservations.topped_up(account.id, to_micros_floor(account.balance))
     
     return {
         "account_id": account.id,
@@ -148,15 +175,17 @@ async def top_up_account(
 @router.get("/accounts/{account_id}")
 async def get_account(
     account_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get account details"""
-    account = db.query(Account).filter(Account.id == account_id).first()
+    result = await db.execute(select(Account).where(Account.id == account_id))
+    account = result.scalars().first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
     # Get API keys for this account
-    api_keys = db.query(APIKey).filter(APIKey.account_id == account_id).all()
+    result = await db.execute(select(APIKey).where(APIKey.account_id == account_id))
+    api_keys = result.scalars().all()
     
     return {
         "account_id": account.id,
@@ -173,3 +202,77 @@ async def get_account(
         ],
         "created_at": account.created_at.isoformat()
     }
+
+
+async def get_model_row(db: AsyncSession, model_name: str) -> Model:
+    result = await db.execute(select(Model).where(Model.name == model_name))
+    model = result.scalars().first()
+    if not model:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return model
+
+
+async def reprice(db: AsyncSession, model: Model) -> dict:
+    """Update categories and prices for the change to model and commit it"""
+    repriced = await incremental_pricing.apply(db, model)
+    await db.refresh(model)
+
+    return {
+        **model_pricing(model),
+        "status": model.status,
+        "repriced_models": repriced,
+        "percentiles": incremental_pricing.stats()["percentiles"]
+    }
+
+
+@router.post("/models")
+async def create_model(
+    request: CreateModelRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Add a model; categories and prices of affected models are updated"""
+    result = await db.execute(select(Model).where(Model.name == request.name))
+    if result.scalars().first():
+        raise HTTPException(status_code=400, detail="Model with this name already exists")
+
+    model = Model(
+        id=Model.generate_id(),
+        name=request.name,
+        display_name=request.display_name,
+        provider=request.provider,
+        base_input_price=Decimal(str(request.base_input_price)),
+        base_output_price=Decimal(str(request.base_output_price)),
+        status="active"
+    )
+    db.add(model)
+
+    return await reprice(db, model)
+
+
+@router.patch("/models/{model_name}")
+async def update_model(
+    model_name: str,
+    request: UpdateModelRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Update a model's details, base prices or status"""
+    model = await get_model_row(db, model_name)
+
+    for field, value in request.model_dump(exclude_none=True).items():
+        if field in ("base_input_price", "base_output_price"):
+            value = Decimal(str(value))
+        setattr(model, field, value)
+
+    return await reprice(db, model)
+
+
+@router.post("/models/{model_name}/deactivate")
+async def deactivate_model(
+    model_name: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stop serving a model; categories and prices of the rest are updated"""
+    model = await get_model_row(db, model_name)
+    model.status = "inactive"
+
+    return await reprice(db, model)
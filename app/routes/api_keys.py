@@ -2,24 +2,17 @@
 API Key management endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from app.database.db import SessionLocal
 from app.database.models import APIKey
-from app.auth.dependencies import get_current_user_flexible
+from app.auth.dependencies import get_db, get_current_user_flexible
 from app.database.models import Account
+from app.core.api_key_cache import api_key_cache
 
 router = APIRouter(prefix="/keys")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class CreateAPIKeyRequest(BaseModel):
     name: str
 
@@ -27,14 +20,17 @@ class CreateAPIKeyRequest(BaseModel):
 @router.get("")
 async def list_api_keys(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all API keys for current account
     Supports both JWT and API key authentication"""
     
-    api_keys = db.query(APIKey).filter(
-        APIKey.account_id == account.id
-    ).order_by(APIKey.created_at.desc()).all()
+    result = await db.execute(
+        select(APIKey).where(
+            APIKey.account_id == account.id
+        ).order_by(APIKey.created_at.desc())
+    )
+    api_keys = result.scalars().all()
     
     return {
         "api_keys": [
@@ -55,7 +51,7 @@ async def list_api_keys(
 async def create_api_key(
     request: CreateAPIKeyRequest,
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new API key for current account
     Supports both JWT and API key authentication"""
@@ -68,8 +64,8 @@ async def create_api_key(
     )
     
     db.add(new_key)
-    db.commit()
-    db.refresh(new_key)
+    await db.commit()
+    await db.refresh(new_key)
     
     return {
         "id": new_key.id,
@@ -84,16 +80,19 @@ async def create_api_key(
 async def delete_api_key(
     key_id: str,
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an API key (must belong to current account)
     Supports both JWT and API key authentication"""
     
     # Find the key
-    key_to_delete = db.query(APIKey).filter(
-        APIKey.id == key_id,
-        APIKey.account_id == account.id
-    ).first()
+    result = await db.execute(
+        select(APIKey).where(
+            APIKey.id == key_id,
+            APIKey.account_id == account.id
+        )
+    )
+    key_to_delete = result.scalars().first()
     
     if not key_to_delete:
         raise HTTPException(status_code=404, detail="API key not found")
@@ -101,7 +100,10 @@ async def delete_api_key(
     # Revoke the key instead of deleting (set is_active=False)
     # This preserves history while making the key unusable
     key_to_delete.is_active = False
-    db.commit()
+    await db.commit()
+    
+    # Make the revocation effective immediately for this worker
+    api_key_cache.invalidate_key(key_to_delete.key)
     
     return {"message": "API key revoked successfully"}
 
@@ -109,7 +111,7 @@ async def delete_api_key(
 @router.post("/generate")
 async def generate_api_key(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Generate a new API key (alias for POST /api-keys)
@@ -125,8 +127,8 @@ async def generate_api_key(
     )
     
     db.add(new_key)
-    db.commit()
-    db.refresh(new_key)
+    await db.commit()
+    await db.refresh(new_key)
     
     return {
         "api_key": new_key.key,
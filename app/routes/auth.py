@@ -4,12 +4,12 @@ Supports password-based registration/login with JWT tokens
 """
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr, field_validator
 from datetime import datetime, timedelta
 from typing import Optional
 
-from app.database.db import SessionLocal
 from app.database.models import Account, APIKey, RefreshToken
 from app.auth.password import hash_password, verify_password, validate_password_strength
 from app.auth.jwt import create_access_token, create_refresh_token, verify_token
@@ -52,7 +52,7 @@ class TokenResponse(BaseModel):
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(
     request: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user account with password.
@@ -60,7 +60,8 @@ async def register(
     Does NOT issue JWT tokens - user must login after registration.
     """
     # Check if account already exists
-    existing = db.query(Account).filter(Account.email == request.email).first()
+    result = await db.execute(select(Account).where(Account.email == request.email))
+    existing = result.scalars().first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -79,7 +80,7 @@ async def register(
         balance=request.initial_balance
     )
     db.add(account)
-    db.flush()  # Get account ID
+    await db.flush()  # Get account ID
     
     # Create default API key
     api_key = APIKey(
@@ -89,9 +90,9 @@ async def register(
         account_id=account.id
     )
     db.add(api_key)
-    db.commit()
-    db.refresh(account)
-    db.refresh(api_key)
+    await db.commit()
+    await db.refresh(account)
+    await db.refresh(api_key)
     
     return {
         "account": {
@@ -109,14 +110,15 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login with email and password.
     Returns JWT access token and refresh token on success.
     """
     # Find account
-    account = db.query(Account).filter(Account.email == request.email).first()
+    result = await db.execute(select(Account).where(Account.email == request.email))
+    account = result.scalars().first()
     
     if not account:
         # Use generic error message to prevent email enumeration
@@ -158,7 +160,7 @@ async def login(
         is_revoked=False
     )
     db.add(refresh_token)
-    db.commit()
+    await db.commit()
     
     return TokenResponse(
         access_token=access_token,
@@ -171,7 +173,7 @@ async def login(
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     request: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Refresh access token using refresh token.
@@ -188,11 +190,14 @@ async def refresh_token(
             )
         
         # Check if refresh token is revoked
-        refresh_token_record = db.query(RefreshToken).filter(
-            RefreshToken.token == request.refresh_token,
-            RefreshToken.account_id == account_id,
-            RefreshToken.is_revoked == False
-        ).first()
+        result = await db.execute(
+            select(RefreshToken).where(
+                RefreshToken.token == request.refresh_token,
+                RefreshToken.account_id == account_id,
+                RefreshToken.is_revoked == False
+            )
+        )
+        refresh_token_record = result.scalars().first()
         
         if not refresh_token_record:
             raise HTTPException(
@@ -208,7 +213,8 @@ async def refresh_token(
             )
         
         # Get account
-        account = db.query(Account).filter(Account.id == account_id).first()
+        result = await db.execute(select(Account).where(Account.id == account_id))
+        account = result.scalars().first()
         if not account:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -237,7 +243,7 @@ async def refresh_token(
             is_revoked=False
         )
         db.add(new_refresh_token)
-        db.commit()
+        await db.commit()
         
         return TokenResponse(
             access_token=access_token,
@@ -258,7 +264,7 @@ async def refresh_token(
 @router.post("/logout")
 async def logout(
     request: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Logout by revoking refresh token.
@@ -270,14 +276,17 @@ async def logout(
         
         if account_id:
             # Revoke refresh token
-            refresh_token = db.query(RefreshToken).filter(
-                RefreshToken.token == request.refresh_token,
-                RefreshToken.account_id == account_id
-            ).first()
+            result = await db.execute(
+                select(RefreshToken).where(
+                    RefreshToken.token == request.refresh_token,
+                    RefreshToken.account_id == account_id
+                )
+            )
+            refresh_token = result.scalars().first()
             
             if refresh_token:
                 refresh_token.is_revoked = True
-                db.commit()
+                await db.commit()
         
         return {"message": "Logged out successfully"}
         
@@ -291,16 +300,19 @@ async def logout(
 @router.get("/me")
 async def get_current_user(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user info from JWT token or API key.
     Supports both authentication methods for backward compatibility.
     """
     # Get all API keys for this account
-    api_keys = db.query(APIKey).filter(
-        APIKey.account_id == account.id
-    ).all()
+    result = await db.execute(
+        select(APIKey).where(
+            APIKey.account_id == account.id
+        )
+    )
+    api_keys = result.scalars().all()
     
     return {
         "id": account.id,
@@ -1,8 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+import json
+import logging
+import math
+import time
 import uuid
-from sqlalchemy.orm import Session
+from decimal import Decimal
+from typing import List, Optional, Tuple
 
-from app.auth.api_key import verify_api_key
+import anyio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.api_key import get_db, verify_api_key
+from app.config import settings
+from app.database.db import AsyncSessionLocal
 from app.schemas.chat_request import ChatRequest
 from app.schemas.chat_response import (
     ChatResponse,
@@ -10,45 +21,63 @@ from app.schemas.chat_response import (
     ChatMessage,
     ChatUsage
 )
+from app.models.catalog import model_catalog
 from app.models.registry import get_model
 from app.providers.openai_provider import (
     call_openai,
-    OpenAIProviderError
+    stream_openai
 )
 from app.providers.anthropic_provider import (
     call_anthropic,
-    AnthropicProviderError
+    stream_anthropic
 )
 from app.providers.google_provider import (
     call_google,
-    GoogleProviderError
+    stream_google
 )
 from app.providers.deepseek_provider import (
     call_deepseek,
-    DeepseekProviderError
+    stream_deepseek
 )
 from app.providers.perplexity_provider import (
     call_perplexity,
-    PerplexityProviderError
+    stream_perplexity
 )
 from app.providers.xai_provider import (
     call_xai,
-    XAIProviderError
+    stream_xai
 )
-from app.database.db import SessionLocal
-from app.database.models import Transaction, Account
+from app.providers.errors import CircuitOpenError, ProviderError
 from app.usage.logger import log_usage
-from app.core.pricing_engine import PricingEngine
+from app.usage.billing import charge_usage, unbilled_usage
+from app.core.pricing_engine import PricingEngine, cost_for_request
+from app.core.api_key_cache import api_key_cache
+from app.core.response_cache import canonical_request_hash
+from app.core.single_flight import single_flight
+from app.core.circuit_breaker import CLOSED, CircuitBreaker, circuit_breakers
+from app.core.latency_tracker import latency_tracker
+from app.core.metrics import latency_metrics
+from app.core.request_timing import request_phase, set_request_attribute
+from app.core.hedging import hedge_budget, hedged_call
+from app.core.model_router import VIRTUAL_MODELS, model_index
+from app.core.balance_reservations import estimate_max_cost_micros
+from app.pricing.engine import PPM, calculate_request_cost, from_micros, to_micros_floor, to_ppm
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/v1/models")
 
+STREAM_PROVIDERS = {
+    "openai": stream_openai,
+    "anthropic": stream_anthropic,
+    "google": stream_google,
+    "deepseek": stream_deepseek,
+    "perplexity": stream_perplexity,
+    "xai": stream_xai,
+}
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Used to bill streams cut off before the provider reported usage
+CHARS_PER_TOKEN_AVERAGE = 4
 
 
 @router.post("/{model_id}/chat", response_model=ChatResponse)
@@ -56,230 +85,389 @@ async def chat(
     model_id: str,
     request: ChatRequest,
     req: Request,
+    response: Response,
     api_key = Depends(verify_api_key),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # 1️⃣ Validate model and get pricing
-    try:
-        model_config = get_model(model_id, db)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    # 1️⃣ Validate model and get pricing (virtual models resolve from the in-memory index)
+    routing = request.routing
+    if model_id in VIRTUAL_MODELS:
+        resolved = model_index.resolve(
+            model_id,
+            providers=routing.providers if routing else None,
+            max_category=routing.max_category if routing else None
+        )
+        if not resolved:
+            raise HTTPException(status_code=404, detail=f"No model matches the routing constraints for {model_id}")
+        model_config = resolved[0][1]
+    else:
+        resolved = None
+        try:
+            with request_phase("get_model"):
+                model_config = await get_model(model_id, db)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    set_request_attribute("beaver.model", model_id)
 
-    provider = model_config["provider"]
-    
-    # Initialize pricing engine
-    pricing_engine = PricingEngine(db)
+    # "X-Beaver-Cache: bypass" always goes upstream (no cache, no coalescing)
+    bypass = req.headers.get("x-beaver-cache", "").lower() == "bypass"
+    cache = req.app.state.response_cache
+    cacheable = cache is not None and not request.stream and request.temperature == 0
+    # Sampled completions (temperature > 0) must stay independent per caller
+    coalescable = settings.SINGLE_FLIGHT_ENABLED and request.temperature == 0
 
-    input_tokens = 0
-    output_tokens = 0
-    answer = ""
+    request_hash = None
+    if not bypass and (cacheable or coalescable):
+        # Routing constraints change which model answers, so they are part of the key
+        request_hash = canonical_request_hash(
+            f"{model_id}:{routing.model_dump_json()}" if resolved and routing else model_id,
+            request.messages, request.temperature, request.max_tokens
+        )
+    coalesce_key = request_hash if coalescable else None
 
-    try:
-        # 🔹 OpenAI
-        if provider == "openai":
-            result = await call_openai(
-                model=model_id,
-                messages=request.messages,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                client=req.app.state.http_client
-            )
+    # 2️⃣ Serve repeated deterministic requests from the response cache
+    cache_key = None
+    if cacheable:
+        if bypass:
+            response.headers["X-Beaver-Cache"] = "bypass"
+        else:
+            cache_key = request_hash
+            with request_phase("cache"):
+                cached = await cache.get(cache_key)
 
-            answer = result["choices"][0]["message"]["content"]
-            usage = result.get("usage", {})
-            input_tokens = usage.get("prompt_tokens", 0)
-            output_tokens = usage.get("completion_tokens", 0)
+            if cached is not None:
+                response.headers["X-Beaver-Cache"] = "hit"
+                # Bill the model that produced the cached answer (a failover target, maybe)
+                served_model_id = cached.get("model", model_id)
+                served_entry = model_catalog.get(served_model_id)
+                served_config = served_entry.config if served_entry else model_config
+                charged, total_cost = await bill_request(
+                    db, api_key, served_model_id, served_config["provider"], served_config,
+                    cached["input_tokens"], cached["output_tokens"],
+                    rate_ppm=to_ppm(settings.RESPONSE_CACHE_BILLING_RATE),
+                    reservations=req.app.state.balance_reservations
+                )
+                if not charged:
+                    raise HTTPException(
+                        status_code=402,
+                        detail=f"Insufficient balance. Required: ${from_micros(total_cost)}, Available: ${api_key.account.balance:.6f}"
+                    )
+                return build_chat_response(
+                    served_model_id, cached["answer"], cached["input_tokens"], cached["output_tokens"]
+                )
 
-        # 🔹 Anthropic (Claude)
-        elif provider == "anthropic":
-            result = await call_anthropic(
-                model=model_id,
-                messages=request.messages,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                client=req.app.state.http_client
-            )
+            response.headers["X-Beaver-Cache"] = "miss"
 
-            answer = result["choices"][0]["message"]["content"]
-            usage = result.get("usage", {})
-            input_tokens = usage.get("prompt_tokens", 0)
-            output_tokens = usage.get("completion_tokens", 0)
+    # 3️⃣ Failover candidates: the requested model, then its configured chain
+    # (for virtual models: the next best resolved models)
+    if resolved:
+        candidates = resolved
+    else:
+        candidates = [(model_id, model_config)]
+        for fallback_id in settings.FAILOVER_CHAINS.get(model_id, []):
+            try:
+                with request_phase("get_model"):
+                    candidates.append((fallback_id, await get_model(fallback_id, db)))
+            except ValueError:
+                continue  # Unknown or inactive models are skipped
 
-        # 🔹 Google (Gemini)
-        elif provider == "google":
-            result = await call_google(
-                model=model_id,
-                messages=request.messages,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                client=req.app.state.http_client
-            )
+    # 4️⃣ Hold the worst-case cost (of the priciest candidate) before paying a provider
+    reservations = req.app.state.balance_reservations
+    max_cost = max(
+        estimate_max_cost_micros(
+            messages=request.messages,
+            max_tokens=request.max_tokens,
+            input_picos_per_token=candidate_config["input_picos_per_token"],
+            output_picos_per_token=candidate_config["output_picos_per_token"]
+        )
+        for _, candidate_config in candidates
+    )
+    with request_phase("reserve"):
+        reservation_id = await reservations.reserve(
+            api_key.account_id,
+            balance=to_micros_floor(api_key.account.balance),
+            amount=max_cost
+        )
+    if reservation_id is None:
+        raise HTTPException(
+            status_code=402,
+            detail=f"Insufficient balance. Maximum cost: ${from_micros(max_cost)}, "
+                   f"Available: ${api_key.account.balance:.6f} less in-flight requests"
+        )
 
-            answer = result["choices"][0]["message"]["content"]
-            usage = result.get("usage", {})
-            input_tokens = usage.get("prompt_tokens", 0)
-            output_tokens = usage.get("completion_tokens", 0)
+    if request.stream:
+        # The stream releases the hold once it has been billed
+        return await stream_chat(req, request, api_key, candidates, reservation_id, coalesce_key)
 
-        # 🔹 Deepseek
-        elif provider == "deepseek":
-            result = await call_deepseek(
-                model=model_id,
-                messages=request.messages,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                client=req.app.state.http_client
-            )
+    try:
+        try:
+            def call():
+                return call_with_failover(req, request, candidates)
 
-            answer = result["choices"][0]["message"]["content"]
-            usage = result.get("usage", {})
-            input_tokens = usage.get("prompt_tokens", 0)
-            output_tokens = usage.get("completion_tokens", 0)
+            if coalesce_key is not None:
+                # Identical requests in flight share one upstream call
+                served = await single_flight.do(coalesce_key, call)
+            else:
+                served = await call()
 
-        # 🔹 Perplexity
-        elif provider == "perplexity":
-            result = await call_perplexity(
-                model=model_id,
-                messages=request.messages,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                client=req.app.state.http_client
-            )
+            served_model_id, served_config, answer, input_tokens, output_tokens = served
 
-            answer = result["choices"][0]["message"]["content"]
-            usage = result.get("usage", {})
-            input_tokens = usage.get("prompt_tokens", 0)
-            output_tokens = usage.get("completion_tokens", 0)
+        except ProviderError as e:
+            raise await provider_failure(api_key, *candidates[0], e)
 
-        # 🔹 XAI (Grok)
-        elif provider == "xai":
-            result = await call_xai(
-                model=model_id,
-                messages=request.messages,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                client=req.app.state.http_client
-            )
+        # ============================
+        # 💳 PRICE, CHARGE + LOG USAGE
+        # ============================
 
-            answer = result["choices"][0]["message"]["content"]
-            usage = result.get("usage", {})
-            input_tokens = usage.get("prompt_tokens", 0)
-            output_tokens = usage.get("completion_tokens", 0)
+        # Billed at the price of the model that actually answered
+        charged, total_cost = await bill_request(
+            db, api_key, served_model_id, served_config["provider"], served_config,
+            input_tokens, output_tokens, reservations=reservations
+        )
 
-        # 🔹 Other providers (fallback)
-        else:
-            user_message = request.messages[-1].content
-            answer = f"(mock {provider} response from {model_id}) You said: {user_message}"
-            input_tokens = 20
-            output_tokens = 30
-
-    except (OpenAIProviderError, AnthropicProviderError, GoogleProviderError, 
-            DeepseekProviderError, PerplexityProviderError, XAIProviderError) as e:
-        # 🔥 LOG FAILED REQUEST WITH ZERO COST
-        try:
-            log_usage(
-                db=db,
-                api_key_id=api_key.id,
-                account_id=api_key.account.id,
-                model_id=model_id,
-                provider=provider,
-                input_tokens=0,
-                output_tokens=0,
-                total_cost=0.0
+        if not charged:
+            raise HTTPException(
+                status_code=402,
+                detail=f"Insufficient balance. Required: ${from_micros(total_cost)}, Available: ${api_key.account.balance:.6f}"
             )
-        except Exception:
-            pass  # logging must never break API
+    finally:
+        # Settled (or failed): the actual cost has replaced the hold
+        await reservations.release(api_key.account_id, reservation_id)
 
-        provider_name = provider.upper()
-        raise HTTPException(
-            status_code=402,
-            detail=f"{provider_name} error: {str(e)}"
-        )
+    if cache_key is not None:
+        await cache.put(cache_key, {
+            "model": served_model_id,
+            "answer": answer,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens
+        })
 
     # ============================
-    # 💰 PRICING CALCULATION (Dynamic)
+    # 📦 RESPONSE
     # ============================
-    
-    # Use Beaver AI prices from database (already includes markup)
-    try:
-        cost_result = pricing_engine.calculate_cost_for_request(
-            model_name=model_id,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens
+
+    return build_chat_response(served_model_id, answer, input_tokens, output_tokens)
+
+
+async def call_provider(provider: str, model_id: str, request: ChatRequest, client) -> Tuple[str, int, int]:
+    """Buffered completion from the provider → (answer, input_tokens, output_tokens)"""
+    # 🔹 OpenAI
+    if provider == "openai":
+        result = await call_openai(
+            model=model_id,
+            messages=request.messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            client=client
         )
-        total_cost = cost_result['beaver_ai_cost']['total_cost']
-    except Exception as e:
-        # Fallback to manual calculation if pricing engine fails
-        input_price = model_config.get("beaver_ai_input_price", model_config["base_input_price"])
-        output_price = model_config.get("beaver_ai_output_price", model_config["base_output_price"])
-        input_cost = (input_tokens / 1_000_000) * input_price
-        output_cost = (output_tokens / 1_000_000) * output_price
-        total_cost = round(input_cost + output_cost, 8)
 
-    # ============================
-    # 💳 DEDUCT BALANCE
-    # ============================
-    
-    account = api_key.account
-    
-    # Check if account has sufficient balance (with small buffer for rounding)
-    if account.balance < total_cost - 0.0001:
-        # Log failed request with zero cost
-        try:
-            log_usage(
-                db=db,
-                api_key_id=api_key.id,
-                account_id=account.id,
-                model_id=model_id,
-                provider=provider,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                total_cost=0.0
-            )
-        except Exception:
-            pass
-        
-        raise HTTPException(
-            status_code=402,
-            detail=f"Insufficient balance. Required: ${total_cost:.6f}, Available: ${account.balance:.6f}"
+        answer = result["choices"][0]["message"]["content"]
+        usage = result.get("usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+    # 🔹 Anthropic (Claude)
+    elif provider == "anthropic":
+        result = await call_anthropic(
+            model=model_id,
+            messages=request.messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            client=client
         )
-    
-    # Deduct balance
-    account.balance -= total_cost
-    
-    # Create transaction record
-    transaction = Transaction(
-        id=f"txn_{Account.generate_id()}",
-        account_id=account.id,
-        amount=-total_cost,
-        transaction_type="deduction",
-        description=f"API usage: {model_id} ({input_tokens} input + {output_tokens} output tokens)"
-    )
-    db.add(transaction)
 
-    # ============================
-    # 📊 LOG USAGE + COST
-    # ============================
+        answer = result["choices"][0]["message"]["content"]
+        usage = result.get("usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+    # 🔹 Google (Gemini)
+    elif provider == "google":
+        result = await call_google(
+            model=model_id,
+            messages=request.messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            client=client
+        )
+
+        answer = result["choices"][0]["message"]["content"]
+        usage = result.get("usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+    # 🔹 Deepseek
+    elif provider == "deepseek":
+        result = await call_deepseek(
+            model=model_id,
+            messages=request.messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            client=client
+        )
+
+        answer = result["choices"][0]["message"]["content"]
+        usage = result.get("usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+    # 🔹 Perplexity
+    elif provider == "perplexity":
+        result = await call_perplexity(
+            model=model_id,
+            messages=request.messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            client=client
+        )
+
+        answer = result["choices"][0]["message"]["content"]
+        usage = result.get("usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+    # 🔹 XAI (Grok)
+    elif provider == "xai":
+        result = await call_xai(
+            model=model_id,
+            messages=request.messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            client=client
+        )
+
+        answer = result["choices"][0]["message"]["content"]
+        usage = result.get("usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+    # 🔹 Other providers (fallback)
+    else:
+        user_message = request.messages[-1].content
+        answer = f"(mock {provider} response from {model_id}) You said: {user_message}"
+        input_tokens = 20
+        output_tokens = 30
+
+    return answer, input_tokens, output_tokens
+
+
+async def call_provider_tracked(
+    breaker: Optional[CircuitBreaker],
+    permit: Optional[int],
+    provider: str,
+    model_id: str,
+    request: ChatRequest,
+    client
+) -> Tuple[str, int, int]:
+    """
+    call_provider, reporting the outcome to the provider's circuit breaker
+    and the latency of successful calls to the model's latency tracker
+    (permit is what breaker.allow() returned for this call)
+    """
+    start = time.perf_counter()
+    try:
+        result = await call_provider(provider, model_id, request, client)
+    except ProviderError as e:
+        if e.config_error:
+            # Never reached the provider
+            raise
+        # Bad requests (4xx) say nothing about provider health
+        model_index.record(model_id, success=not e.retryable)
+        if breaker is not None:
+            breaker.record(permit, success=not e.retryable, latency=time.perf_counter() - start)
+        raise
+
+    latency = time.perf_counter() - start
+    latency_tracker.record(model_id, latency)
+    latency_metrics.record("provider", provider, latency)
+    latency_metrics.record("model", model_id, latency)
+    model_index.record(model_id, success=True, latency=latency)
+    if breaker is not None:
+        breaker.record(permit, success=True, latency=latency)
+    return result
+
+async def call_with_failover(
+    req: Request,
+    request: ChatRequest,
+    candidates: List[Tuple[str, dict]]
+) -> Tuple[str, dict, str, int, int]:
+    """
+    Try each candidate model in order, moving on when its circuit is open or
+    its provider fails retryably (unreachable, 5xx, 429). Messages go through
+    each provider's own conversion.
+    Returns (model_id, model_config, answer, input_tokens, output_tokens).
+    """
+    error = None
+
+    for candidate_id, candidate_config in candidates:
+        provider = candidate_config["provider"]
+
+        breaker = circuit_breakers.get(provider, candidate_id) if settings.CIRCUIT_BREAKER_ENABLED else None
+        permit = breaker.allow() if breaker is not None else None
+        if breaker is not None and permit is None:
+            error = CircuitOpenError(provider, breaker.retry_after())
+            continue
+        # A half-open breaker's probe is a single call: never hedge it
+        probing = breaker is not None and breaker.state != CLOSED
+
+        client = req.app.state.provider_clients.get(provider)
+
+        def upstream():
+            return call_provider_tracked(breaker, permit, provider, candidate_id, request, client)
+
+        try:
+            with request_phase("provider"):
+                if settings.HEDGING_ENABLED and not probing:
+                    # Second identical call if the first outlives this model's p95
+                    hedge_delay = latency_tracker.p95(candidate_id, min_samples=settings.HEDGE_MIN_SAMPLES)
+                    answer, input_tokens, output_tokens = await hedged_call(upstream, hedge_delay, hedge_budget)
+                else:
+                    answer, input_tokens, output_tokens = await upstream()
+        except ProviderError as e:
+            e.provider = provider
+            if not e.retryable:
+                raise
+            error = e
+            continue
+
+        set_request_attribute("beaver.served_model", candidate_id)
+        set_request_attribute("beaver.provider", provider)
+        return candidate_id, candidate_config, answer, input_tokens, output_tokens
 
+    raise error
+
+
+async def provider_failure(api_key, model_id: str, model_config: dict, error: ProviderError) -> HTTPException:
+    """Log a zero-cost usage row for a request no provider served, and build its error response"""
+    # 🔥 LOG FAILED REQUEST WITH ZERO COST
     try:
-        log_usage(
-            db=db,
+        await log_usage(
             api_key_id=api_key.id,
-            account_id=account.id,
+            account_id=api_key.account_id,
             model_id=model_id,
-            provider=provider,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            total_cost=total_cost
+            provider=model_config["provider"],
+            input_tokens=0,
+            output_tokens=0,
+            cost_micros=0
         )
-        db.commit()  # Commit balance deduction and transaction
     except Exception:
-        db.rollback()  # Rollback on error
-        pass  # never fail response due to logging
+        pass  # logging must never break API
 
-    # ============================
-    # 📦 RESPONSE
-    # ============================
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": str(error.retry_after)}
+        )
+
+    provider = error.provider or model_config["provider"]
+    return HTTPException(
+        status_code=402,
+        detail=f"{provider.upper()} error: {str(error)}"
+    )
 
+
+def build_chat_response(model_id: str, answer: str, input_tokens: int, output_tokens: int) -> ChatResponse:
     return ChatResponse(
         id=f"beaver-{uuid.uuid4()}",
         model=model_id,
@@ -296,3 +484,276 @@ async def chat(
             output_tokens=output_tokens
         )
     )
+
+
+async def stream_chat(
+    req: Request,
+    request: ChatRequest,
+    api_key,
+    candidates: List[Tuple[str, dict]],
+    reservation_id: str,
+    coalesce_key: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Relay the provider's stream to the client as Server-Sent Events.
+    Failover happens before the first chunk; after that the stream is
+    committed to one model. Billing runs when the stream ends, however it ends.
+    """
+    reservations = req.app.state.balance_reservations
+    error = None
+    chunks = None
+
+    for candidate_id, candidate_config in candidates:
+        provider = candidate_config["provider"]
+
+        breaker = circuit_breakers.get(provider, candidate_id) if settings.CIRCUIT_BREAKER_ENABLED else None
+        permit = breaker.allow() if breaker is not None else None
+        if breaker is not None and permit is None:
+            error = CircuitOpenError(provider, breaker.retry_after())
+            continue
+
+        stream_provider = STREAM_PROVIDERS.get(provider, stream_mock)
+
+        def open_stream():
+            return stream_provider(
+                model=candidate_id,
+                messages=request.messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                client=req.app.state.provider_clients.get(provider)
+            )
+
+        # Identical streams in flight share one upstream stream; each subscriber is billed
+        if coalesce_key:
+            chunks = single_flight.stream(f"{coalesce_key}:{candidate_id}", open_stream)
+        else:
+            chunks = open_stream()
+
+        # Wait for the first chunk so upstream errors can still fail over or get a 402
+        start = time.perf_counter()
+        try:
+            with request_phase("provider_ttfb"):
+                first_chunk = await anext(chunks, None)
+        except ProviderError as e:
+            if not e.config_error:
+                model_index.record(candidate_id, success=not e.retryable)
+                if breaker is not None:
+                    breaker.record(permit, success=not e.retryable, latency=time.perf_counter() - start)
+            e.provider = provider
+            error = e
+            chunks = None
+            if not e.retryable:
+                break
+            continue
+        except Exception:
+            await reservations.release(api_key.account_id, reservation_id)
+            raise
+
+        # Time to first chunk is what a stream's health is judged on; it is not
+        # comparable with buffered latency, so only the outcome reaches the index
+        ttfb = time.perf_counter() - start
+        model_index.record(candidate_id, success=True)
+        latency_metrics.record("stream_ttfb", provider, ttfb)
+        if breaker is not None:
+            breaker.record(permit, success=True, latency=ttfb)
+
+        model_id, model_config = candidate_id, candidate_config
+        set_request_attribute("beaver.served_model", model_id)
+        set_request_attribute("beaver.provider", provider)
+        break
+
+    if chunks is None:
+        await reservations.release(api_key.account_id, reservation_id)
+        raise await provider_failure(api_key, candidates[0][0], candidates[0][1], error)
+
+    stream_id = f"beaver-{uuid.uuid4()}"
+    prompt_chars = sum(len(message.content) for message in request.messages)
+
+    def event(data: dict) -> str:
+        return f"data: {json.dumps(data)}\n\n"
+
+    def token_counts(usage: dict, completion_chars: int) -> Tuple[int, int]:
+        # Provider-reported usage when the stream got that far, else an estimate
+        if usage:
+            return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        return (
+            math.ceil(prompt_chars / CHARS_PER_TOKEN_AVERAGE),
+            math.ceil(completion_chars / CHARS_PER_TOKEN_AVERAGE)
+        )
+
+    async def relay():
+        usage = {}
+        completion_chars = 0
+        chunk = first_chunk
+
+        try:
+            while chunk is not None:
+                usage = chunk.get("usage") or usage
+
+                for choice in chunk.get("choices") or []:
+                    content = (choice.get("delta") or {}).get("content")
+                    finish_reason = choice.get("finish_reason")
+                    if not content and not finish_reason:
+                        continue
+
+                    delta = {}
+                    if content:
+                        delta["content"] = content
+                        completion_chars += len(content)
+
+                    yield event({
+                        "id": stream_id,
+                        "object": "chat.completion.chunk",
+                        "model": model_id,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    })
+
+                chunk = await anext(chunks, None)
+
+            input_tokens, output_tokens = token_counts(usage, completion_chars)
+            yield event({
+                "id": stream_id,
+                "object": "chat.completion.chunk",
+                "model": model_id,
+                "choices": [],
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}
+            })
+            yield "data: [DONE]\n\n"
+
+        except ProviderError as e:
+            yield event({"error": {"message": f"{provider.upper()} error: {str(e)}"}})
+
+        except Exception:
+            # Headers are already sent: end the stream with an error event, not a broken connection
+            logger.exception("Stream relay failed for %s", model_id)
+            yield event({"error": {"message": "Stream failed"}})
+
+        finally:
+            # Also runs when the client disconnects; shielded so the charge lands
+            with anyio.CancelScope(shield=True):
+                await chunks.aclose()
+
+                input_tokens, output_tokens = token_counts(usage, completion_chars)
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await bill_request(
+                            db, api_key, model_id, provider, model_config, input_tokens, output_tokens,
+                            reservations=reservations
+                        )
+                finally:
+                    await reservations.release(api_key.account_id, reservation_id)
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def stream_mock(model, messages, temperature, max_tokens, client):
+    """Stream counterpart of the mock answer for providers without an integration"""
+    yield {
+        "choices": [{
+            "delta": {"content": f"(mock response from {model}) You said: {messages[-1].content}"},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 20, "completion_tokens": 30}
+    }
+
+
+async def bill_request(
+    db: AsyncSession,
+    api_key,
+    model_id: str,
+    provider: str,
+    model_config: dict,
+    input_tokens: int,
+    output_tokens: int,
+    rate_ppm: int = PPM,
+    reservations=None
+) -> Tuple[bool, int]:
+    """
+    Price a served request and charge it to the account.
+    rate_ppm (parts per million of the price) discounts requests served
+    from the response cache. The balance the charge leaves is passed to
+    reservations, the app's balance reservation backend.
+    Returns (charged, total cost in micro-dollars); charged is False if the
+    balance fell short or the charge failed, so the request is never served
+    unbilled by accident.
+    """
+    # ============================
+    # 💰 PRICING CALCULATION (Dynamic)
+    # ============================
+
+    # Use Beaver AI prices (already including markup) from the model catalog;
+    # without a loaded catalog, PricingEngine reads them through this session
+    try:
+        with request_phase("pricing"):
+            entry = model_catalog.get(model_id)
+            if entry is not None:
+                cost_result = cost_for_request(entry.pricing, input_tokens, output_tokens, rate_ppm)
+            else:
+                cost_result = await db.run_sync(
+                    lambda session: PricingEngine(session).calculate_cost_for_request(
+                        model_name=model_id,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        rate_ppm=rate_ppm
+                    )
+                )
+        total_cost = cost_result['beaver_ai_cost']['total_cost_micros']
+    except Exception as e:
+        # Fallback to the config's prices (base prices when Beaver AI prices are unset)
+        total_cost = calculate_request_cost(
+            input_tokens, output_tokens,
+            model_config["input_picos_per_token"], model_config["output_picos_per_token"],
+            rate_ppm
+        )
+
+    # ============================
+    # 💳 DEDUCT BALANCE + LOG USAGE
+    # ============================
+
+    # One conditional UPDATE decides sufficiency; ledger and usage rows commit with it
+    charged = False
+    charge_failed = False
+    try:
+        with request_phase("charge"):
+            new_balance = await charge_usage(
+                db,
+                api_key_id=api_key.id,
+                account_id=api_key.account_id,
+                model_id=model_id,
+                provider=provider,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cost_micros=total_cost
+            )
+        charged = new_balance is not None
+        if charged:
+            # Keep the key cached, with the balance the charge left
+            api_key_cache.update_balance(api_key.account_id, Decimal(str(new_balance)))
+            if reservations is not None:
+                await reservations.charged(api_key.account_id, to_micros_floor(new_balance))
+    except Exception:
+        # Never fail the response due to billing errors, but never lose them either
+        logger.exception("Charge failed for account %s (%s micro-dollars)", api_key.account_id, total_cost)
+        charge_failed = True
+
+    if not charged:
+        unbilled_usage.record(total_cost, error=charge_failed)
+        # Log failed request with zero cost
+        try:
+            await log_usage(
+                api_key_id=api_key.id,
+                account_id=api_key.account_id,
+                model_id=model_id,
+                provider=provider,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cost_micros=0
+            )
+        except Exception:
+            logger.exception("Usage log failed for unbilled request on account %s", api_key.account_id)
+
+    return charged, total_cost
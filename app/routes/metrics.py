@@ -0,0 +1,123 @@
+"""
+Prometheus metrics endpoint (text exposition format)
+"""
+from typing import Dict, List
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, circuit_breakers
+from app.core.hedging import hedge_budget
+from app.core.metrics import QUANTILES, latency_metrics
+from app.core.single_flight import single_flight
+from app.database.db import db_queries
+from app.usage.billing import unbilled_usage
+from app.usage.writer import usage_log_writer
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram kind → (metric name, label name)
+LATENCY_SERIES = {
+    "route": ("beaver_route_latency_seconds", "route"),
+    "provider": ("beaver_provider_latency_seconds", "provider"),
+    "model": ("beaver_model_latency_seconds", "model"),
+    "stream_ttfb": ("beaver_stream_ttfb_seconds", "provider"),
+}
+
+BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric(lines: List[str], name: str, kind: str, help_text: str, samples: Dict[str, float], label: str = None):
+    """Append one metric family; samples maps a label value (or "" without labels) to its value"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for label_value, value in samples.items():
+        labels = f'{{{label}="{_label(label_value)}"}}' if label else ""
+        lines.append(f"{name}{labels} {value}")
+
+
+def render_latency(lines: List[str]):
+    for kind, (name, label) in LATENCY_SERIES.items():
+        histograms = latency_metrics.histograms.get(kind)
+        if not histograms:
+            continue
+
+        lines.append(f"# HELP {name} Latency over the last minute (quantiles); count and sum since start")
+        lines.append(f"# TYPE {name} summary")
+        for label_value, histogram in sorted(histograms.items()):
+            counts, count, _ = histogram.window()
+            labels = f'{label}="{_label(label_value)}"'
+            for q in QUANTILES:
+                value = histogram.quantile(counts, count, q)
+                lines.append(f'{name}{{{labels},quantile="{q}"}} {value if value is not None else "NaN"}')
+            lines.append(f"{name}_count{{{labels}}} {histogram.total_count}")
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total_sum}")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """Latency histograms and gateway counters in Prometheus text format"""
+    state = request.app.state
+    lines: List[str] = []
+
+    render_latency(lines)
+
+    breakers = circuit_breakers.stats()
+    _metric(lines, "beaver_circuit_breaker_state", "gauge",
+            "Circuit state (0 closed, 1 half-open, 2 open)",
+            {key: BREAKER_STATES[s["state"]] for key, s in breakers.items()}, "breaker")
+    _metric(lines, "beaver_circuit_breaker_rejected_total", "counter",
+            "Calls rejected while the circuit was open",
+            {key: s["rejected"] for key, s in breakers.items()}, "breaker")
+
+    pools = state.provider_clients.stats()
+    _metric(lines, "beaver_provider_in_flight", "gauge", "Upstream requests in flight",
+            {p: s["in_flight"] for p, s in pools.items()}, "provider")
+    _metric(lines, "beaver_provider_waiting", "gauge", "Requests waiting for a connection",
+            {p: s["waiting"] for p, s in pools.items()}, "provider")
+    _metric(lines, "beaver_provider_requests_total", "counter", "Upstream requests sent",
+            {p: s["requests"] for p, s in pools.items()}, "provider")
+    _metric(lines, "beaver_provider_pool_timeouts_total", "counter", "Requests that timed out waiting for a connection",
+            {p: s["pool_timeouts"] for p, s in pools.items()}, "provider")
+
+    cache = state.response_cache
+    if cache is not None:
+        cache_stats = cache.stats()
+        _metric(lines, "beaver_response_cache_hits_total", "counter", "Response cache hits",
+                {"": cache_stats["hits"]})
+        _metric(lines, "beaver_response_cache_misses_total", "counter", "Response cache misses",
+                {"": cache_stats["misses"]})
+        _metric(lines, "beaver_response_cache_bytes_saved_total", "counter", "Response bytes served from cache",
+                {"": cache_stats["bytes_saved"]})
+
+    flights = single_flight.stats()
+    _metric(lines, "beaver_single_flight_followers_total", "counter", "Requests that joined an identical call in flight",
+            {"": flights["followers"]})
+
+    hedges = hedge_budget.stats()
+    _metric(lines, "beaver_hedges_sent_total", "counter", "Hedged upstream calls sent", {"": hedges["hedges_sent"]})
+    _metric(lines, "beaver_hedges_won_total", "counter", "Hedged calls that answered first", {"": hedges["hedges_won"]})
+
+    _metric(lines, "beaver_db_queries_total", "counter", "SQL statements executed by the gateway",
+            {"": db_queries.count})
+
+    _metric(lines, "beaver_unbilled_requests_total", "counter", "Completed requests that were not charged",
+            {"declined": unbilled_usage.declined, "error": unbilled_usage.errors}, "reason")
+    _metric(lines, "beaver_unbilled_micros_total", "counter", "Cost of uncharged requests, in micro-dollars",
+            {"": unbilled_usage.micros})
+
+    writer = usage_log_writer.stats()
+    _metric(lines, "beaver_usage_log_queue_depth", "gauge", "Usage log rows waiting to be written",
+            {"": writer["queue_depth"]})
+    _metric(lines, "beaver_usage_log_rows_written_total", "counter", "Usage log rows written",
+            {"": writer["rows_written"]})
+    _metric(lines, "beaver_usage_log_rows_dropped_total", "counter", "Usage log rows lost to a cancelled writer",
+            {"": writer["rows_dropped"]})
+
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
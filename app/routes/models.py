@@ -1,46 +1,152 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.db import SessionLocal
+"""
+Model listing
+
+The response body is built once per catalog snapshot and kept as bytes,
+together with its gzip encoding and a strong ETag per encoding (a hash
+of the body, so every worker derives the same tags; the gzip tag has a
+-gzip suffix, as strong validators can't be shared across
+content-codings). Requests then cost a header comparison: If-None-Match
+gets a 304, everything else gets the stored bytes, with Cache-Control
+so browsers and CDNs can reuse them.
+"""
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Request, Response
+from sqlalchemy import select
+
+from app.config import settings
+from app.database.db import AsyncSessionLocal
 from app.database.models import Model
+from app.models.catalog import CatalogSnapshot, model_catalog, model_config
 
 router = APIRouter(prefix="/v1")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@dataclass(frozen=True)
+class SerializedModels:
+    snapshot: Optional[CatalogSnapshot]
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
 
 
-@router.get("/models")
-async def list_models(db: Session = Depends(get_db)):
-    """List all available models with dynamic pricing"""
-    models = db.query(Model).filter(Model.status == 'active').all()
-    
+_serialized: Optional[SerializedModels] = None
+
+
+def model_listing(configs: Dict[str, dict]) -> Dict:
     model_list = []
-    for model in models:
-        # Use Beaver AI prices if available, otherwise base prices
-        input_price = model.beaver_ai_input_price if model.beaver_ai_input_price else model.base_input_price
-        output_price = model.beaver_ai_output_price if model.beaver_ai_output_price else model.base_output_price
-        
+    for name, config in configs.items():
         model_list.append({
-            "id": model.name,
-            "display_name": model.display_name,
-            "provider": model.provider,
-            "category": model.category or "PREMIUM",
+            "id": name,
+            "display_name": config["display_name"],
+            "provider": config["provider"],
+            "category": config["category"],
             "pricing": {
-                "base_input_price_per_1m": float(model.base_input_price),
-                "base_output_price_per_1m": float(model.base_output_price),
-                "beaver_ai_input_price_per_1m": float(input_price),
-                "beaver_ai_output_price_per_1m": float(output_price),
-                "markup_percent": float(model.markup_percent) if model.markup_percent else None
+                "base_input_price_per_1m": config["base_input_price"],
+                "base_output_price_per_1m": config["base_output_price"],
+                # Beaver AI prices when calculated, otherwise base prices
+                "beaver_ai_input_price_per_1m": config["beaver_ai_input_price"],
+                "beaver_ai_output_price_per_1m": config["beaver_ai_output_price"],
+                "markup_percent": config["markup_percent"]
             }
         })
-    
+
     return {
         "models": model_list,
         "total": len(model_list)
     }
 
+
+def serialize(listing: Dict, snapshot: Optional[CatalogSnapshot] = None) -> SerializedModels:
+    body = json.dumps(listing, separators=(",", ":")).encode()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return SerializedModels(
+        snapshot=snapshot,
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+        etag=f'"{digest}"',
+        gzip_etag=f'"{digest}-gzip"'
+    )
+
+
+async def serialized_models() -> SerializedModels:
+    """The listing for the current catalog snapshot, serialized on first use"""
+    global _serialized
+
+    snapshot = model_catalog.snapshot
+    if snapshot is None:
+        # No catalog loaded (outside the app lifespan): build from the database
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Model).where(Model.status == 'active'))
+            return serialize(model_listing({model.name: model_config(model) for model in result.scalars()}))
+
+    cached = _serialized
+    if cached is None or cached.snapshot is not snapshot:
+        listing = model_listing({name: entry.config for name, entry in snapshot.models.items()})
+        cached = _serialized = serialize(listing, snapshot)
+    return cached
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    tags: List[str] = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether Accept-Encoding allows gzip: listed (or matched by *) with q > 0"""
+    qualities: Dict[str, float] = {}
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+
+    for name in ("gzip", "x-gzip", "*"):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+@router.get("/models")
+async def list_models(request: Request):
+    """List all available models with dynamic pricing"""
+    serialized = await serialized_models()
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    etag = serialized.gzip_etag if use_gzip else serialized.etag
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.MODELS_CACHE_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={settings.MODELS_CACHE_STALE_SECONDS}"
+        ),
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(serialized.gzip_body, media_type="application/json", headers=headers)
+
+    return Response(serialized.body, media_type="application/json", headers=headers)
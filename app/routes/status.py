@@ -1,10 +1,21 @@
 """
 Status and health endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from datetime import datetime, timedelta
 import time
 
+from app.core.api_key_cache import api_key_cache
+from app.core.single_flight import single_flight
+from app.core.circuit_breaker import circuit_breakers
+from app.core.hedging import hedge_budget
+from app.core.metrics import LATENCY_WINDOW_SECONDS, latency_metrics
+from app.core.model_router import model_index
+from app.core.pricing_engine import incremental_pricing
+from app.core.request_timing import span_exporter
+from app.models.catalog import model_catalog
+from app.usage.writer import usage_log_writer
+
 router = APIRouter(prefix="/status")
 
 # Track server start time for uptime calculation
@@ -32,13 +43,71 @@ async def get_uptime():
 
 @router.get("/latency")
 async def get_latency():
-    """Get average API latency"""
-    # This is a placeholder - in production, you'd track actual request latencies
+    """Get p50/p95/p99 latency over the last minute per route, provider and model"""
     return {
-        "average_latency_ms": 50,
-        "p50_latency_ms": 45,
-        "p95_latency_ms": 120,
-        "p99_latency_ms": 200,
-        "note": "Placeholder values - implement actual latency tracking"
+        "window_seconds": LATENCY_WINDOW_SECONDS,
+        **latency_metrics.summary()
     }
 
+
+@router.get("/auth-cache")
+async def get_auth_cache_stats():
+    """Get API key cache size and hit/miss counters"""
+    return api_key_cache.stats()
+
+
+@router.get("/usage-log")
+async def get_usage_log_writer_stats():
+    """Get write-behind usage log queue depth and flush latency"""
+    return usage_log_writer.stats()
+
+
+@router.get("/providers")
+async def get_provider_pool_stats(request: Request):
+    """Get per-provider connection pool occupancy and wait time"""
+    return request.app.state.provider_clients.stats()
+
+
+@router.get("/response-cache")
+async def get_response_cache_stats(request: Request):
+    """Get response cache hit ratio and bytes saved"""
+    cache = request.app.state.response_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/single-flight")
+async def get_single_flight_stats():
+    """Get counts of coalesced upstream calls"""
+    return single_flight.stats()
+
+
+@router.get("/breakers")
+async def get_circuit_breakers():
+    """Get circuit breaker state per provider (or provider:model)"""
+    return circuit_breakers.stats()
+
+
+@router.get("/hedging")
+async def get_hedging_stats():
+    """Get hedged request counts and remaining hedge budget"""
+    return hedge_budget.stats()
+
+
+@router.get("/router")
+async def get_router_stats():
+    """Get per-model latency/error EWMAs used to resolve virtual models"""
+    return model_index.stats()
+
+
+@router.get("/tracing")
+async def get_tracing_stats():
+    """Get trace sampling rate and exported span counts"""
+    return span_exporter.stats()
+
+
+@router.get("/catalog")
+async def get_catalog_stats():
+    """Get the loaded model catalog version and reload counts"""
+    return {**model_catalog.stats(), "incremental_pricing": incremental_pricing.stats()}
@@ -2,24 +2,17 @@
 User management endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from app.database.db import SessionLocal
 from app.database.models import APIKey, Account
-from app.auth.dependencies import get_current_user_flexible
+from app.auth.dependencies import get_db, get_current_user_flexible
 from app.database.models import Account
+from app.core.api_key_cache import api_key_cache
 
 router = APIRouter(prefix="/users")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class UpdateUserRequest(BaseModel):
     email: str = None
     # Add more fields as needed
@@ -28,7 +21,7 @@ class UpdateUserRequest(BaseModel):
 @router.get("/me")
 async def get_current_user(
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user info
@@ -37,9 +30,12 @@ async def get_current_user(
     """
     
     # Get all API keys for this account
-    api_keys = db.query(APIKey).filter(
-        APIKey.account_id == account.id
-    ).all()
+    result = await db.execute(
+        select(APIKey).where(
+            APIKey.account_id == account.id
+        )
+    )
+    api_keys = result.scalars().all()
     
     return {
         "id": account.id,
@@ -62,7 +58,7 @@ async def get_current_user(
 async def update_current_user(
     request: UpdateUserRequest,
     account: Account = Depends(get_current_user_flexible),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update current user settings
@@ -72,18 +68,24 @@ async def update_current_user(
     # Update email if provided
     if request.email and request.email != account.email:
         # Check if email is already taken
-        existing = db.query(Account).filter(
-            Account.email == request.email,
-            Account.id != account.id
-        ).first()
+        result = await db.execute(
+            select(Account).where(
+                Account.email == request.email,
+                Account.id != account.id
+            )
+        )
+        existing = result.scalars().first()
         
         if existing:
             raise HTTPException(status_code=400, detail="Email already in use")
         
         account.email = request.email
     
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    await db.refresh(account)
+    
+    # Cached key snapshots carry the old email
+    api_key_cache.invalidate_account(account.id)
     
     return {
         "id": account.id,
@@ -5,8 +5,14 @@ class Message(BaseModel):
     role: Literal["system", "user", "assistant"]
     content: str
 
+class Routing(BaseModel):
+    """Constraints for virtual models (auto:fastest, auto:cheapest)"""
+    providers: Optional[List[str]] = None  # Allow-list, e.g. ["openai", "google"]
+    max_category: Optional[Literal["ULTRA_BUDGET", "BUDGET", "MID_RANGE", "PREMIUM", "ULTRA_PREMIUM"]] = None
+
 class ChatRequest(BaseModel):
     messages: List[Message]
     temperature: Optional[float] = 0.7
     max_tokens: Optional[int] = 512
     stream: Optional[bool] = False
+    routing: Optional[Routing] = None
@@ -0,0 +1,144 @@
+"""
+Atomic charging for completed requests.
+
+The balance is debited with a conditional UPDATE ... WHERE balance >= cost
+RETURNING balance, so the database arbitrates concurrent requests on one
+account: no row is read into Python, no lock is taken in the app, and an
+overdraft simply updates zero rows. The Transaction and UsageLog rows are
+written in the same transaction, and each charge commits exactly once.
+
+On PostgreSQL all three writes are one statement (data-modifying CTEs),
+i.e. a single round trip. Other databases run the UPDATE ... RETURNING and
+the two INSERTs back to back inside one transaction.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Numeric, bindparam, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import is_postgresql
+from app.database.models import Account, Transaction, UsageLog
+from app.pricing.engine import from_micros
+
+CHARGE_CTE = text("""
+    WITH debit AS (
+        UPDATE accounts
+        SET balance = balance - :cost, updated_at = :now
+        WHERE id = :account_id AND balance >= :cost
+        RETURNING id, balance
+    ),
+    ledger AS (
+        INSERT INTO transactions (id, account_id, amount, transaction_type, description, created_at)
+        SELECT :transaction_id, id, -:cost, 'deduction', :description, :now
+        FROM debit
+    ),
+    usage AS (
+        INSERT INTO usage_logs (id, api_key_id, account_id, model_id, provider,
+                                input_tokens, output_tokens, total_cost, created_at)
+        SELECT :usage_log_id, :api_key_id, id, :model_id, :provider,
+               :input_tokens, :output_tokens, :cost, :now
+        FROM debit
+    )
+    SELECT balance FROM debit
+""").bindparams(bindparam("cost", type_=Numeric(20, 10)))
+
+
+class UnbilledUsage:
+    """Completed requests that were not charged (reported at /metrics)"""
+
+    def __init__(self):
+        self.declined = 0  # insufficient balance
+        self.errors = 0  # the charge itself failed
+        self.micros = 0  # cost of both, never collected
+
+    def record(self, cost_micros: int, error: bool):
+        if error:
+            self.errors += 1
+        else:
+            self.declined += 1
+        self.micros += cost_micros
+
+
+unbilled_usage = UnbilledUsage()
+
+
+async def charge_usage(
+    db: AsyncSession,
+    api_key_id: str,
+    account_id: str,
+    model_id: str,
+    provider: str,
+    input_tokens: int,
+    output_tokens: int,
+    cost_micros: int
+) -> Optional[Decimal]:
+    """
+    Deduct cost_micros (micro-dollars) and record the transaction and usage log.
+    Returns the new balance, or None if the balance was insufficient.
+    """
+    # Exact at the columns' six decimals
+    cost = from_micros(cost_micros)
+    now = datetime.utcnow()
+    transaction_id = f"txn_{Account.generate_id()}"
+    usage_log_id = str(uuid.uuid4())
+    description = f"API usage: {model_id} ({input_tokens} input + {output_tokens} output tokens)"
+
+    try:
+        if is_postgresql():
+            result = await db.execute(CHARGE_CTE, {
+                "cost": cost,
+                "now": now,
+                "account_id": account_id,
+                "transaction_id": transaction_id,
+                "description": description,
+                "usage_log_id": usage_log_id,
+                "api_key_id": api_key_id,
+                "model_id": model_id,
+                "provider": provider,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+            })
+            balance = result.scalar_one_or_none()
+        else:
+            result = await db.execute(
+                update(Account)
+                .where(Account.id == account_id, Account.balance >= cost)
+                .values(balance=Account.balance - cost, updated_at=now)
+                .returning(Account.balance)
+                .execution_options(synchronize_session=False)
+            )
+            balance = result.scalar_one_or_none()
+
+            if balance is not None:
+                await db.execute(insert(Transaction).values(
+                    id=transaction_id,
+                    account_id=account_id,
+                    amount=-cost,
+                    transaction_type="deduction",
+                    description=description,
+                    created_at=now
+                ))
+                await db.execute(insert(UsageLog).values(
+                    id=usage_log_id,
+                    api_key_id=api_key_id,
+                    account_id=account_id,
+                    model_id=model_id,
+                    provider=provider,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    total_cost=cost,
+                    created_at=now
+                ))
+
+        if balance is None:
+            await db.rollback()
+            return None
+
+        await db.commit()
+        return balance
+    except Exception:
+        await db.rollback()
+        raise
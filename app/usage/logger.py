@@ -1,29 +1,28 @@
 import uuid
-from sqlalchemy.orm import Session
+from datetime import datetime
 
-from app.database.models import UsageLog
+from app.pricing.engine import from_micros
+from app.usage.writer import usage_log_writer
 
 
-def log_usage(
-    db: Session,
+async def log_usage(
     api_key_id: str,
     account_id: str,
     model_id: str,
     provider: str,
     input_tokens: int,
     output_tokens: int,
-    total_cost: float
+    cost_micros: int
 ):
-    usage = UsageLog(
-        id=str(uuid.uuid4()),
-        api_key_id=api_key_id,
-        account_id=account_id,
-        model_id=model_id,
-        provider=provider,
-        input_tokens=input_tokens,
-        output_tokens=output_tokens,
-        total_cost=total_cost
-    )
-
-    db.add(usage)
-    db.commit()
+    """Queue a usage log row; the write-behind writer persists it in batches"""
+    await usage_log_writer.enqueue({
+        "id": str(uuid.uuid4()),
+        "api_key_id": api_key_id,
+        "account_id": account_id,
+        "model_id": model_id,
+        "provider": provider,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_cost": from_micros(cost_micros),
+        "created_at": datetime.utcnow(),
+    })
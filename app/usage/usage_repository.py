@@ -1,20 +1,22 @@
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
 from datetime import datetime
 
-def get_monthly_usage(engine: Engine):
+async def get_monthly_usage(engine: AsyncEngine):
+    """Request counts per API key id for the current month"""
     now = datetime.utcnow()
     month_start = datetime(now.year, now.month, 1)
 
     query = text("""
-        SELECT 
-            api_key,
+        SELECT
+            api_key_id,
             COUNT(*) AS request_count
         FROM usage_logs
         WHERE created_at >= :month_start
-        GROUP BY api_key
+          AND api_key_id IS NOT NULL
+        GROUP BY api_key_id
     """)
 
-    with engine.connect() as conn:
-        result = conn.execute(query, {"month_start": month_start})
-        return {row.api_key: row.request_count for row in result}
+    async with engine.connect() as conn:
+        result = await conn.execute(query, {"month_start": month_start})
+        return {row.api_key_id: row.request_count for row in result}
@@ -0,0 +1,212 @@
+"""
+Write-behind pipeline for usage logs.
+
+log_usage() puts rows on a bounded asyncio queue instead of committing
+one UsageLog per call. A background task started in lifespan drains the
+queue and writes a batch every USAGE_LOG_FLUSH_INTERVAL_MS or as soon as
+USAGE_LOG_BATCH_SIZE rows are waiting: COPY on PostgreSQL, a batched
+INSERT elsewhere. When the queue is full, producers wait (backpressure)
+rather than growing memory. Shutdown flushes everything still queued;
+rows lost because the writer was cancelled instead are counted as dropped.
+
+Batches fill with get_nowait() and wait on an event for the next put,
+never on queue.get() under a timeout, so a timeout cannot lose a row.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.database.db import async_engine, is_postgresql
+from app.database.models import UsageLog
+
+logger = logging.getLogger(__name__)
+
+USAGE_LOG_COLUMNS = [
+    "id",
+    "api_key_id",
+    "account_id",
+    "model_id",
+    "provider",
+    "input_tokens",
+    "output_tokens",
+    "total_cost",
+    "created_at",
+]
+
+
+class UsageLogWriter:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        flush_interval_ms: int,
+        batch_size: int,
+        max_queue_size: int
+    ):
+        self.engine = engine
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.has_rows: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.has_rows = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Flush every queued row, then stop the background task"""
+        if not self.running:
+            return
+
+        # The sentinel queues behind all pending rows
+        await self.queue.put(None)
+        self.has_rows.set()
+        await self.task
+        self.task = None
+
+        # Rows queued behind the sentinel by requests still finishing
+        leftover = self._drain()
+        if leftover:
+            await self.flush(leftover)
+
+    async def enqueue(self, row: Dict):
+        if not self.running:
+            # Not started (scripts, tests): write straight through
+            await self.flush([row])
+            return
+
+        await self.queue.put(row)
+        self.has_rows.set()
+
+    async def run(self):
+        batch: List[Dict] = []
+
+        try:
+            while True:
+                row = await self.queue.get()
+                if row is None:
+                    return
+
+                batch = [row]
+                stopping = await self._fill(batch)
+                await self.flush(batch)
+                batch = []
+
+                if stopping:
+                    return
+        except asyncio.CancelledError:
+            # Cancelled rather than stopped: nothing in hand or queued gets written
+            self.rows_dropped += len(batch) + len(self._drain())
+            raise
+
+    async def _fill(self, batch: List[Dict]) -> bool:
+        """
+        Add queued rows until the batch is full or the flush interval is up.
+        Returns True if the stop sentinel was reached.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            try:
+                row = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    return False
+                # Wait for the next put, not for the row itself
+                self.has_rows.clear()
+                try:
+                    await asyncio.wait_for(self.has_rows.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return False
+                continue
+
+            if row is None:
+                return True
+            batch.append(row)
+
+        return False
+
+    def _drain(self) -> List[Dict]:
+        """Take every row still queued, without waiting"""
+        rows = []
+        while not self.queue.empty():
+            row = self.queue.get_nowait()
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    async def flush(self, rows: List[Dict]):
+        start = time.perf_counter()
+
+        try:
+            if is_postgresql():
+                await self._copy(rows)
+            else:
+                async with self.engine.begin() as conn:
+                    await conn.execute(insert(UsageLog), rows)
+            self.rows_written += len(rows)
+        except Exception:
+            # Usage logging must never break the API
+            self.rows_failed += len(rows)
+            logger.exception("Failed to write %d usage log rows", len(rows))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+    async def _copy(self, rows: List[Dict]):
+        """Bulk-load rows with asyncpg's COPY support"""
+        records = [tuple(row[column] for column in USAGE_LOG_COLUMNS) for row in rows]
+
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                UsageLog.__tablename__,
+                records=records,
+                columns=USAGE_LOG_COLUMNS
+            )
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "rows_dropped": self.rows_dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+
+usage_log_writer = UsageLogWriter(
+    engine=async_engine,
+    flush_interval_ms=settings.USAGE_LOG_FLUSH_INTERVAL_MS,
+    batch_size=settings.USAGE_LOG_BATCH_SIZE,
+    max_queue_size=settings.USAGE_LOG_QUEUE_MAX_SIZE,
+)
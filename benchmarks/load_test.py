@@ -0,0 +1,248 @@
+"""
+End-to-end load benchmark for POST /v1/models/{model_id}/chat
+
+Drives a running gateway at several concurrency levels and reports
+requests/s, p50/p99 latency, gateway overhead per request (total time
+minus upstream time, from the Server-Timing header) and DB queries per
+request (from beaver_db_queries_total at /metrics).
+
+With --spawn it starts the mock providers (benchmarks/mock_providers.py)
+and a gateway wired to them, so no real provider is paid. The gateway
+uses the configured DATABASE_URL, which must already hold the models
+(init_db.py + populate_models.py). Accounts and API keys for the run
+are created through the admin API.
+
+Usage:
+    python -m benchmarks.load_test --spawn [--concurrency 1 10 50 100]
+        [--requests 500] [--model gpt-4o-mini] [--latency-ms 200] [--json out.json]
+    python -m benchmarks.load_test --base-url http://localhost:8000 ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_providers import base_urls
+
+# The "pro" plan allows 600 requests/min per key; spread load so it never trips
+DEFAULT_KEYS = 100
+UPSTREAM_PHASES = ("provider", "provider_ttfb")
+
+
+def server_timing(header: Optional[str]) -> Dict[str, float]:
+    phases = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                phases[name] = phases.get(name, 0.0) + float(value)
+    return phases
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def db_query_count(client: httpx.AsyncClient) -> Optional[int]:
+    response = await client.get("/metrics")
+    for line in response.text.splitlines():
+        if line.startswith("beaver_db_queries_total "):
+            return int(float(line.split()[1]))
+    return None
+
+
+async def create_keys(client: httpx.AsyncClient, count: int) -> List[str]:
+    run = uuid.uuid4().hex[:8]
+    keys = []
+    for i in range(count):
+        account = await client.post("/admin/accounts", json={
+            "email": f"loadtest-{run}-{i}@example.com",
+            "initial_balance": 1000.0
+        })
+        account.raise_for_status()
+        key = await client.post("/admin/api-keys", json={
+            "account_id": account.json()["account_id"],
+            "name": f"loadtest-{run}"
+        })
+        key.raise_for_status()
+        keys.append(key.json()["api_key"])
+    return keys
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    keys: List[str],
+    model: str,
+    concurrency: int,
+    requests: int,
+    stream: bool
+) -> Dict:
+    latencies: List[float] = []
+    overheads: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            body = {
+                "messages": [{"role": "user", "content": f"Benchmark request {i}: summarize the gateway."}],
+                "max_tokens": 256,
+                "stream": stream
+            }
+            headers = {"Authorization": f"Bearer {keys[i % len(keys)]}", "X-Beaver-Cache": "bypass"}
+            start = time.perf_counter()
+            try:
+                async with client.stream("POST", f"/v1/models/{model}/chat", json=body, headers=headers) as response:
+                    await response.aread()
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if response.status_code != 200:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+
+            latencies.append(elapsed)
+            phases = server_timing(response.headers.get("server-timing"))
+            if "total" in phases and not stream:
+                overheads.append(phases["total"] - sum(phases.get(p, 0.0) for p in UPSTREAM_PHASES))
+            elif phases:
+                # Streams send headers before billing; count what is known by then
+                overheads.append(sum(v for k, v in phases.items() if k not in UPSTREAM_PHASES + ("total",)))
+
+    queries_before = await db_query_count(client)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    # Let batched usage-log writes land so they are counted for this level
+    await asyncio.sleep(0.5)
+    queries_after = await db_query_count(client)
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "overhead_p50_ms": round(percentile(overheads, 0.50), 2),
+        "overhead_p99_ms": round(percentile(overheads, 0.99), 2),
+        "db_queries_per_request": (
+            round((queries_after - queries_before) / requests, 2)
+            if queries_before is not None and queries_after is not None else None
+        ),
+    }
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    mock = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.mock_providers",
+        "--port", str(args.mock_port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--input-tokens", str(args.input_tokens),
+        "--output-tokens", str(args.output_tokens),
+    ])
+
+    env = {
+        **os.environ,
+        **base_urls(mock_url),
+        "OPENAI_API_KEY": "mock", "ANTHROPIC_API_KEY": "mock", "GOOGLE_API_KEY": "mock",
+        "DEEPSEEK_API_KEY": "mock", "PERPLEXITY_API_KEY": "mock", "XAI_API_KEY": "mock",
+    }
+    gateway = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--port", str(args.gateway_port), "--log-level", "warning", "--no-access-log"],
+        env=env
+    )
+    return [mock, gateway]
+
+
+async def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+async def main(args):
+    base_url = f"http://127.0.0.1:{args.gateway_port}" if args.spawn else args.base_url
+    processes = spawn(args) if args.spawn else []
+
+    try:
+        if args.spawn:
+            await wait_until_up(f"http://127.0.0.1:{args.mock_port}/docs")
+            await wait_until_up(f"{base_url}/health")
+
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+            keys = await create_keys(client, args.keys)
+
+            # Warm up connection pools, caches and the model index
+            await run_level(client, keys, args.model, min(10, max(args.concurrency)), 20, args.stream)
+
+            results = [
+                await run_level(client, keys, args.model, concurrency, args.requests, args.stream)
+                for concurrency in args.concurrency
+            ]
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    mode = "stream" if args.stream else "buffered"
+    print(f"📊 Load test: {args.model} ({mode}), {args.requests} requests per level")
+    print(
+        f"{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'ovh p50':>10}{'ovh p99':>10}{'db q/req':>10}  errors"
+    )
+    for r in results:
+        print(
+            f"{r['concurrency']:>6}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+            f"{r['overhead_p50_ms']:>10.2f}{r['overhead_p99_ms']:>10.2f}"
+            f"{r['db_queries_per_request'] if r['db_queries_per_request'] is not None else '-':>10}  "
+            f"{r['errors'] or ''}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": args.model, "mode": mode, "results": results}, f, indent=2)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--spawn", action="store_true", help="start mock providers and a gateway")
+    parser.add_argument("--gateway-port", type=int, default=8100)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--keys", type=int, default=DEFAULT_KEYS)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--input-tokens", type=int, default=50)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,262 @@
+"""
+Microbenchmarks for the gateway's per-request hot paths
+
+Times, per call:
+- RateLimiter.is_allowed and UsageTracker.increment across 100k API keys
+- the API key lookup behind GatewayMiddleware (get_api_key_snapshot),
+  cached and uncached
+- get_model and cost_for_request over 1k models, served from the loaded
+  in-memory model catalog as in chat()
+- the message conversion done by call_anthropic and call_google
+
+Runs against a throwaway SQLite database seeded at the given scale, so
+results compare across commits, not against production. Results are
+saved as JSON (with the git commit); --compare prints the change
+against an earlier file and exits non-zero on regressions.
+
+Usage:
+    python -m benchmarks.microbench [--keys 100000] [--models 1000]
+        [--iterations 20000] [--output microbench.json]
+        [--compare old.json] [--threshold 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# Point the app at a throwaway database before it is imported
+_workdir = tempfile.mkdtemp(prefix="beaver-microbench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/microbench.db"
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.auth.api_key import get_api_key_snapshot  # noqa: E402
+from app.core.api_key_cache import APIKeySnapshot, api_key_cache  # noqa: E402
+from app.core.pricing_engine import cost_for_request  # noqa: E402
+from app.core.rate_limiter import RateLimiter  # noqa: E402
+from app.core.usage_tracker import UsageTracker  # noqa: E402
+from app.database.db import AsyncSessionLocal, Base, SessionLocal, engine  # noqa: E402
+from app.database.models import Account, APIKey, Model  # noqa: E402
+from app.models.catalog import model_catalog  # noqa: E402
+from app.models.registry import get_model  # noqa: E402
+from app.providers.anthropic_provider import _build_payload as anthropic_payload  # noqa: E402
+from app.providers.google_provider import _build_payload as google_payload  # noqa: E402
+from app.schemas.chat_request import Message  # noqa: E402
+
+PROVIDERS = ["openai", "anthropic", "google", "deepseek", "perplexity", "xai"]
+
+
+def seed(keys: int, models: int):
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(insert(Model), [
+            {
+                "id": f"model_{i}",
+                "name": f"bench-model-{i}",
+                "display_name": f"Bench Model {i}",
+                "provider": PROVIDERS[i % len(PROVIDERS)],
+                "status": "active",
+                "base_input_price": 0.1 + i % 50,
+                "base_output_price": 0.3 + i % 70,
+                "category": "MID_RANGE",
+                "markup_percent": 15.0,
+                "beaver_ai_input_price": (0.1 + i % 50) * 1.15,
+                "beaver_ai_output_price": (0.3 + i % 70) * 1.15,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(models)
+        ])
+        conn.execute(insert(Account), [
+            {
+                "id": f"acc_{i}",
+                "email": f"bench{i}@example.com",
+                "email_verified": False,
+                "balance": 100,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(keys)
+        ])
+        conn.execute(insert(APIKey), [
+            {
+                "id": f"key_{i}",
+                "key": f"beaver_bench{i:08d}",
+                "name": "bench",
+                "account_id": f"acc_{i}",
+                "is_active": True,
+                "created_at": now,
+            }
+            for i in range(keys)
+        ])
+
+
+def summarize(samples_ns: List[int]) -> Dict:
+    ordered = sorted(samples_ns)
+    mean = sum(ordered) / len(ordered)
+    return {
+        "calls": len(ordered),
+        "mean_us": round(mean / 1000, 3),
+        "p50_us": round(ordered[len(ordered) // 2] / 1000, 3),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000, 3),
+        "ops_per_sec": round(1e9 / mean, 1),
+    }
+
+
+def bench_sync(call: Callable[[int], object], iterations: int) -> Dict:
+    samples = []
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        start = clock()
+        call(i)
+        samples.append(clock() - start)
+    return summarize(samples)
+
+
+async def bench_async(call: Callable[[int], object], iterations: int) -> Dict:
+    samples = []
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        start = clock()
+        await call(i)
+        samples.append(clock() - start)
+    return summarize(samples)
+
+
+def conversation(turns: int = 10) -> List[Message]:
+    messages = [Message(role="system", content="You are a concise assistant. " * 10)]
+    for i in range(turns):
+        messages.append(Message(role="user", content=f"Question {i}: " + "lorem ipsum " * 40))
+        messages.append(Message(role="assistant", content=f"Answer {i}: " + "dolor sit amet " * 30))
+    return messages
+
+
+async def run(keys: int, models: int, iterations: int) -> Dict[str, Dict]:
+    rng = random.Random(42)
+    key_ids = [rng.randrange(keys) for _ in range(iterations)]
+    model_ids = [rng.randrange(models) for _ in range(iterations)]
+    results = {}
+
+    # Limiters pre-filled so every key has state, as in a warm process
+    limiter, tracker = RateLimiter(), UsageTracker()
+    for i in range(keys):
+        limiter.is_allowed(api_key=f"key_{i}", plan="pro")
+        tracker.increment(api_key=f"key_{i}", plan="pro")
+    results["rate_limiter.is_allowed"] = bench_sync(
+        lambda i: limiter.is_allowed(api_key=f"key_{key_ids[i]}", plan="pro"), iterations
+    )
+    results["usage_tracker.increment"] = bench_sync(
+        lambda i: tracker.increment(api_key=f"key_{key_ids[i]}", plan="pro"), iterations
+    )
+
+    # API key lookup: DB (cache cleared), then cached
+    api_key_cache.clear()
+    db_iterations = min(iterations, 2000)
+    results["api_key_lookup.uncached"] = await bench_async(
+        lambda i: get_api_key_snapshot(f"beaver_bench{key_ids[i]:08d}"), db_iterations
+    )
+    # Warmed in one query; one lookup per key would outlast the cache TTL at 100k keys
+    with SessionLocal() as session:
+        for api_key in session.query(APIKey).options(joinedload(APIKey.account)):
+            api_key_cache.put(APIKeySnapshot.from_model(api_key))
+    results["api_key_lookup.cached"] = await bench_async(
+        lambda i: get_api_key_snapshot(f"beaver_bench{key_ids[i]:08d}"), iterations
+    )
+
+    # Model lookup and pricing read the catalog, as chat() does once the app has started
+    await model_catalog.load(AsyncSessionLocal)
+    results["get_model"] = await bench_async(
+        lambda i: get_model(f"bench-model-{model_ids[i]}"), iterations
+    )
+    results["cost_for_request"] = bench_sync(
+        lambda i: cost_for_request(
+            model_catalog.get(f"bench-model-{model_ids[i]}").pricing, input_tokens=1200, output_tokens=350
+        ),
+        iterations
+    )
+
+    messages = conversation()
+    results["anthropic.message_conversion"] = bench_sync(
+        lambda i: anthropic_payload("claude-3-5-haiku-20241022", messages, 0.7, 512), iterations
+    )
+    results["google.message_conversion"] = bench_sync(
+        lambda i: google_payload(messages, 0.7, 512), iterations
+    )
+
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: Dict[str, Dict], baseline_path: str, threshold: float) -> bool:
+    """Print the change in mean time per benchmark; True if none regressed past threshold"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\n📈 vs {baseline_path} ({baseline.get('commit', '?')})")
+    ok = True
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        change = (result["mean_us"] - before["mean_us"]) / before["mean_us"] * 100
+        regressed = change > threshold
+        ok = ok and not regressed
+        print(f"{name:<45}{before['mean_us']:>10.2f}{result['mean_us']:>10.2f}{change:>+9.1f}%{'  ❌' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--models", type=int, default=1_000)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--output", default="microbench.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold, percent")
+    args = parser.parse_args()
+
+    seed(args.keys, args.models)
+    results = asyncio.run(run(args.keys, args.models, args.iterations))
+
+    print(f"📊 Microbenchmarks ({args.keys} keys, {args.models} models, µs per call)")
+    print(f"{'benchmark':<45}{'mean':>10}{'p50':>10}{'p99':>10}{'ops/s':>14}")
+    for name, r in results.items():
+        print(f"{name:<45}{r['mean_us']:>10.2f}{r['p50_us']:>10.2f}{r['p99_us']:>10.2f}{r['ops_per_sec']:>14.0f}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "scale": {"keys": args.keys, "models": args.models, "iterations": args.iterations},
+            "results": results,
+        }, f, indent=2)
+    print(f"Saved {args.output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
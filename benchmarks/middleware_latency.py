@@ -0,0 +1,163 @@
+"""
+Before/after latency benchmark for the gateway middleware
+Compares the previous three BaseHTTPMiddleware layers (auth, rate limit,
+usage limit) against the single pure-ASGI GatewayMiddleware.
+
+Runs fully in-process (httpx ASGITransport, API keys pre-cached), so the
+numbers isolate middleware overhead from network and database time.
+
+Usage:
+    python -m benchmarks.middleware_latency [--requests 5000]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from decimal import Decimal
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.auth.api_key import get_api_key_snapshot
+from app.core.api_key_cache import api_key_cache, APIKeySnapshot, AccountSnapshot
+from app.core.rate_limiter import rate_limiter
+from app.core.usage_tracker import usage_tracker
+from app.middleware.gateway import GatewayMiddleware
+
+# Spread requests over several keys so the "pro" rate limit never trips
+NUM_KEYS = 50
+
+
+# ---------------------------------------------------------------------------
+# Legacy stack (the three BaseHTTPMiddleware layers this replaced)
+# ---------------------------------------------------------------------------
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        authorization = request.headers.get("Authorization")
+        if not authorization or not authorization.startswith("Bearer "):
+            return JSONResponse({"detail": "Missing Authorization header"}, status_code=401)
+
+        api_key = await get_api_key_snapshot(authorization.replace("Bearer ", "").strip())
+        if not api_key:
+            return JSONResponse({"detail": "Invalid or disabled API key"}, status_code=403)
+
+        request.state.api_key = api_key
+        return await call_next(request)
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if not hasattr(request.state, "api_key"):
+            return await call_next(request)
+
+        if not rate_limiter.is_allowed(api_key=request.state.api_key.key, plan="pro"):
+            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
+
+        return await call_next(request)
+
+
+class LegacyUsageLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if not hasattr(request.state, "api_key"):
+            return await call_next(request)
+
+        if not usage_tracker.increment(api_key=request.state.api_key.key, plan="pro"):
+            return JSONResponse({"detail": "Monthly usage limit exceeded"}, status_code=402)
+
+        return await call_next(request)
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/ping")
+    async def ping(request: Request):
+        if stack != "none" and not hasattr(request.state, "api_key"):
+            raise HTTPException(status_code=500, detail="api_key not set")
+        return {"ok": True}
+
+    if stack == "legacy":
+        # Registered innermost-first so auth runs before the limit checks
+        app.add_middleware(LegacyUsageLimitMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware)
+        app.add_middleware(LegacyAuthMiddleware)
+    elif stack == "gateway":
+        app.add_middleware(GatewayMiddleware)
+
+    return app
+
+
+def seed_keys() -> list:
+    keys = []
+    for i in range(NUM_KEYS):
+        key = f"beaver_bench{i:04d}"
+        api_key_cache.put(APIKeySnapshot(
+            id=f"bench_key_{i}",
+            key=key,
+            name="bench",
+            account_id=f"acc_bench_{i}",
+            is_active=True,
+            account=AccountSnapshot(id=f"acc_bench_{i}", email=f"bench{i}@example.com", balance=Decimal("100")),
+        ))
+        keys.append(key)
+    return keys
+
+
+async def run_stack(stack: str, keys: list, requests: int) -> list:
+    app = build_app(stack)
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up
+        for key in keys:
+            await client.get("/v1/ping", headers={"Authorization": f"Bearer {key}"})
+
+        for i in range(requests):
+            headers = {"Authorization": f"Bearer {keys[i % len(keys)]}"}
+            start = time.perf_counter()
+            response = await client.get("/v1/ping", headers=headers)
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+            if response.status_code != 200:
+                raise RuntimeError(f"{stack}: unexpected {response.status_code} {response.text}")
+
+    return latencies
+
+
+def summarize(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p99": ordered[int(len(ordered) * 0.99) - 1],
+    }
+
+
+async def main(requests: int):
+    keys = seed_keys()
+    results = {}
+
+    for stack in ("none", "legacy", "gateway"):
+        rate_limiter.store.clear()
+        usage_tracker.cache.clear()
+        results[stack] = summarize(await run_stack(stack, keys, requests))
+
+    print(f"📊 Middleware latency ({requests} sequential requests, µs per request)")
+    print(f"{'stack':<10}{'mean':>10}{'p50':>10}{'p99':>10}{'overhead':>12}")
+    baseline = results["none"]["mean"]
+    for stack, summary in results.items():
+        overhead = summary["mean"] - baseline
+        print(
+            f"{stack:<10}{summary['mean']:>10.1f}{summary['p50']:>10.1f}"
+            f"{summary['p99']:>10.1f}{overhead:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
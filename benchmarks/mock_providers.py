@@ -0,0 +1,214 @@
+"""
+Local mock of the six provider APIs for load benchmarks
+
+Serves OpenAI-compatible chat completions (OpenAI, DeepSeek, Perplexity,
+xAI), Anthropic messages and Google generateContent, buffered and
+streamed (SSE), with configurable latency and token counts. Each
+provider lives under its own path prefix; point the gateway at it with
+the *_BASE_URL settings (see base_urls()).
+
+Usage:
+    python -m benchmarks.mock_providers [--port 9100] [--latency-ms 200]
+        [--jitter-ms 50] [--input-tokens 50] [--output-tokens 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+OPENAI_COMPATIBLE = ("openai", "deepseek", "perplexity", "xai")
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = float(os.getenv("MOCK_LATENCY_MS", 200))
+    jitter_ms: float = float(os.getenv("MOCK_JITTER_MS", 0))
+    input_tokens: int = int(os.getenv("MOCK_INPUT_TOKENS", 50))
+    output_tokens: int = int(os.getenv("MOCK_OUTPUT_TOKENS", 200))
+    stream_chunks: int = int(os.getenv("MOCK_STREAM_CHUNKS", 20))
+
+
+config = MockConfig()
+app = FastAPI(title="beaver mock providers")
+
+
+def base_urls(host: str) -> dict:
+    """Gateway settings that route every provider to this server"""
+    return {
+        "OPENAI_BASE_URL": f"{host}/openai/v1",
+        "ANTHROPIC_BASE_URL": f"{host}/anthropic/v1",
+        "GOOGLE_BASE_URL": f"{host}/google/v1beta",
+        "DEEPSEEK_BASE_URL": f"{host}/deepseek/v1",
+        "PERPLEXITY_BASE_URL": f"{host}/perplexity",
+        "XAI_BASE_URL": f"{host}/xai/v1",
+    }
+
+
+async def upstream_delay(share: float = 1.0):
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    await asyncio.sleep(max(0.0, delay) * share / 1000)
+
+
+def completion_text() -> str:
+    # Roughly one word per output token
+    return " ".join(["token"] * config.output_tokens)
+
+
+def sse(events, done: bool = False, named: bool = False) -> StreamingResponse:
+    """
+    Stream events with the provider's framing: OpenAI-compatible streams
+    end with data: [DONE] (done), Anthropic names each event (named),
+    Gemini sends bare data lines and simply ends.
+    """
+    async def body():
+        for event in events:
+            if named:
+                yield f"event: {event['type']}\n"
+            yield f"data: {json.dumps(event)}\n\n"
+            await upstream_delay(1 / (config.stream_chunks + 1))
+        if done:
+            yield "data: [DONE]\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+def text_pieces():
+    words = completion_text().split(" ")
+    size = max(1, len(words) // config.stream_chunks)
+    return [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+
+
+def openai_completion(request_body: dict):
+    model = request_body.get("model", "mock")
+    usage = {
+        "prompt_tokens": config.input_tokens,
+        "completion_tokens": config.output_tokens,
+        "total_tokens": config.input_tokens + config.output_tokens,
+    }
+
+    if request_body.get("stream"):
+        events = [
+            {"model": model, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            for piece in text_pieces()
+        ]
+        events.append({"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        events.append({"model": model, "choices": [], "usage": usage})
+        return sse(events, done=True)
+
+    return JSONResponse({
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": completion_text()},
+            "finish_reason": "stop",
+        }],
+        "usage": usage,
+    })
+
+
+for _provider in OPENAI_COMPATIBLE:
+    _prefix = {"perplexity": "/perplexity"}.get(_provider, f"/{_provider}/v1")
+
+    @app.post(f"{_prefix}/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if not body.get("stream"):
+            await upstream_delay()
+        else:
+            # Time to first byte; the rest is spread over the chunks
+            await upstream_delay(1 / (config.stream_chunks + 1))
+        return openai_completion(body)
+
+
+@app.post("/anthropic/v1/messages")
+async def anthropic_messages(request: Request):
+    body = await request.json()
+
+    if body.get("stream"):
+        await upstream_delay(1 / (config.stream_chunks + 1))
+        events = [{"type": "message_start", "message": {"usage": {"input_tokens": config.input_tokens}}}]
+        events += [
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}
+            for piece in text_pieces()
+        ]
+        events.append({
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn"},
+            "usage": {"output_tokens": config.output_tokens},
+        })
+        events.append({"type": "message_stop"})
+        return sse(events, named=True)
+
+    await upstream_delay()
+    return JSONResponse({
+        "id": "msg_mock",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "mock"),
+        "content": [{"type": "text", "text": completion_text()}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": config.input_tokens, "output_tokens": config.output_tokens},
+    })
+
+
+def google_usage() -> dict:
+    return {
+        "promptTokenCount": config.input_tokens,
+        "candidatesTokenCount": config.output_tokens,
+        "totalTokenCount": config.input_tokens + config.output_tokens,
+    }
+
+
+@app.post("/google/v1beta/models/{model}:generateContent")
+async def google_generate(model: str):
+    await upstream_delay()
+    return JSONResponse({
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": completion_text()}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": google_usage(),
+    })
+
+
+@app.post("/google/v1beta/models/{model}:streamGenerateContent")
+async def google_stream(model: str):
+    await upstream_delay(1 / (config.stream_chunks + 1))
+    events = [
+        {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+        for piece in text_pieces()
+    ]
+    events.append({
+        "candidates": [{"content": {"role": "model", "parts": []}, "finishReason": "STOP"}],
+        "usageMetadata": google_usage(),
+    })
+    return sse(events)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--input-tokens", type=int, default=config.input_tokens)
+    parser.add_argument("--output-tokens", type=int, default=config.output_tokens)
+    parser.add_argument("--stream-chunks", type=int, default=config.stream_chunks)
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.jitter_ms = args.jitter_ms
+    config.input_tokens = args.input_tokens
+    config.output_tokens = args.output_tokens
+    config.stream_chunks = args.stream_chunks
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -3,7 +3,7 @@ Database initialization script for Beaver API Gateway
 Run this script to create all database tables
 """
 from app.database.db import engine, Base
-from app.database.models import Account, APIKey, UsageLog, Transaction, Model, RefreshToken
+from app.database.models import Account, APIKey, UsageLog, Transaction, Model, RefreshToken, CatalogVersion
 
 def init_db():
     """Create all database tables"""
@@ -19,6 +19,7 @@ def init_db():
     print("  - transactions")
     print("  - models")
     print("  - refresh_tokens")
+    print("  - catalog_version")
 
 if __name__ == "__main__":
     init_db()
@@ -1,22 +1,38 @@
 """
 Recalculate pricing for all models
 Run this daily to update pricing based on current model base prices
+
+    python recalculate_pricing.py            # recalculate and save
+    python recalculate_pricing.py --dry-run  # only show the price changes
 """
+import argparse
+
 from app.database.db import SessionLocal
 from app.core.pricing_engine import PricingEngine
 
-def recalculate_pricing():
+def recalculate_pricing(dry_run: bool = False):
     """Recalculate all model pricing"""
     db = SessionLocal()
     
     try:
         print("🔄 Recalculating pricing for all models...")
         engine = PricingEngine(db)
-        result = engine.recalculate_all_pricing()
+        result = engine.recalculate_all_pricing(dry_run=dry_run)
+        
+        if dry_run:
+            print(f"\n🔍 Dry run: {result['changed_models']} of {result['total_models']} models would change")
+            for change in result['changes']:
+                print(f"   {change['name']}:")
+                for field in ("category", "markup_percent", "beaver_ai_input_price", "beaver_ai_output_price"):
+                    old, new = change[field]
+                    if old != new:
+                        print(f"     {field}: {old} → {new}")
+            return
         
         print(f"\n✅ Pricing recalculation complete!")
         print(f"\n📊 Summary:")
         print(f"   Total models: {result['total_models']}")
+        print(f"   Changed models: {result['changed_models']}")
         print(f"   Percentiles:")
         print(f"     P20: ${result['percentiles']['p20']:.2f}")
         print(f"     P40: ${result['percentiles']['p40']:.2f}")
@@ -31,5 +47,7 @@ def recalculate_pricing():
         db.close()
 
 if __name__ == "__main__":
-    recalculate_pricing()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="Show price changes without saving them")
+    recalculate_pricing(dry_run=parser.parse_args().dry_run)
 
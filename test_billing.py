@@ -0,0 +1,149 @@
+"""
+Property-based tests for the fixed-point billing arithmetic
+Checks app/pricing/engine.py against the equivalent Decimal math, and
+pins its results to those of the float engine it replaced.
+
+Requires the dev dependencies (pip install -r requirements-dev.txt), then run either:
+    python -m pytest test_billing.py
+    python test_billing.py
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from hypothesis import given, settings, strategies as st
+
+from app.pricing.engine import (
+    CATEGORY_MARKUP,
+    PPM,
+    apply_markup,
+    calculate_request_cost,
+    from_micros,
+    picos_to_price,
+    price_to_picos,
+    to_micros,
+    to_ppm
+)
+
+MICRO = Decimal("0.000001")
+
+# $ per 1M tokens with up to six decimals, as stored in Numeric(16, 6)
+prices = st.decimals(min_value=0, max_value=10_000, places=6, allow_nan=False, allow_infinity=False)
+amounts = st.decimals(min_value=-10**9, max_value=10**9, places=6, allow_nan=False, allow_infinity=False)
+tokens = st.integers(min_value=0, max_value=10_000_000)
+markups = st.sampled_from([Decimal("10.0"), Decimal("12.5"), Decimal("15.0"), Decimal("5.5"), Decimal("3.5")])
+rates = st.decimals(min_value=0, max_value=2, places=4, allow_nan=False, allow_infinity=False)
+
+# Costs from the float engine before fixed-point billing:
+# round(input_tokens / 1M × input_price + output_tokens / 1M × output_price, 8),
+# stored in usage_logs.total_cost at six decimals.
+# (input tokens, output tokens, $ in / 1M, $ out / 1M, stored micro-dollars)
+LEGACY_COSTS = [
+    (1234, 567, "2.5", "10.0", 8755),  # 0.008755
+    (128000, 4096, "2.5", "10.0", 360960),  # 0.36096
+    (50, 200, "3.0", "15.0", 3150),  # 0.00315
+    (4096, 1024, "3.0", "15.0", 27648),  # 0.027648
+    (1000000, 1000000, "15.0", "75.0", 90000000),  # 90.0
+    (12, 0, "0.075", "0.3", 1),  # 0.0000009
+    (1, 1, "0.075", "0.3", 0),  # 0.00000038
+    (4096, 1024, "0.14", "0.28", 860),  # 0.00086016
+    (1234, 567, "0.15", "0.6", 525),  # 0.0005253
+    (128000, 4096, "0.0375", "0.15", 5414),  # 0.0054144
+    (0, 0, "5.0", "15.0", 0),  # 0.0
+]
+
+# Marked-up prices from the float engine: round(base × (1 + markup / 100), 6)
+LEGACY_MARKUPS = [
+    ("2.5", "MID_RANGE", "2.875"),
+    ("3.0", "PREMIUM", "3.165"),
+    ("0.075", "ULTRA_BUDGET", "0.0825"),
+    ("0.14", "BUDGET", "0.1575"),
+    ("15.0", "ULTRA_PREMIUM", "15.525"),
+    ("0.15", "BUDGET", "0.16875"),
+]
+
+# Exact half-micro ties: the float engine rounded the binary value (down),
+# fixed-point rounds half up. (base, category, legacy, now)
+CHANGED_MARKUPS = [
+    ("0.0375", "BUDGET", "0.042187", "0.042188"),  # 0.0421875
+    ("0.0375", "PREMIUM", "0.039562", "0.039563"),  # 0.0395625
+    ("0.0375", "ULTRA_PREMIUM", "0.038812", "0.038813"),  # 0.0388125
+]
+
+
+def decimal_cost(input_tokens, output_tokens, input_price, output_price, rate=Decimal(1)) -> Decimal:
+    """The reference: exact Decimal cost, rounded half up to the micro-dollar"""
+    cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000 * rate
+    return cost.quantize(MICRO, rounding=ROUND_HALF_UP)
+
+
+@given(amounts)
+def test_amounts_round_trip(amount):
+    assert from_micros(to_micros(amount)) == amount
+
+
+@given(st.integers(min_value=-10**15, max_value=10**15))
+def test_micros_round_trip(micros):
+    assert to_micros(from_micros(micros)) == micros
+    assert to_micros(str(from_micros(micros))) == micros
+
+
+@given(prices)
+def test_prices_round_trip(price):
+    assert picos_to_price(price_to_picos(price)) == price
+
+
+@given(tokens, tokens, prices, prices)
+@settings(max_examples=500)
+def test_request_cost_matches_decimal(input_tokens, output_tokens, input_price, output_price):
+    micros = calculate_request_cost(
+        input_tokens, output_tokens, price_to_picos(input_price), price_to_picos(output_price)
+    )
+    assert from_micros(micros) == decimal_cost(input_tokens, output_tokens, input_price, output_price)
+
+
+@given(tokens, tokens, prices, prices, rates)
+@settings(max_examples=500)
+def test_discounted_cost_matches_decimal(input_tokens, output_tokens, input_price, output_price, rate):
+    micros = calculate_request_cost(
+        input_tokens, output_tokens, price_to_picos(input_price), price_to_picos(output_price), to_ppm(rate)
+    )
+    assert from_micros(micros) == decimal_cost(input_tokens, output_tokens, input_price, output_price, rate)
+
+
+@given(prices, markups)
+def test_markup_matches_decimal(price, markup):
+    expected = (price * (1 + markup / 100)).quantize(MICRO, rounding=ROUND_HALF_UP)
+    assert picos_to_price(apply_markup(price_to_picos(price), markup)) == expected
+
+
+@given(tokens, tokens, prices, prices)
+def test_full_rate_is_default(input_tokens, output_tokens, input_price, output_price):
+    args = (input_tokens, output_tokens, price_to_picos(input_price), price_to_picos(output_price))
+    assert calculate_request_cost(*args) == calculate_request_cost(*args, PPM)
+
+
+def test_costs_match_legacy_engine():
+    for input_tokens, output_tokens, input_price, output_price, expected in LEGACY_COSTS:
+        micros = calculate_request_cost(
+            input_tokens, output_tokens, price_to_picos(input_price), price_to_picos(output_price)
+        )
+        assert micros == expected, (input_tokens, output_tokens, input_price, output_price)
+
+
+def test_markups_match_legacy_engine():
+    for base, category, expected in LEGACY_MARKUPS:
+        marked_up = apply_markup(price_to_picos(base), CATEGORY_MARKUP[category])
+        assert marked_up == price_to_picos(expected), (base, category)
+
+
+def test_markup_ties_round_half_up():
+    for base, category, legacy, expected in CHANGED_MARKUPS:
+        marked_up = apply_markup(price_to_picos(base), CATEGORY_MARKUP[category])
+        assert marked_up == price_to_picos(expected) == price_to_picos(legacy) + 1, (base, category)
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n🎉 All {len(tests)} billing properties hold")